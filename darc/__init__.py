@@ -34,6 +34,7 @@ and the fallback slowest single-threaded solutions when crawling.
 
 """
 
+from darc.db import register_priority  # pylint: disable=unused-import
 from darc.process import process as darc
 from darc.process import register as register_hooks  # pylint: disable=unused-import
 from darc.proxy import register as register_proxy  # pylint: disable=unused-import
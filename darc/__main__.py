@@ -4,21 +4,29 @@
 
 import argparse
 import contextlib
+import dataclasses
+import gzip
+import json
 import os
 import sys
+import time
 import traceback
 from typing import TYPE_CHECKING
 
+from darc._compat import nullcontext
 from darc.const import DB, DB_WEB, DEBUG, FLAG_DB, PATH_ID, PATH_LN
-from darc.db import _db_operation, _redis_command, save_requests
+from darc.db import (FRONTIER_QUEUES, OVERFLOW_HIGH, STATS_BUCKETS, STATS_WINDOWS, _db_operation,
+                     _redis_command, export_queues, import_queues, save_requests, stats)
 from darc.error import DatabaseOperaionFailed
 from darc.link import parse_link
 from darc.logging import DEBUG as LOG_DEBUG
 from darc.logging import WARNING as LOG_WARNING
 from darc.logging import logger
-from darc.model import (HostnameModel, HostnameQueueModel, HostsModel, RequestsHistoryModel,
-                        RequestsModel, RequestsQueueModel, RobotsModel, SeleniumModel,
-                        SeleniumQueueModel, SitemapModel, URLModel, URLThroughModel)
+from darc.model import (HostnameModel, HostnameQueueModel, HostReadyModel, HostsModel,
+                        OverflowQueueModel, QueueStatsModel, RequestsHistoryModel, RequestsModel,
+                        RequestsQueueModel, RobotsModel, SeleniumModel, SeleniumQueueModel, SitemapModel,
+                        URLModel, URLThroughModel, WorkerModel)
+from darc.model.utils import add_missing_columns
 from darc.process import process
 from darc.proxy.freenet import _FREENET_PROC
 from darc.proxy.i2p import _I2P_PROC
@@ -28,7 +36,9 @@ from darc.submit import SAVE_DB
 
 if TYPE_CHECKING:
     from argparse import ArgumentParser
-    from typing import Any, List, Optional
+    from typing import IO, Any, List, Optional
+
+    from darc.db import QueueStats
 
 # wait for Redis connection?
 _WAIT_REDIS = bool(int(os.getenv('DARC_REDIS', '1')))
@@ -78,6 +88,208 @@ def get_parser() -> 'ArgumentParser':
     return parser
 
 
+def get_stats_parser() -> 'ArgumentParser':
+    """Argument parser of the ``stats`` subcommand."""
+    parser = argparse.ArgumentParser('darc stats',
+                                     description='report statistics of the darc task queues')
+    parser.add_argument('-g', '--group', action='store', default='queue',
+                        choices=['queue', 'proxy', 'shard'], help='group statistics by')
+    parser.add_argument('-H', '--histogram', action='store_true', help='print histogram of scores')
+    parser.add_argument('-j', '--json', action='store_true', help='print statistics as JSON lines')
+    parser.add_argument('-w', '--watch', action='store', type=float, metavar='SECONDS',
+                        help='refresh statistics every SECONDS')
+    return parser
+
+
+def _print_stats(stats_list: 'List[QueueStats]', histogram: bool = False) -> None:
+    """Print statistics of the task queues as a table.
+
+    Args:
+        stats_list: Statistics of the task queues.
+        histogram: If print histogram of scores.
+
+    """
+    header = ['queue', 'group', 'depth', 'due', 'fresh', 'scheduled', 'leased', 'oldest_due']
+    if OVERFLOW_HIGH > 0:
+        header.append('spilled')
+    header.extend(f'in/{window}s' for window in STATS_WINDOWS)
+    header.extend(f'out/{window}s' for window in STATS_WINDOWS)
+    if histogram:
+        edges = [f'{edge:+d}s' for edge in STATS_BUCKETS]
+        header.extend(f'<{edge}' for edge in edges)
+        header.append(f'>={edges[-1]}')
+
+    rows = [header]
+    for item in stats_list:
+        row = [item.queue, item.group or '-', str(item.depth), str(item.due), str(item.fresh), str(item.scheduled),
+               str(item.leased), '-' if item.oldest_due is None else f'{item.oldest_due:.0f}s']
+        if OVERFLOW_HIGH > 0:
+            row.append(str(item.spilled))
+        row.extend(f'{rate:.2f}' for rate in item.rate_in.values())
+        row.extend(f'{rate:.2f}' for rate in item.rate_out.values())
+        if histogram:
+            row.extend(map(str, item.histogram))
+        rows.append(row)
+
+    widths = [max(len(row[index]) for row in rows) for index in range(len(header))]
+    for row in rows:
+        print('  '.join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def main_stats(argv: 'Optional[List[str]]' = None) -> int:
+    """Entrypoint of the ``stats`` subcommand.
+
+    Args:
+        argv: Optional command line arguments.
+
+    Returns:
+        Exit code.
+
+    See Also:
+        :func:`darc.db.stats`
+
+    """
+    parser = get_stats_parser()
+    args = parser.parse_args(argv)
+
+    if args.watch is not None and args.watch <= 0:
+        parser.error('invalid refresh interval')
+
+    _create_queue_tables()
+    if FLAG_DB:
+        with DB:
+            _db_operation(DB.create_tables, [QueueStatsModel])
+
+    while True:
+        stats_list = stats(args.group)
+        if args.json:
+            for item in stats_list:
+                print(json.dumps(dict(dataclasses.asdict(item), timestamp=time.time(),
+                                      scheduled=item.scheduled)), flush=True)
+        else:
+            _print_stats(stats_list, args.histogram)
+        if args.watch is None:
+            break
+        if not args.json:
+            print(flush=True)
+        time.sleep(args.watch)
+    return 0
+
+
+def get_export_parser() -> 'ArgumentParser':
+    """Argument parser of the ``export`` subcommand."""
+    parser = argparse.ArgumentParser('darc export',
+                                     description='export the darc task queues to a frontier dump')
+    parser.add_argument('-q', '--queue', action='append', choices=FRONTIER_QUEUES,
+                        help='task queue to export (default: all)')
+    parser.add_argument('-a', '--append', action='store_true', help='append to existing dump')
+    parser.add_argument('file', help='path to the dump, "-" for stdout, gzip compressed if ends with ".gz"')
+    return parser
+
+
+def get_import_parser() -> 'ArgumentParser':
+    """Argument parser of the ``import`` subcommand."""
+    parser = argparse.ArgumentParser('darc import',
+                                     description='import the darc task queues from frontier dumps')
+    parser.add_argument('-n', '--nx', action='store_true', help='do not update records already queued')
+    parser.add_argument('file', nargs='+', help='path to the dump, "-" for stdin, gzip compressed if ends with ".gz"')
+    return parser
+
+
+def _open_dump(path: str, mode: str) -> 'IO[bytes]':
+    """Open a frontier dump.
+
+    Args:
+        path: Path to the dump; ``-`` for stdin / stdout.
+        mode: File mode, i.e. ``rb``, ``wb`` or ``ab``.
+
+    Returns:
+        Binary file object of the dump, gzip compressed if
+        ``path`` ends with ``.gz``.
+
+    """
+    if path == '-':
+        file = sys.stdin.buffer if mode == 'rb' else sys.stdout.buffer
+        return nullcontext(file)  # type: ignore[return-value]
+    if path.endswith('.gz'):
+        return gzip.open(path, mode)  # type: ignore[return-value]
+    return open(path, mode)
+
+
+def _create_queue_tables() -> None:
+    """Create the task queue tables.
+
+    The tables are created if :data:`~darc.const.FLAG_DB` is :data:`True`,
+    and those of previous versions are migrated first (c.f.
+    :func:`~darc.model.utils.add_missing_columns`); otherwise, the overflow
+    tier table is created if :data:`~darc.db.OVERFLOW_HIGH` is positive.
+
+    """
+    if FLAG_DB:
+        with DB:
+            add_missing_columns(DB, RequestsQueueModel, SeleniumQueueModel)
+            _db_operation(DB.create_tables, [HostnameQueueModel, RequestsQueueModel, SeleniumQueueModel])
+    elif OVERFLOW_HIGH > 0:
+        with DB:
+            _db_operation(DB.create_tables, [OverflowQueueModel])
+
+
+def main_export(argv: 'Optional[List[str]]' = None) -> int:
+    """Entrypoint of the ``export`` subcommand.
+
+    Args:
+        argv: Optional command line arguments.
+
+    Returns:
+        Exit code.
+
+    See Also:
+        :func:`darc.db.export_queues`
+
+    """
+    parser = get_export_parser()
+    args = parser.parse_args(argv)
+
+    _create_queue_tables()
+    with _open_dump(args.file, 'ab' if args.append else 'wb') as file:
+        export_queues(file, args.queue or FRONTIER_QUEUES)
+    return 0
+
+
+def main_import(argv: 'Optional[List[str]]' = None) -> int:
+    """Entrypoint of the ``import`` subcommand.
+
+    Args:
+        argv: Optional command line arguments.
+
+    Returns:
+        Exit code.
+
+    See Also:
+        :func:`darc.db.import_queues`
+
+    """
+    parser = get_import_parser()
+    args = parser.parse_args(argv)
+
+    _create_queue_tables()
+    for path in args.file:
+        with _open_dump(path, 'rb') as file:
+            try:
+                import_queues(file, nx=args.nx)
+            except ValueError as error:
+                parser.error(f'{path}: {error}')
+    return 0
+
+
+#: Subcommands of the :mod:`darc` entrypoint.
+COMMANDS = {
+    'stats': main_stats,
+    'export': main_export,
+    'import': main_import,
+}
+
+
 def main(argv: 'Optional[List[str]]' = None) -> int:
     """Entrypoint.
 
@@ -88,6 +300,11 @@ def main(argv: 'Optional[List[str]]' = None) -> int:
         Exit code.
 
     """
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
     parser = get_parser()
     args = parser.parse_args(argv)
 
@@ -104,14 +321,27 @@ def main(argv: 'Optional[List[str]]' = None) -> int:
         while True:
             try:
                 with DB:
+                    # migrate tables of previous versions before creating the indexes
+                    add_missing_columns(DB, RequestsQueueModel, SeleniumQueueModel)
                     _db_operation(DB.create_tables, [
                         HostnameQueueModel, RequestsQueueModel, SeleniumQueueModel,
+                        QueueStatsModel, HostReadyModel, WorkerModel,
                     ])
             except Exception:
                 logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed,
                             line='DB.create_tables([HostnameQueueModel, ...]')
                 continue
             break
+    elif OVERFLOW_HIGH > 0:
+        while True:
+            try:
+                with DB:
+                    _db_operation(DB.create_tables, [OverflowQueueModel])
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed,
+                            line='DB.create_tables([OverflowQueueModel])')
+                continue
+            break
 
     if SAVE_DB:
         while True:
@@ -151,7 +381,7 @@ def main(argv: 'Optional[List[str]]' = None) -> int:
 
     # write to database
     link_pool = [parse_link(link, backref=None) for link in link_list]
-    save_requests(link_pool, score=0, nx=True)
+    save_requests(link_pool, score=0, nx=True, source='seed')
     logger.pline(LOG_DEBUG, logger.horizon)
 
     # init link file
@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=ungrouped-imports
+"""Asynchronous Web Crawler
+==============================
+
+The :mod:`darc.aiocrawl` module provides an :mod:`asyncio` counterpart of
+the :mod:`requests` crawler, i.e. :func:`~darc.aiocrawl.crawler`, such that
+one worker process keeps hundreds of fetches in flight, instead of idling
+on the proxies (e.g. Tor) most of the time.
+
+The coroutine follows exactly the same process as :func:`darc.crawl.crawler`,
+i.e. the same ``robots.txt`` checks, site customisation hooks (c.f.
+:func:`~darc.sites.crawler_hook`), saved documents and submitted data,
+except that
+
+* links of the hosts with the default hooks (c.f. :class:`~darc.sites.default.DefaultSite`)
+  are fetched through :mod:`aiohttp` (and :mod:`aiohttp_socks` for SOCKS
+  proxies), with the headers, cookies and proxies of the :mod:`requests`
+  session of the link (c.f. :func:`~darc.requests.request_session`), and
+  the response is converted into a :class:`requests.Response` object,
+  c.f. :func:`~darc.aiocrawl.build_response`;
+* the customised hooks, file and database I/O, and submissions run in
+  a thread pool of :data:`~darc.aiocrawl.ASYNC_THREADS` threads, where
+  the links fetched are parsed and persisted through the stages of
+  :func:`darc.crawl.crawler`, i.e. :func:`~darc.crawl.parse_requests`
+  and :func:`~darc.crawl.persist_requests`;
+* the task queues are updated through :mod:`darc.aiodb` while fetching;
+* at most :data:`~darc.aiocrawl.ASYNC_HOST` links per host, and
+  :data:`~darc.aiocrawl.ASYNC_PROXY` links per proxy type, are
+  crawled at the same time.
+
+The event loop of the workers is run by :func:`darc.process.process_crawler_async`
+if :data:`~darc.const.FLAG_AIO` is :data:`True`.
+
+"""
+
+import asyncio
+import contextlib
+import fnmatch
+import json
+import os
+import sys
+from typing import TYPE_CHECKING, TypeVar
+
+import requests
+import requests.structures
+import requests.utils
+
+from darc._compat import datetime
+from darc.aiodb import ack_requests, drop_requests, have_hostname, nack_requests
+from darc.const import FORCE
+from darc.crawl import Crawled, fetch_new_host, mark_failed, parse_requests, persist_requests
+from darc.db import lease_owner, worker_id
+from darc.error import LinkNoReturn
+from darc.logging import WARNING as LOG_WARNING
+from darc.logging import logger
+from darc.parse import check_robots, match_host, match_proxy
+from darc.proxy.null import save_invalid
+from darc.requests import request_session
+from darc.sites import _get_site, crawler_hook
+from darc.sites.default import DefaultSite
+
+try:
+    import aiohttp
+    import aiohttp_socks
+except ImportError:
+    aiohttp = None  # type: ignore[assignment]
+    aiohttp_socks = None  # type: ignore[assignment]
+
+_T = TypeVar('_T')
+
+if TYPE_CHECKING:
+    from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+    from aiohttp import BaseConnector, ClientResponse
+    from requests import Response, Session
+
+    import darc.link as darc_link  # Link
+
+# max fetches in flight per process
+ASYNC_CONCURRENCY = int(os.getenv('DARC_ASYNC_CONCURRENCY', '256'))
+if ASYNC_CONCURRENCY <= 0:
+    sys.exit(f'invalid asyncio concurrency: {ASYNC_CONCURRENCY}')
+
+# max fetches in flight per proxy type
+_ASYNC_PROXY = json.loads(os.getenv('DARC_ASYNC_PROXY', '{"*": 128}'))
+if isinstance(_ASYNC_PROXY, dict):
+    ASYNC_PROXY = {str(pattern): int(limit) for pattern, limit in _ASYNC_PROXY.items()}  # type: Dict[str, int]
+else:
+    ASYNC_PROXY = {'*': int(_ASYNC_PROXY)}
+del _ASYNC_PROXY
+if any(limit <= 0 for limit in ASYNC_PROXY.values()):
+    sys.exit(f'invalid asyncio proxy limits: {ASYNC_PROXY}')
+
+# max fetches in flight per host
+ASYNC_HOST = int(os.getenv('DARC_ASYNC_HOST', '2'))
+if ASYNC_HOST <= 0:
+    sys.exit(f'invalid asyncio host limit: {ASYNC_HOST}')
+
+# threads for blocking operations
+ASYNC_THREADS = int(os.getenv('DARC_ASYNC_THREADS', '32'))
+if ASYNC_THREADS <= 0:
+    sys.exit(f'invalid asyncio threads: {ASYNC_THREADS}')
+
+#: SOCKS schemes resolving hostnames through the proxy, mapping
+#: the schemes understood by :mod:`aiohttp_socks`.
+_SOCKS_RDNS = {
+    'socks5h': 'socks5',
+    'socks4a': 'socks4',
+}
+
+#: Connectors of the asynchronous HTTP client, mapping the SOCKS
+#: proxies to the connectors (:data:`None` for direct connections).
+_CONNECTORS = {}  # type: Dict[Optional[str], BaseConnector]
+
+# drop connectors inherited from the parent process
+os.register_at_fork(after_in_child=_CONNECTORS.clear)
+
+
+def proxy_limit(proxy: str) -> int:
+    """Concurrency limit of a proxy type.
+
+    Args:
+        proxy: Proxy type, c.f. :attr:`link.proxy <darc.link.Link.proxy>`.
+
+    Returns:
+        The limit of ``proxy`` in :data:`~darc.aiocrawl.ASYNC_PROXY` if
+        any, otherwise the greatest limit of the glob patterns matching
+        ``proxy``; :data:`~darc.aiocrawl.ASYNC_CONCURRENCY` if none.
+
+    """
+    if proxy in ASYNC_PROXY:
+        return ASYNC_PROXY[proxy]
+    return max((limit for pattern, limit in ASYNC_PROXY.items()
+                if fnmatch.fnmatchcase(proxy, pattern)), default=ASYNC_CONCURRENCY)
+
+
+class ConcurrencyLimit:
+    """Bounded concurrency per key, e.g. per proxy type or per host.
+
+    The semaphore of a key is created upon first use, and discarded once
+    no coroutine holds or waits for it, so that semaphores of the hosts
+    crawled do not pile up.
+
+    Args:
+        limit: Callback to get the limit of a key.
+
+    """
+
+    def __init__(self, limit: 'Callable[[str], int]') -> None:
+        #: Callback to get the limit of a key.
+        self.limit = limit
+        #: Semaphores and numbers of coroutines holding or waiting
+        #: for them, mapping the keys.
+        self.slots = {}  # type: Dict[str, List[Any]]
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key: str) -> 'AsyncIterator[None]':
+        """Hold a slot of a key till exit.
+
+        Args:
+            key: Key to be limited.
+
+        """
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = [asyncio.Semaphore(self.limit(key)), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self.slots[key]
+
+
+#: Concurrency limits of the hosts, c.f. :data:`~darc.aiocrawl.ASYNC_HOST`.
+_HOST_LIMIT = ConcurrencyLimit(lambda host: ASYNC_HOST)
+#: Concurrency limits of the proxy types, c.f. :func:`~darc.aiocrawl.proxy_limit`.
+_PROXY_LIMIT = ConcurrencyLimit(proxy_limit)
+
+
+async def run_in_thread(function: 'Callable[..., _T]', *args: 'Any', **kwargs: 'Any') -> '_T':
+    """Run a blocking function in the default executor.
+
+    Args:
+        function: Blocking function.
+        *args: Arbitrary positional arguments.
+
+    Keyword Args:
+        **kwargs: Arbitrary keyword arguments.
+
+    Returns:
+        Any return value from the ``function`` call.
+
+    The function runs on behalf of the worker of the event loop, which
+    claimed the links, c.f. :func:`~darc.db.lease_owner`.
+
+    """
+    owner = worker_id()
+
+    def call() -> '_T':
+        with lease_owner(owner):
+            return function(*args, **kwargs)
+
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, call)
+
+
+def _connector(proxy: 'Optional[str]') -> 'BaseConnector':
+    """Connector of the asynchronous HTTP client.
+
+    Args:
+        proxy: URL of the SOCKS proxy, e.g. ``socks5h://127.0.0.1:9050``;
+            :data:`None` for direct connections (or HTTP proxies).
+
+    Returns:
+        The connector, created upon first use. Hostnames are resolved
+        by the proxy for ``socks5h`` and ``socks4a`` proxies.
+
+    Raises:
+        RuntimeError: If :mod:`aiohttp` or :mod:`aiohttp_socks` is not available.
+
+    """
+    connector = _CONNECTORS.get(proxy)
+    if connector is None:
+        if aiohttp is None or aiohttp_socks is None:
+            raise RuntimeError('aiohttp and aiohttp-socks are required for asyncio crawler')
+
+        # NB: the concurrency is limited by ASYNC_PROXY and ASYNC_HOST instead
+        if proxy is None:
+            connector = aiohttp.TCPConnector(limit=0)
+        else:
+            scheme, sep, address = proxy.partition('://')
+            rdns = scheme in _SOCKS_RDNS
+            connector = aiohttp_socks.ProxyConnector.from_url(f'{_SOCKS_RDNS.get(scheme, scheme)}{sep}{address}',
+                                                              rdns=rdns, limit=0)
+        _CONNECTORS[proxy] = connector
+    return connector
+
+
+async def close() -> None:
+    """Close the connectors of the asynchronous HTTP client."""
+    connectors = list(_CONNECTORS.values())
+    _CONNECTORS.clear()
+    for connector in connectors:
+        await connector.close()
+
+
+def build_response(response: 'ClientResponse', content: bytes) -> 'Response':
+    """Convert an :mod:`aiohttp` response into a :mod:`requests` response.
+
+    Args:
+        response: Response from :mod:`aiohttp`.
+        content: Body of the response.
+
+    Returns:
+        The :class:`requests.Response` object, with the same URL, status,
+        headers (repeated headers joined by commas), cookies, request
+        and redirect history as from :mod:`requests`, such that it can be
+        saved and submitted as is, c.f. :func:`~darc.save.save_headers`
+        and :func:`~darc.submit.submit_requests`.
+
+    """
+    result = requests.Response()
+    result.status_code = response.status
+    result.reason = response.reason or ''
+    result.url = str(response.url)
+
+    headers = requests.structures.CaseInsensitiveDict()  # type: requests.structures.CaseInsensitiveDict[str]
+    for key, value in response.headers.items():
+        headers[key] = f'{headers[key]}, {value}' if key in headers else value
+    result.headers = headers
+    result.encoding = requests.utils.get_encoding_from_headers(headers)
+    result._content = content  # pylint: disable=protected-access
+
+    for name, morsel in response.cookies.items():
+        result.cookies.set(name, morsel.value, domain=morsel['domain'] or response.url.host or '',
+                           path=morsel['path'] or '/')
+
+    request = requests.PreparedRequest()
+    request.method = response.method
+    request.url = str(response.request_info.real_url)
+    request.headers = requests.structures.CaseInsensitiveDict(response.request_info.headers)
+    result.request = request
+
+    result.history = [build_response(history, b'') for history in response.history]
+    return result
+
+
+async def fetch(session: 'Session', link: 'darc_link.Link') -> 'Response':
+    """Fetch a link through the asynchronous HTTP client.
+
+    The request is the equivalent of :meth:`DefaultSite.crawler <darc.sites.default.DefaultSite.crawler>`
+    through ``session``, i.e. a ``GET`` request following redirects with
+    the headers, cookies and proxy of the session. Cookies set during the
+    request are kept in ``session`` afterwards.
+
+    Args:
+        session (requests.Session): Session object with proxy settings.
+        link: Link object to be crawled.
+
+    Returns:
+        requests.Response: The final response object with crawled data,
+        c.f. :func:`~darc.aiocrawl.build_response`.
+
+    Raises:
+        requests.Timeout: If the request timed out.
+        requests.ConnectionError: If the request failed.
+
+    """
+    proxy = requests.utils.select_proxy(link.url, session.proxies)
+    socks = proxy is not None and proxy.startswith('socks')
+
+    try:
+        async with aiohttp.ClientSession(connector=_connector(proxy if socks else None), connector_owner=False,
+                                         headers=dict(session.headers), cookies=session.cookies.get_dict(),
+                                         cookie_jar=aiohttp.CookieJar(unsafe=True)) as client:
+            async with client.get(link.url, allow_redirects=True, proxy=None if socks else proxy) as response:
+                content = await response.read()
+            for cookie in client.cookie_jar:
+                session.cookies.set(cookie.key, cookie.value, domain=cookie['domain'], path=cookie['path'] or '/')
+    except asyncio.TimeoutError as error:
+        raise requests.Timeout(f'timed out fetching {link.url}') from error
+    except (aiohttp.ClientError, aiohttp_socks.ProxyError, OSError) as error:
+        raise requests.ConnectionError(str(error)) from error
+    return build_response(response, content)
+
+
+async def _crawler_hook(timestamp: 'datetime', session: 'Session', link: 'darc_link.Link',
+                        supported: bool) -> 'Response':
+    """Crawl a link through the site customisation hook.
+
+    Args:
+        timestamp: Timestamp of the worker node reference.
+        session (requests.Session): Session object with proxy settings.
+        link: Link object to be crawled.
+        supported: If the schema of ``link`` is supported by :mod:`requests`.
+
+    Returns:
+        requests.Response: The final response object with crawled data.
+
+    Note:
+        Links of the hosts with the default hooks are fetched through
+        :func:`~darc.aiocrawl.fetch`; otherwise, the customised hooks
+        are called through :func:`~darc.sites.crawler_hook` in a thread.
+
+    """
+    if supported and _get_site(link).crawler is DefaultSite.crawler:
+        return await fetch(session, link)
+    return await run_in_thread(crawler_hook, timestamp, session, link)
+
+
+async def crawler(link: 'darc_link.Link') -> None:
+    """Asynchronous :mod:`requests` crawler for an entry link.
+
+    Args:
+        link: URL to be crawled by :mod:`requests`.
+
+    The coroutine holds a slot of the host (c.f. :data:`~darc.aiocrawl.ASYNC_HOST`)
+    and of the proxy type (c.f. :data:`~darc.aiocrawl.ASYNC_PROXY`) of the link
+    while crawling, and otherwise follows exactly the same process as
+    :func:`darc.crawl.crawler`.
+
+    """
+    async with _HOST_LIMIT.hold(link.host or ''), _PROXY_LIMIT.hold(link.proxy):
+        await _crawl(link)
+
+
+async def _crawl(link: 'darc_link.Link') -> None:
+    """Crawl an entry link, c.f. :func:`darc.crawl.crawler`.
+
+    Args:
+        link: URL to be crawled by :mod:`requests`.
+
+    The link is fetched through :func:`~darc.aiocrawl.fetch_requests`,
+    then parsed and persisted in a thread through the very stages of
+    :func:`darc.crawl.crawler`, i.e. :func:`~darc.crawl.parse_requests`
+    and :func:`~darc.crawl.persist_requests`.
+
+    """
+    crawled = await fetch_requests(link)
+    if crawled is None:
+        return
+
+    parsed = await run_in_thread(parse_requests, crawled)
+    if parsed is None:
+        return
+    await run_in_thread(persist_requests, parsed)
+
+
+async def fetch_requests(link: 'darc_link.Link') -> 'Optional[Crawled]':
+    """Fetch stage of :func:`~darc.aiocrawl.crawler`.
+
+    Args:
+        link: URL to be crawled by :mod:`requests`.
+
+    Returns:
+        The link crawled, c.f. :func:`~darc.aiocrawl._crawler_hook`;
+        :data:`None` if the link has been released already, e.g. ignored,
+        disallowed by ``robots.txt``, or failed to be crawled.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.crawl.fetch_requests`.
+
+    """
+    logger.info('[REQUESTS] Requesting %s', link.url)
+    try:
+        if match_proxy(link.proxy):
+            logger.warning('[REQUESTS] Ignored proxy type from %s (%s)', link.url, link.proxy)
+            await drop_requests(link)
+            return None
+
+        if match_host(link.host):
+            logger.warning('[REQUESTS] Ignored hostname from %s (%s)', link.url, link.proxy)
+            await drop_requests(link)
+            return None
+
+        # timestamp
+        timestamp = datetime.now()
+
+        # get the session object in advance
+        session = request_session(link)
+
+        # check whether schema supported by :mod:`requests`
+        try:
+            session.get_adapter(link.url)  # test for adapter
+            requests_supported = True
+        except requests.exceptions.InvalidSchema:
+            requests_supported = False
+
+        # if need to test for new host
+        if requests_supported:
+            # if it's a new host
+            flag_have, force_fetch = await have_hostname(link)
+            if not flag_have or force_fetch:
+                await run_in_thread(fetch_new_host, timestamp, link, force=force_fetch)
+
+            if not FORCE and not await run_in_thread(check_robots, link):
+                logger.warning('[REQUESTS] Robots disallowed link from %s', link.url)
+                await ack_requests(link)
+                return None
+
+        # reuse the session object
+        with session:
+            try:
+                # requests session hook
+                response = await _crawler_hook(timestamp, session, link, requests_supported)
+            except requests.exceptions.InvalidSchema:
+                logger.pexc(message=f'[REQUESTS] Fail to crawl {link.url}')
+                await run_in_thread(save_invalid, link)
+                await drop_requests(link)
+                return None
+            except requests.RequestException:
+                logger.pexc(message=f'[REQUESTS] Fail to crawl {link.url}')
+                await nack_requests(link)
+                return None
+            except LinkNoReturn as error:
+                logger.pexc(LOG_WARNING, f'[REQUESTS] Removing from database: {link.url}')
+                if error.drop:
+                    await drop_requests(link)
+                else:
+                    await ack_requests(link)
+                return None
+        return Crawled(timestamp, link, session, response)
+    except Exception:
+        await run_in_thread(mark_failed, link)
+        logger.ptb('[Error from %s]', link.url)
+        await nack_requests(link)
+
+    logger.info('[REQUESTS] Requested %s', link.url)
+    return None
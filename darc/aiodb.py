@@ -0,0 +1,919 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=ungrouped-imports
+"""Asynchronous Link Database
+================================
+
+The :mod:`darc.aiodb` module provides :mod:`asyncio` counterparts of
+the task queue operations in :mod:`darc.db`, e.g. :func:`~darc.aiodb.save_requests`
+and :func:`~darc.aiodb.load_requests`, such that the task queues can
+be shared with an event loop based crawler.
+
+The coroutines follow exactly the same queue semantics as :mod:`darc.db`,
+i.e. the same Redis keys, Lua scripts, leases, shards, seen filter and
+throughput counters, thus synchronous and asynchronous workers can
+work on the same task queues side by side.
+
+For the `Redis`_ backend, the coroutines are built upon :mod:`redis.asyncio`
+with a connection pool of at most :data:`~darc.const.REDIS_POOL` connections
+per event loop. Failed commands are retried with the same backoff policy
+and circuit breaker as :mod:`darc.db` (c.f. :func:`~darc.db._retry_failed`),
+without blocking the event loop.
+
+If :data:`~darc.const.FLAG_DB` is :data:`True`, the :mod:`peewee` based
+operations of :mod:`darc.db` are run in the default executor of the
+event loop, as :mod:`peewee` has no asynchronous interface.
+
+.. _Redis: https://redis.io/
+
+"""
+
+import asyncio
+import math
+import os
+import time
+import weakref
+from typing import TYPE_CHECKING, TypeVar, cast, overload
+
+import peewee
+import redis as redis_lib
+
+import darc.db as darc_db
+from darc.const import CHECK, FLAG_DB, KEEPALIVE, REDIS_HEALTH, REDIS_POOL, TIME_CACHE
+from darc.db import (_REDIS_BREAKER, _REDIS_TRANSIENT, _STREAM_GROUPS, AFFINITY, BULK_SIZE, LOCK_TIMEOUT, MAX_POOL,
+                     OVERFLOW_HIGH, PRIORITY, REDIS_LOCK, REDIS_QUEUE, SEEN_FILTER, SHARD_NUM, STREAM_GROUP,
+                     PriorityContext, _affinity_filter, _cache_hostname, _cached_hostname, _claim_legacy,
+                     _claim_params, _count_enqueued, _failure_key, _gen_arg_msg, _interleave_hosts, _lease_key,
+                     _order_shards, _overflow_drop, _overflow_refill, _overflow_spill, _payload_delete,
+                     _payload_prefix, _payload_set, _pop_stats_pending, _queue_stats_pending, _registry_key,
+                     _release_params, _release_score, _retry_failed, _seen_args, _seen_cache,
+                     _seen_generation, _seen_keys, _seen_uncached, _shard_key, _stream_key,
+                     _stream_params, lease_owner, priority_score, shard_name, worker_id)
+from darc.error import RedisCommandFailed
+from darc.link import Link, dumps_link, loads_link
+from darc.logging import VERBOSE as LOG_VERBOSE
+from darc.logging import logger
+from darc.parse import _check
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis<4.2
+    aioredis = None  # type: ignore[assignment]
+
+_T = TypeVar('_T')
+
+if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop
+    from typing import (Any, AsyncContextManager, Callable, Dict, List, MutableMapping, Optional,
+                        Tuple, Union)
+
+    from redis.asyncio import Redis
+    from redis.asyncio.client import Pipeline
+    from redis.commands.core import AsyncScript
+    from typing_extensions import Literal
+
+# Redis URL
+_REDIS_URL = os.getenv('REDIS_URL')
+
+# Redis clients and scripts per event loop
+_REDIS_CLIENT = weakref.WeakKeyDictionary()  # type: MutableMapping[AbstractEventLoop, Tuple[Redis, Dict[str, AsyncScript]]]  # pylint: disable=line-too-long
+
+# drop clients inherited from the parent process
+os.register_at_fork(after_in_child=_REDIS_CLIENT.clear)
+
+
+def get_redis() -> 'Redis':
+    """Redis client of the running event loop.
+
+    Returns:
+        A :class:`redis.asyncio.Redis` client connected to :envvar:`REDIS_URL`,
+        with a connection pool of at most :data:`~darc.const.REDIS_POOL`
+        connections. The client is created upon first use in each event loop.
+
+    Raises:
+        RuntimeError: If :mod:`redis.asyncio` is not available, or
+            :envvar:`REDIS_URL` is not set.
+
+    """
+    return _redis_client()[0]
+
+
+def _redis_client() -> 'Tuple[Redis, Dict[str, AsyncScript]]':
+    """Redis client and registered scripts of the running event loop.
+
+    Returns:
+        The :class:`redis.asyncio.Redis` client and the Lua scripts
+        registered upon it, c.f. :data:`~darc.db.REDIS_SCRIPTS`.
+
+    Raises:
+        RuntimeError: If :mod:`redis.asyncio` is not available, or
+            :envvar:`REDIS_URL` is not set.
+
+    """
+    loop = asyncio.get_event_loop()
+    client = _REDIS_CLIENT.get(loop)
+    if client is None:
+        if aioredis is None:
+            raise RuntimeError('redis>=4.2 is required for asyncio support')
+        if _REDIS_URL is None:
+            raise RuntimeError('REDIS_URL is not set')
+
+        redis = aioredis.Redis.from_url(_REDIS_URL, max_connections=REDIS_POOL,
+                                        socket_keepalive=KEEPALIVE > 0,
+                                        health_check_interval=REDIS_HEALTH)  # type: Redis
+        client = redis, {
+            'claim': redis.register_script(darc_db._REDIS_CLAIM_SCRIPT),  # pylint: disable=protected-access
+            'stream': redis.register_script(darc_db._REDIS_STREAM_SCRIPT),  # pylint: disable=protected-access
+            'release': redis.register_script(darc_db._REDIS_RELEASE_SCRIPT),  # pylint: disable=protected-access
+            'seen': redis.register_script(darc_db._REDIS_SEEN_SCRIPT),  # pylint: disable=protected-access
+        }
+        _REDIS_CLIENT[loop] = client
+    return client
+
+
+async def close() -> None:
+    """Close the Redis client of the running event loop."""
+    client = _REDIS_CLIENT.pop(asyncio.get_event_loop(), None)
+    if client is not None:
+        await client[0].close()
+        await client[0].connection_pool.disconnect()
+
+
+async def _redis_command(command: str, *args: 'Any', **kwargs: 'Any') -> 'Any':
+    """Wrapper function for Redis command.
+
+    Args:
+        command: Command name.
+        *args: Arbitrary arguments for the Redis command.
+
+    Keyword Args:
+        **kwargs: Arbitrary keyword arguments for the Redis command.
+
+    Return:
+        Values returned from the Redis command.
+
+    Warns:
+        RedisCommandFailed: Warns at each round when the command failed.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._redis_command`.
+
+    """
+    method = getattr(get_redis(), command)
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            value = await method(*args, **kwargs)
+        except _REDIS_TRANSIENT:
+            delay = _retry_failed(_REDIS_BREAKER, attempt, start, RedisCommandFailed,
+                                  lambda: f'value = await redis.{command}({_gen_arg_msg(*args, **kwargs)})')
+            if delay is not None:
+                await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        break
+    _REDIS_BREAKER.success()
+    return value
+
+
+async def _redis_script(name: 'Literal["claim", "stream", "release", "seen"]', keys: 'List[str]', args: 'List[Any]') -> 'Any':  # pylint: disable=line-too-long
+    """Wrapper function for Redis (Lua) script.
+
+    Args:
+        name: Script name, c.f. :data:`~darc.db.REDIS_SCRIPTS`.
+        keys: Key names accessed by the script.
+        args: Arbitrary arguments for the script.
+
+    Return:
+        Values returned from the Redis script.
+
+    Warns:
+        RedisCommandFailed: Warns at each round when the script failed.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._redis_script`.
+
+    """
+    script = _redis_client()[1][name]
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            value = await script(keys=keys, args=args)
+        except _REDIS_TRANSIENT:
+            delay = _retry_failed(_REDIS_BREAKER, attempt, start, RedisCommandFailed,
+                                  lambda: f'value = await REDIS_SCRIPTS[{name!r}]({_gen_arg_msg(keys=keys, args=args)})')  # pylint: disable=line-too-long
+            if delay is not None:
+                await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        break
+    _REDIS_BREAKER.success()
+    return value
+
+
+async def _redis_pipeline(build: 'Callable[[Pipeline], None]', *, transaction: bool = False) -> 'List[Any]':
+    """Wrapper function for Redis pipeline.
+
+    Args:
+        build: Callback to queue commands onto the
+            :class:`~redis.asyncio.client.Pipeline` object.
+
+    Keyword Args:
+        transaction: If wrap the commands in ``MULTI`` / ``EXEC``.
+
+    Return:
+        Values returned from the queued Redis commands.
+
+    Warns:
+        RedisCommandFailed: Warns at each round when the pipeline failed.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._redis_pipeline`.
+
+    """
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        pipeline = get_redis().pipeline(transaction=transaction)  # type: Pipeline
+        try:
+            build(pipeline)
+            value = await pipeline.execute()
+        except _REDIS_TRANSIENT:
+            delay = _retry_failed(_REDIS_BREAKER, attempt, start, RedisCommandFailed,
+                                  lambda: f'value = await redis.pipeline({build.__name__})')
+            if delay is not None:
+                await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        finally:
+            await pipeline.reset()
+        break
+    _REDIS_BREAKER.success()
+    return value
+
+
+async def _db_operation(function: 'Callable[..., _T]', *args: 'Any', **kwargs: 'Any') -> '_T':
+    """Run a :mod:`darc.db` operation in the default executor.
+
+    Args:
+        function: Synchronous operation from :mod:`darc.db`.
+        *args: Arbitrary positional arguments.
+
+    Keyword Args:
+        **kwargs: Arbitrary keyword arguments.
+
+    Returns:
+        Any return value from the ``function`` call.
+
+    The operation runs on behalf of the worker of the event loop,
+    such that the links are claimed and released by the same lease
+    owner, c.f. :func:`~darc.db.lease_owner`.
+
+    """
+    owner = worker_id()
+
+    def call() -> '_T':
+        with lease_owner(owner):
+            return function(*args, **kwargs)
+
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, call)
+
+
+def _redis_get_lock(key: 'Literal["queue_hostname", "queue_requests", "queue_selenium"]') -> 'AsyncContextManager':
+    """Get a lock for Redis operations.
+
+    Args:
+        key: Lock target key.
+
+    Returns:
+        A :class:`redis.asyncio.lock.Lock` on the same key as
+        the :class:`pottery.redlock.Redlock` used by :mod:`darc.db`.
+
+    See Also:
+        If :data:`~darc.db.REDIS_LOCK` is :data:`False`, returns a
+        dummy asynchronous context manager instead.
+
+    """
+    if REDIS_LOCK:
+        return get_redis().lock(f'redlock:{key}', timeout=LOCK_TIMEOUT / 1_000)
+    return _nullcontext()
+
+
+class _nullcontext:  # pylint: disable=invalid-name
+    """Asynchronous :class:`contextlib.nullcontext`."""
+
+    async def __aenter__(self) -> None:
+        return None
+
+    async def __aexit__(self, *exc: 'Any') -> None:
+        return None
+
+
+async def have_hostname(link: 'Link') -> 'Tuple[bool, bool]':
+    """Check if current link is a new host.
+
+    Args:
+        link: Link to check against.
+
+    Returns:
+        A tuple of two :obj:`bool` values representing
+        if such link is a known host and needs force
+        refetch respectively.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.have_hostname`.
+
+    """
+    if _cached_hostname(link.host):
+        return True, False
+
+    if FLAG_DB:
+        return await _db_operation(darc_db.have_hostname, link)
+    return await _have_hostname_redis(link)
+
+
+async def _have_hostname_redis(link: 'Link') -> 'Tuple[bool, bool]':
+    """Check if current link is a new host.
+
+    The function checks the ``queue_hostname`` database.
+
+    Args:
+        link: Link to check against.
+
+    Returns:
+        A tuple of two :obj:`bool` values representing
+        if such link is a known host and needs force
+        refetch respectively.
+
+    """
+    new_score = time.time()
+    if TIME_CACHE is None:
+        threshold = math.inf
+    else:
+        threshold = new_score - TIME_CACHE.total_seconds()
+
+    async with _redis_get_lock('queue_hostname'):
+        score = await _redis_command('zscore', 'queue_hostname', link.host)  # type: Optional[float]
+        if score is None:
+            have_flag = False
+            force_fetch = False
+        else:
+            have_flag = True
+            force_fetch = score < threshold
+
+    if score is None or force_fetch:
+        await _redis_command('zadd', 'queue_hostname', {
+            link.host: new_score,
+        })
+        _cache_hostname(link.host, new_score)
+    else:
+        _cache_hostname(link.host, score)
+    return have_flag, force_fetch
+
+
+async def drop_hostname(link: 'Link') -> None:
+    """Remove link from the hostname database.
+
+    Args:
+        link: Link to be removed.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.drop_hostname`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.drop_hostname, link)
+
+    try:
+        async with _redis_get_lock('queue_hostname'):
+            await _redis_command('zrem', 'queue_hostname', link.host)
+    finally:
+        with darc_db._HOSTNAME_LOCK:  # pylint: disable=protected-access
+            darc_db._HOSTNAME_CACHE.pop(link.host, None)  # pylint: disable=protected-access
+    return None
+
+
+async def drop_requests(link: 'Link') -> None:
+    """Remove link from the :mod:`requests` database.
+
+    Args:
+        link: Link to be removed.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.drop_requests`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.drop_requests, link)
+    return await _redis_drop('queue_requests', link)
+
+
+async def drop_selenium(link: 'Link') -> None:
+    """Remove link from the :mod:`selenium` database.
+
+    Args:
+        link: Link to be removed.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.drop_selenium`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.drop_selenium, link)
+    return await _redis_drop('queue_selenium', link)
+
+
+async def _redis_drop(key: 'Literal["queue_requests", "queue_selenium"]', link: 'Link') -> None:
+    """Remove link from a task queue.
+
+    Args:
+        key: Name of the task queue.
+        link: Link to be removed.
+
+    """
+    queue = _shard_key(key, shard_name(link))
+
+    def drop(pipeline: 'Pipeline') -> None:
+        pipeline.zrem(queue, link.name)
+        pipeline.hdel(_lease_key(queue), link.name)
+        pipeline.hdel(_failure_key(queue), link.name)
+        _payload_delete(pipeline, _payload_prefix(shard_name(link)), link.name)
+
+    async with _redis_get_lock(key):
+        await _redis_pipeline(drop)
+    if OVERFLOW_HIGH > 0:
+        await _db_operation(_overflow_drop, key, [link])
+
+
+async def filter_seen(entries: 'List[Link]') -> 'List[Link]':
+    """Drop links which have been saved before.
+
+    Args:
+        entries: Links to be saved.
+
+    Returns:
+        Links which have not been seen.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.filter_seen`.
+
+    """
+    if not SEEN_FILTER:
+        return entries
+    generation = _seen_generation()
+    pool = _seen_uncached(entries, generation)
+
+    if FLAG_DB:
+        link_pool = list(pool.values())
+    else:
+        keys, expire = _seen_keys(generation)
+
+        link_pool = []
+        for chunk in peewee.chunked(pool.values(), BULK_SIZE):
+            flags = await _redis_script('seen', keys, _seen_args(chunk, expire))  # type: List[int]
+            link_pool.extend(link for link, seen in zip(chunk, flags) if not seen)
+
+    _seen_cache(pool, generation)
+    return link_pool
+
+
+async def _redis_enqueue(key: 'Literal["queue_requests", "queue_selenium"]', pool: 'List[Link]',
+                         score: float, nx: bool = False, xx: bool = False,
+                         source: 'Optional[str]' = None) -> None:
+    """Enqueue links to a task queue in one round trip.
+
+    Args:
+        key: Name of the task queue.
+        pool: Links to be added to the task queue.
+        score: Score to for the Redis sorted set.
+        nx: Forces ``ZADD`` to only create new elements and not to
+            update scores for elements that already exist.
+        xx: Forces ``ZADD`` to only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._redis_enqueue`.
+
+    """
+    if not pool:
+        return
+
+    shards = {}  # type: Dict[Optional[str], List[Link]]
+    for link in pool:
+        shards.setdefault(shard_name(link), []).append(link)
+
+    context = PriorityContext(source=source)
+    pending = _pop_stats_pending()
+
+    def enqueue(pipeline: 'Pipeline') -> None:
+        _queue_stats_pending(pipeline, pending)  # type: ignore[arg-type]
+        for shard, links in shards.items():
+            prefix = _payload_prefix(shard)
+            for link in links:
+                _payload_set(pipeline, prefix, link.name, dumps_link(link))
+            pipeline.zadd(_shard_key(key, shard), {
+                link.name: priority_score(link, score, context) for link in links
+            }, nx=nx, xx=xx)
+        if SHARD_NUM > 0:
+            pipeline.sadd(_registry_key(key), *shards)
+        if OVERFLOW_HIGH > 0:
+            for shard in shards:
+                pipeline.zcard(_shard_key(key, shard))
+
+    async with _redis_get_lock(key):
+        values = await _redis_pipeline(enqueue)
+    _count_enqueued(key, shards, pending, values)
+    if OVERFLOW_HIGH > 0:
+        for shard, size in zip(shards, values[-len(shards):]):
+            if size > OVERFLOW_HIGH:
+                await _db_operation(_overflow_spill, key, shard, size)
+
+
+async def _redis_save(key: 'Literal["queue_requests", "queue_selenium"]', entries: 'Union[Link, List[Link]]',
+                      single: bool = False, score: 'Optional[float]' = None,
+                      nx: bool = False, xx: bool = False, source: 'Optional[str]' = None) -> None:
+    """Save links to a task queue.
+
+    Args:
+        key: Name of the task queue.
+        entries: Links to be added to the task queue.
+        single: Indicate if ``entries`` is a :obj:`list` of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Forces ``ZADD`` to only create new elements and not to
+            update scores for elements that already exist.
+        xx: Forces ``ZADD`` to only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    """
+    if score is None:
+        score = time.time()
+
+    if single:
+        await _redis_enqueue(key, [cast('Link', entries)], score, nx=nx, xx=xx, source=source)
+        return
+
+    for chunk in peewee.chunked(cast('List[Link]', entries), BULK_SIZE):
+        pool = list(filter(lambda link: isinstance(link, Link), chunk))  # type: List[Link]
+        await _redis_enqueue(key, pool, score, nx=nx, xx=xx, source=source)
+
+
+@overload
+async def save_requests(entries: 'Link', single: 'Literal[True]',
+                        score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                        source: 'Optional[str]' = None) -> None: ...
+@overload
+async def save_requests(entries: 'List[Link]', single: 'Literal[False]' = False,
+                        score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                        source: 'Optional[str]' = None) -> None: ...
+async def save_requests(entries: 'Union[Link, List[Link]]', single: bool = False,
+                        score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                        source: 'Optional[str]' = None) -> None:
+    """Save link to the :mod:`requests` database.
+
+    Args:
+        entries: Links to be added to the :mod:`requests` database.
+            It can be either a :obj:`list` of links, or a single
+            link string (if ``single`` set as :data:`True`).
+        single: Indicate if ``entries`` is a :obj:`list` of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Only create new elements and not to
+            update scores for elements that already exist.
+        xx: Only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.save_requests`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.save_requests, entries, single, score, nx, xx, source)  # type: ignore[call-overload]
+
+    if nx and not single:
+        entries = await filter_seen(cast('List[Link]', entries))
+    return await _redis_save('queue_requests', entries, single, score, nx, xx, source)
+
+
+@overload
+async def save_selenium(entries: 'Link', single: 'Literal[True]',
+                        score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                        source: 'Optional[str]' = None) -> None: ...
+@overload
+async def save_selenium(entries: 'List[Link]', single: 'Literal[False]' = False,
+                        score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                        source: 'Optional[str]' = None) -> None: ...
+async def save_selenium(entries: 'Union[Link, List[Link]]', single: bool = False,
+                        score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                        source: 'Optional[str]' = None) -> None:
+    """Save link to the :mod:`selenium` database.
+
+    Args:
+        entries: Links to be added to the :mod:`selenium` database.
+            It can be either a :obj:`list` of links, or a single
+            link string (if ``single`` set as :data:`True`).
+        single: Indicate if ``entries`` is a :obj:`list` of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Only create new elements and not to
+            update scores for elements that already exist.
+        xx: Only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.save_selenium`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.save_selenium, entries, single, score, nx, xx, source)  # type: ignore[call-overload]
+    if not entries:
+        return None
+    return await _redis_save('queue_selenium', entries, single, score, nx, xx, source)
+
+
+async def _redis_flush_stats() -> None:
+    """Flush pending throughput counters to Redis."""
+    pending = _pop_stats_pending()
+    if not pending:
+        return
+
+    def flush(pipeline: 'Pipeline') -> None:
+        _queue_stats_pending(pipeline, pending)  # type: ignore[arg-type]
+    await _redis_pipeline(flush)
+
+
+async def _redis_claim(key: 'Literal["queue_requests", "queue_selenium"]') -> 'List[Link]':
+    """Claim a batch of due links from a task queue.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        List of claimed links from the task queue.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._redis_claim`.
+
+    """
+    await _redis_flush_stats()
+    if SHARD_NUM <= 0:
+        return _interleave_hosts(await _redis_claim_shard(key, None, MAX_POOL))
+
+    names = sorted(name.decode() for name in await _redis_command('smembers', _registry_key(key)))
+    if AFFINITY:
+        names = await _db_operation(_affinity_filter, key, names)
+    link_pool = []  # type: List[Link]
+    for shard in _order_shards(key, names):
+        link_pool.extend(await _redis_claim_shard(key, shard, MAX_POOL - len(link_pool)))
+        if len(link_pool) >= MAX_POOL:
+            break
+    return _interleave_hosts(link_pool)
+
+
+async def _stream_group(stream: str) -> None:
+    """Create the consumer group of a stream.
+
+    Args:
+        stream: Name of the stream.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._stream_group`.
+
+    """
+    if stream in _STREAM_GROUPS:
+        return
+    try:
+        await _redis_command('xgroup_create', stream, STREAM_GROUP, id='0', mkstream=True)
+    except redis_lib.exceptions.ResponseError as error:
+        # BUSYGROUP, i.e. created by another worker already
+        if not str(error).startswith('BUSYGROUP'):
+            raise
+    _STREAM_GROUPS.add(stream)
+
+
+async def _redis_claim_shard(key: 'Literal["queue_requests", "queue_selenium"]',
+                             shard: 'Optional[str]', limit: float) -> 'List[Link]':
+    """Claim a batch of due links from a shard of a task queue.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        limit: Maximum number of links to claim.
+
+    Returns:
+        List of claimed links from the shard.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._redis_claim_shard`.
+
+    """
+    link_pool = await _redis_claim_once(key, shard, limit)
+    # NB: the overflow tier is refilled through blocking database operations
+    if (OVERFLOW_HIGH > 0 and await _db_operation(_overflow_refill, key, shard, limit - len(link_pool)) > 0
+            and len(link_pool) < limit):
+        link_pool.extend(await _redis_claim_once(key, shard, limit - len(link_pool)))
+    return link_pool
+
+
+async def _redis_claim_once(key: 'Literal["queue_requests", "queue_selenium"]',
+                            shard: 'Optional[str]', limit: float) -> 'List[Link]':
+    """Claim a batch of due links from a shard of a task queue in Redis.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        limit: Maximum number of links to claim.
+
+    Returns:
+        List of claimed links from the shard.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._redis_claim_once`.
+
+    """
+    if REDIS_QUEUE == 'stream':
+        await _stream_group(_stream_key(_shard_key(key, shard)))
+        temp_pool = await _redis_script('stream', *_stream_params(key, shard, limit))  # type: List[bytes]
+    else:
+        temp_pool = await _redis_script('claim', *_claim_params(key, shard, limit))
+    link_pool = [loads_link(link) for link in temp_pool]
+
+    # re-encode legacy (pickled) payloads
+    legacy_pool = _claim_legacy(temp_pool, link_pool)
+    if legacy_pool:
+        def reencode(pipeline: 'Pipeline') -> None:
+            for link in legacy_pool:
+                _payload_set(pipeline, _payload_prefix(shard), link.name, dumps_link(link), xx=True)
+        await _redis_pipeline(reencode)
+    return link_pool
+
+
+async def _load(key: 'Literal["queue_requests", "queue_selenium"]',
+                function: 'Callable[[bool], List[Link]]', check: bool) -> 'List[Link]':
+    """Load links from a task queue.
+
+    Args:
+        key: Name of the task queue.
+        function: Synchronous counterpart from :mod:`darc.db`.
+        check: If perform checks on loaded links.
+
+    Returns:
+        List of loaded links from the task queue.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(function, check)
+
+    if _REDIS_BREAKER.is_open():
+        logger.warning(f'[{key[6:].upper()}] Circuit open, pause claiming')
+        return []
+
+    link_pool = await _redis_claim(key)
+    if check:
+        # checks may issue blocking requests, c.f. :data:`~darc.const.CHECK_NG`
+        link_pool = await _db_operation(_check, link_pool)
+
+    logger.plog(LOG_VERBOSE, f'-*- [{key[6:].upper()}] LINK POOL -*-',
+                object=sorted(link.url for link in link_pool))
+    return link_pool
+
+
+async def load_requests(check: bool = CHECK) -> 'List[Link]':
+    """Load link from the :mod:`requests` database.
+
+    Args:
+        check: If perform checks on loaded links,
+            default to :data:`~darc.const.CHECK`.
+
+    Returns:
+        List of loaded links from the :mod:`requests` database.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.load_requests`.
+
+    """
+    return await _load('queue_requests', darc_db.load_requests, check)
+
+
+async def load_selenium(check: bool = CHECK) -> 'List[Link]':
+    """Load link from the :mod:`selenium` database.
+
+    Args:
+        check: If perform checks on loaded links,
+            default to :data:`~darc.const.CHECK`.
+
+    Returns:
+        List of loaded links from the :mod:`selenium` database.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.load_selenium`.
+
+    """
+    return await _load('queue_selenium', darc_db.load_selenium, check)
+
+
+async def _redis_release(key: 'Literal["queue_requests", "queue_selenium"]', link: 'Link',
+                         score: float, failed: bool = False) -> bool:
+    """Release the lease of a link.
+
+    Args:
+        key: Name of the task queue.
+        link: Link to be released.
+        score: Score to reschedule the link.
+        failed: If the link failed to be processed.
+
+    Returns:
+        If the lease was released.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db._release_redis`.
+
+    """
+    failures = 0
+    if failed and PRIORITY:
+        failures = await _redis_command('hincrby', _failure_key(_shard_key(key, shard_name(link))), link.name, 1)
+    return bool(await _redis_script('release', *_release_params(key, link, score, failures, failed)))
+
+
+async def ack_requests(link: 'Link') -> bool:
+    """Acknowledge a link claimed from the :mod:`requests` database.
+
+    Args:
+        link: Link to be acknowledged.
+
+    Returns:
+        If the lease was released.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.ack_requests`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.ack_requests, link)
+    return await _redis_release('queue_requests', link, _release_score())
+
+
+async def nack_requests(link: 'Link', delay: 'Optional[float]' = None) -> bool:
+    """Negatively acknowledge a link claimed from the :mod:`requests` database.
+
+    Args:
+        link: Link to be negatively acknowledged.
+        delay: Seconds before the link is due again.
+
+    Returns:
+        If the lease was released.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.nack_requests`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.nack_requests, link, delay)
+    return await _redis_release('queue_requests', link, _release_score(delay), failed=True)
+
+
+async def ack_selenium(link: 'Link') -> bool:
+    """Acknowledge a link claimed from the :mod:`selenium` database.
+
+    Args:
+        link: Link to be acknowledged.
+
+    Returns:
+        If the lease was released.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.ack_selenium`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.ack_selenium, link)
+    return await _redis_release('queue_selenium', link, _release_score())
+
+
+async def nack_selenium(link: 'Link', delay: 'Optional[float]' = None) -> bool:
+    """Negatively acknowledge a link claimed from the :mod:`selenium` database.
+
+    Args:
+        link: Link to be negatively acknowledged.
+        delay: Seconds before the link is due again.
+
+    Returns:
+        If the lease was released.
+
+    See Also:
+        Asynchronous counterpart of :func:`darc.db.nack_selenium`.
+
+    """
+    if FLAG_DB:
+        return await _db_operation(darc_db.nack_selenium, link, delay)
+    return await _redis_release('queue_selenium', link, _release_score(delay), failed=True)
@@ -9,12 +9,15 @@ import math
 import multiprocessing
 import os
 import re
+import socket
+import sqlite3
 import sys
 import threading
 from typing import TYPE_CHECKING
 
 import peewee
 import playhouse.db_url as playhouse_db_url
+import playhouse.pool as playhouse_pool
 import redis
 
 from darc._compat import nullcontext
@@ -26,7 +29,7 @@ if TYPE_CHECKING:
     from datetime import timedelta
     from multiprocessing import Lock as ProcessLock
     from threading import Lock as ThreadLock
-    from typing import Optional, Union
+    from typing import Any, Dict, Optional, Union
 
     from peewee import Database
     from redis import Redis
@@ -69,6 +72,31 @@ FLAG_TH = bool(int(os.getenv('DARC_MULTITHREADING', '0')))
 if FLAG_MP and FLAG_TH:
     sys.exit('cannot enable multiprocessing and multithreading at the same time')
 
+# seconds to wait for worker processes to exit
+EXIT_TIMEOUT = float(os.getenv('DARC_EXIT_TIMEOUT', '10'))
+if EXIT_TIMEOUT < 0:
+    sys.exit(f'invalid exit timeout: {EXIT_TIMEOUT}')
+
+# use asyncio?
+FLAG_AIO = bool(int(os.getenv('DARC_ASYNCIO', '0')))
+if FLAG_AIO and FLAG_TH:
+    sys.exit('cannot enable asyncio and multithreading at the same time')
+
+# threads per worker to process links of a round
+ROUND_THREADS = int(os.getenv('DARC_ROUND_THREADS', '1'))
+if ROUND_THREADS <= 0:
+    sys.exit(f'invalid round threads: {ROUND_THREADS}')
+
+# max threads per proxy type in a round
+_ROUND_PROXY = json.loads(os.getenv('DARC_ROUND_PROXY', '{}'))
+if isinstance(_ROUND_PROXY, dict):
+    ROUND_PROXY = {str(pattern): int(limit) for pattern, limit in _ROUND_PROXY.items()}  # type: Dict[str, int]
+else:
+    ROUND_PROXY = {'*': int(_ROUND_PROXY)}
+del _ROUND_PROXY
+if any(limit <= 0 for limit in ROUND_PROXY.values()):
+    sys.exit(f'invalid round proxy limits: {ROUND_PROXY}')
+
 # non-root user
 DARC_USER = os.getenv('DARC_USER', getpass.getuser())
 if DARC_USER == 'root':
@@ -157,27 +185,161 @@ else:
     DARC_WAIT = None
 del _DARC_WAIT
 
+# Redis connection pool size (per process)
+REDIS_POOL = int(os.getenv('DARC_REDIS_POOL', '50'))
+# Redis health check interval
+REDIS_HEALTH = int(os.getenv('DARC_REDIS_HEALTH', '30'))
+# database connection pool size (per process)
+DB_POOL = int(os.getenv('DARC_DB_POOL', '0'))
+# database stale connection timeout
+DB_STALE = int(os.getenv('DARC_DB_STALE', '300'))
+# TCP keepalive idle time
+KEEPALIVE = int(os.getenv('DARC_KEEPALIVE', '60'))
+# SQLite memory-mapped I/O size (in bytes)
+SQLITE_MMAP = int(os.getenv('DARC_SQLITE_MMAP', '268_435_456'))
+# SQLite page cache size (in KiB)
+SQLITE_CACHE = int(os.getenv('DARC_SQLITE_CACHE', '65_536'))
+# SQLite busy timeout
+SQLITE_TIMEOUT = float(os.getenv('DARC_SQLITE_TIMEOUT', '30'))
+# SQLite synchronous mode
+SQLITE_SYNC = os.getenv('DARC_SQLITE_SYNC', 'normal').casefold()
+if SQLITE_SYNC not in ('off', 'normal', 'full', 'extra'):
+    sys.exit(f'invalid SQLite synchronous mode: {SQLITE_SYNC}')
+
 # Redis client
 _REDIS_URL = os.getenv('REDIS_URL')
 if _REDIS_URL is None:
     REDIS = None  # type: Optional[Redis]
     FLAG_DB = True
 else:
-    REDIS = redis.Redis.from_url(_REDIS_URL, decode_components=True)  # type: ignore[call-overload]
+    _REDIS_KEEPALIVE = {}  # type: Dict[int, int]
+    if KEEPALIVE > 0 and hasattr(socket, 'TCP_KEEPIDLE'):
+        _REDIS_KEEPALIVE[socket.TCP_KEEPIDLE] = KEEPALIVE  # pylint: disable=no-member
+    REDIS = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(
+        _REDIS_URL, max_connections=REDIS_POOL, timeout=None,
+        socket_keepalive=KEEPALIVE > 0, socket_keepalive_options=_REDIS_KEEPALIVE,
+        health_check_interval=REDIS_HEALTH,
+    ))
     FLAG_DB = False
+    del _REDIS_KEEPALIVE
 del _REDIS_URL
 
+
+def _sqlite_options() -> 'Dict[str, Any]':
+    """Options of SQLite databases.
+
+    Returns:
+        Keyword arguments of :class:`peewee.SqliteDatabase` tuned for
+        concurrent workers on one host, i.e. in WAL mode (such that
+        readers never block the writer), with memory-mapped I/O of
+        :data:`~darc.const.SQLITE_MMAP` bytes, a page cache of
+        :data:`~darc.const.SQLITE_CACHE` KiB and a busy timeout of
+        :data:`~darc.const.SQLITE_TIMEOUT` seconds. The ``RETURNING``
+        clause is enabled where supported (SQLite 3.35+), such that
+        links are claimed in one statement (c.f. :func:`darc.db._db_claim`).
+
+    """
+    return {
+        'pragmas': {
+            'journal_mode': 'wal',
+            'synchronous': SQLITE_SYNC,
+            'mmap_size': SQLITE_MMAP,
+            'cache_size': -SQLITE_CACHE,
+            'busy_timeout': int(SQLITE_TIMEOUT * 1_000),
+            'temp_store': 'memory',
+        },
+        'returning_clause': sqlite3.sqlite_version_info >= (3, 35),
+    }
+
+
+def _db_connect(url: str, pool: bool = False) -> 'Database':
+    """Connect to the RDS storage.
+
+    Args:
+        url: URL to the database.
+        pool: If always use a *pooled* database.
+
+    Returns:
+        The database instance. If :data:`~darc.const.DB_POOL` is positive
+        (or ``pool`` is set), a *pooled* database (c.f. :mod:`playhouse.pool`)
+        with at most such number of connections per process, which checks
+        the connections upon checked out and recycles those idle for
+        :data:`~darc.const.DB_STALE` seconds. PostgreSQL connections send
+        TCP keepalives after idle for :data:`~darc.const.KEEPALIVE` seconds,
+        and SQLite databases are tuned through :func:`~darc.const._sqlite_options`.
+
+    """
+    scheme, _, rest = url.partition('://')
+    kwargs = {}  # type: Dict[str, Any]
+    if DB_POOL > 0 or pool:
+        if not scheme.endswith('+pool'):
+            scheme = f'{scheme}+pool'
+        kwargs.update(max_connections=DB_POOL if DB_POOL > 0 else None, stale_timeout=DB_STALE, timeout=0)
+    if KEEPALIVE > 0 and scheme.startswith(('postgres', 'psycopg', 'crdb', 'cockroachdb')):
+        kwargs.update(keepalives=1, keepalives_idle=KEEPALIVE)
+    if scheme.startswith('sqlite'):
+        kwargs.update(_sqlite_options())
+        if scheme.endswith('+pool'):
+            # pooled connections are handed over between threads
+            kwargs.update(check_same_thread=False)
+    return playhouse_db_url.connect(f'{scheme}://{rest}', unquote_password=True, **kwargs)
+
+
 # database instance
 _DB_URL = os.getenv('DB_URL')
 if _DB_URL is None:
-    DB = peewee.SqliteDatabase(f'sqlite://{PATH_DB}/sqlite/darc.db')
-    DB_WEB = peewee.SqliteDatabase(f'sqlite://{PATH_DB}/sqlite/darcweb.db')
+    # embedded database, connections are pooled to save the pragmas per call
+    os.makedirs(os.path.join(PATH_DB, 'sqlite'), exist_ok=True)
+    DB = _db_connect(f'sqlite:///{PATH_DB}/sqlite/darc.db', pool=True)
+    DB_WEB = _db_connect(f'sqlite:///{PATH_DB}/sqlite/darcweb.db', pool=True)
 else:
-    DB = playhouse_db_url.connect(f'{_DB_URL}/darc', unquote_password=True)  # type: Database # type: ignore[no-redef]
-    DB_WEB = playhouse_db_url.connect(f'{_DB_URL}/darcweb', unquote_password=True)  # type: Database # type: ignore[no-redef] # pylint: disable=line-too-long
+    DB = _db_connect(f'{_DB_URL}/darc')  # type: Database # type: ignore[no-redef]
+    DB_WEB = _db_connect(f'{_DB_URL}/darcweb')  # type: Database # type: ignore[no-redef]
 del _DB_URL
 
 
+def _close_connections() -> None:
+    """Close idle connections before forking.
+
+    The function is called in the parent process before :func:`os.fork`,
+    so that idle pooled connections are closed by the parent process
+    itself rather than inherited by the child process, c.f.
+    :func:`~darc.const._reset_connections`.
+
+    """
+    for database in (DB, DB_WEB):
+        if isinstance(database, playhouse_pool.PooledDatabase):
+            database.close_idle()
+
+
+def _reset_connections() -> None:
+    """Drop connections inherited from the parent process.
+
+    The function is called in the child process after :func:`os.fork`
+    (e.g. the workers started by :func:`darc.process._process`), so that
+    sockets shared with the parent process are never reused; connections
+    are then re-created lazily in the child process.
+
+    Note:
+        The connections still in use by the parent process at the time
+        of forking are closed in the child process as well, which may
+        break them in the parent process for client/server databases.
+        Hence the workers are to be forked before connecting to the
+        database, c.f. :func:`~darc.const._close_connections`.
+
+    """
+    if REDIS is not None:
+        REDIS.connection_pool.reset()  # type: ignore[attr-defined]
+    for database in (DB, DB_WEB):
+        if isinstance(database, playhouse_pool.PooledDatabase):
+            database.close_all()
+        elif not database.is_closed():
+            database.close()
+
+
+os.register_at_fork(before=_close_connections, after_in_child=_reset_connections)
+
+
 def getpid(path: str = PATH_ID) -> int:
     """Get process ID.
 
@@ -205,12 +367,20 @@ def get_lock() -> 'Union[ProcessLock, ThreadLock, nullcontext]':  # type: ignore
     """Get a lock.
 
     Returns:
-        Lock context based on :data:`~darc.const.FLAG_MP`
-        and :data:`~darc.const.FLAG_TH`.
+        Lock context based on :data:`~darc.const.FLAG_MP`,
+        :data:`~darc.const.FLAG_TH`, :data:`~darc.const.FLAG_AIO`
+        (as blocking operations of the event loops run in threads) and
+        :data:`~darc.const.ROUND_THREADS`.
+
+    Note:
+        The :mod:`multiprocessing` lock also serialises the threads
+        within each worker process, thus it is returned whenever
+        :data:`~darc.const.FLAG_MP` is :data:`True`, with or without
+        the round threads.
 
     """
     if FLAG_MP:
         return multiprocessing.Lock()
-    if FLAG_TH:
+    if FLAG_TH or FLAG_AIO or ROUND_THREADS > 1:
         return threading.Lock()
     return nullcontext()
@@ -7,9 +7,15 @@ The :mod:`darc.crawl` module provides two types of crawlers.
 * :func:`~darc.crawl.crawler` -- crawler powered by :mod:`requests`
 * :func:`~darc.crawl.loader` -- crawler powered by :mod:`selenium`
 
+The :mod:`requests` crawler is composed of three stages, i.e.
+:func:`~darc.crawl.fetch_requests`, :func:`~darc.crawl.parse_requests`
+and :func:`~darc.crawl.persist_requests`, which can be run as a
+pipeline through :mod:`darc.pipeline`.
+
 """
 
 import contextlib
+import dataclasses
 import math
 from typing import TYPE_CHECKING
 
@@ -19,8 +25,8 @@ import urllib3.exceptions as urllib3_exceptions
 
 from darc._compat import datetime
 from darc.const import FORCE, SE_EMPTY
-from darc.db import (drop_hostname, drop_requests, drop_selenium, have_hostname, save_requests,
-                     save_selenium)
+from darc.db import (ack_requests, ack_selenium, drop_hostname, drop_requests, drop_selenium,
+                     have_hostname, nack_requests, nack_selenium, save_requests, save_selenium)
 from darc.error import LinkNoReturn
 from darc.logging import WARNING as LOG_WARNING
 from darc.logging import logger
@@ -36,7 +42,10 @@ from darc.sites import crawler_hook, loader_hook
 from darc.submit import SAVE_DB, submit_new_host, submit_requests, submit_selenium
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from concurrent.futures import Executor
+    from typing import List, Optional
+
+    from requests import Response, Session
 
     import darc.link as darc_link  # Link
 
@@ -106,10 +115,70 @@ def crawler(link: 'darc_link.Link') -> None:
     the database (c.f. :func:`~darc.db.save_requests`).
 
     And if the response status code is between ``400`` and ``600``,
-    the URL will be saved back to the link database
-    (c.f. :func:`~darc.db.save_requests`). If **NOT**, the URL will
+    the URL will be released back to the link database for retry
+    (c.f. :func:`~darc.db.nack_requests`). If **NOT**, the URL will
     be saved into :mod:`selenium` link database to proceed next steps
-    (c.f. :func:`~darc.db.save_selenium`).
+    (c.f. :func:`~darc.db.save_selenium`), and acknowledged in the
+    :mod:`requests` database (c.f. :func:`~darc.db.ack_requests`).
+
+    The function runs the stages of :func:`~darc.crawl.fetch_requests`,
+    :func:`~darc.crawl.parse_requests` and :func:`~darc.crawl.persist_requests`
+    in order, c.f. :mod:`darc.pipeline` for running them concurrently.
+
+    """
+    crawled = fetch_requests(link)
+    if crawled is not None:
+        crawled = parse_requests(crawled)
+    if crawled is not None:
+        persist_requests(crawled)
+
+
+@dataclasses.dataclass
+class Crawled:
+    """Link crawled by :mod:`requests` between the stages of :func:`~darc.crawl.crawler`."""
+
+    #: Timestamp of the worker node reference.
+    timestamp: 'datetime'
+    #: Link crawled.
+    link: 'darc_link.Link'
+    #: Session object with proxy settings.
+    session: 'Session'
+    #: Final response object with crawled data.
+    response: 'Response'
+    #: Content type of the response, c.f. :func:`~darc.parse.get_content_type`.
+    ct_type: str = ''
+    #: Links extracted from the response, c.f. :func:`~darc.parse.extract_links`
+    #: and :func:`~darc.proxy.i2p.read_hosts`.
+    links: 'List[darc_link.Link]' = dataclasses.field(default_factory=list)
+
+
+def _crawler_failed(link: 'darc_link.Link') -> None:
+    """Release a link failed to be crawled back to the :mod:`requests` database.
+
+    Args:
+        link: Link failed to be crawled.
+
+    The function is to be called within the ``except`` clause.
+
+    """
+    mark_failed(link)
+    logger.ptb('[Error from %s]', link.url)
+    nack_requests(link)
+
+    logger.info('[REQUESTS] Requested %s', link.url)
+
+
+def fetch_requests(link: 'darc_link.Link') -> 'Optional[Crawled]':
+    """Fetch stage of :func:`~darc.crawl.crawler`.
+
+    Args:
+        link: URL to be crawled by :mod:`requests`.
+
+    Returns:
+        The link crawled through the site customisation hook (c.f.
+        :func:`~darc.sites.crawler_hook`); :data:`None` if the link
+        has been released already, e.g. ignored, disallowed by
+        ``robots.txt``, or failed to be crawled.
 
     """
     logger.info('[REQUESTS] Requesting %s', link.url)
@@ -117,12 +186,12 @@ def crawler(link: 'darc_link.Link') -> None:
         if match_proxy(link.proxy):
             logger.warning('[REQUESTS] Ignored proxy type from %s (%s)', link.url, link.proxy)
             drop_requests(link)
-            return
+            return None
 
         if match_host(link.host):
             logger.warning('[REQUESTS] Ignored hostname from %s (%s)', link.url, link.proxy)
             drop_requests(link)
-            return
+            return None
 
         # timestamp
         timestamp = datetime.now()
@@ -142,32 +211,12 @@ def crawler(link: 'darc_link.Link') -> None:
             # if it's a new host
             flag_have, force_fetch = have_hostname(link)
             if not flag_have or force_fetch:
-                partial = False
-
-                if link.proxy not in ('zeronet', 'freenet'):
-                    # fetch sitemap.xml
-                    try:
-                        fetch_sitemap(link, force=force_fetch)
-                    except Exception:
-                        logger.ptb('[Error fetching sitemap of %s]', link.url)
-                        partial = True
-
-                if link.proxy == 'i2p':
-                    # fetch hosts.txt
-                    try:
-                        fetch_hosts(link, force=force_fetch)
-                    except Exception:
-                        logger.ptb('[Error subscribing hosts from %s]', link.url)
-                        partial = True
-
-                # submit data / drop hostname from db
-                if partial:
-                    drop_hostname(link)
-                submit_new_host(timestamp, link, partial=partial, force=force_fetch)
+                fetch_new_host(timestamp, link, force=force_fetch)
 
             if not FORCE and not check_robots(link):
                 logger.warning('[REQUESTS] Robots disallowed link from %s', link.url)
-                return
+                ack_requests(link)
+                return None
 
         # reuse the session object
         with session:
@@ -178,79 +227,193 @@ def crawler(link: 'darc_link.Link') -> None:
                 logger.pexc(message=f'[REQUESTS] Fail to crawl {link.url}')
                 save_invalid(link)
                 drop_requests(link)
-                return
-            except requests.RequestException as error:
+                return None
+            except requests.RequestException:
                 logger.pexc(message=f'[REQUESTS] Fail to crawl {link.url}')
-                save_requests(link, single=True)
-                return
+                nack_requests(link)
+                return None
             except LinkNoReturn as error:
                 logger.pexc(LOG_WARNING, f'[REQUESTS] Removing from database: {link.url}')
                 if error.drop:
                     drop_requests(link)
-                return
+                else:
+                    ack_requests(link)
+                return None
+        return Crawled(timestamp, link, session, response)
+    except Exception:
+        _crawler_failed(link)
+    return None
+
 
-            # save headers
-            save_headers(timestamp, link, response, session)
+def parse_requests(crawled: 'Crawled', executor: 'Optional[Executor]' = None) -> 'Optional[Crawled]':
+    """Parse stage of :func:`~darc.crawl.crawler`.
 
-            # check content type
-            ct_type = get_content_type(response)
-            if ct_type not in ['text/html', 'application/xhtml+xml']:
-                logger.warning('[REQUESTS] Generic content type from %s (%s)', link.url, ct_type)
+    Args:
+        crawled: Link crawled, c.f. :func:`~darc.crawl.fetch_requests`.
+        executor: Executor to extract links from the HTML documents,
+            e.g. a process pool, c.f. :data:`~darc.pipeline.PIPELINE_PROCESSES`.
 
-                # probably hosts.txt
-                if link.proxy == 'i2p' and ct_type in ['text/plain', 'text/text']:
-                    text = response.text
-                    save_requests(read_hosts(link, text))
+    Returns:
+        The link crawled, with its content type and the links extracted
+        from HTML documents (c.f. :func:`~darc.parse.extract_links`) or
+        I2P ``hosts.txt`` (c.f. :func:`~darc.proxy.i2p.read_hosts`);
+        :data:`None` if failed to parse.
 
-                if match_mime(ct_type):
-                    drop_requests(link)
-                    return
+    """
+    link, response = crawled.link, crawled.response
+    try:
+        # check content type
+        ct_type = crawled.ct_type = get_content_type(response)
+        if ct_type not in ['text/html', 'application/xhtml+xml']:
+            # probably hosts.txt
+            if link.proxy == 'i2p' and ct_type in ['text/plain', 'text/text']:
+                text = response.text
+                crawled.links = read_hosts(link, text)
+            return crawled
+
+        html = response.content
+        if html:
+            if executor is None:
+                crawled.links = extract_links(link, html)
+            else:
+                crawled.links = executor.submit(extract_links, link, html).result()
+    except Exception:
+        _crawler_failed(link)
+        return None
+    return crawled
 
-                # submit data
-                data = response.content
-                submit_requests(timestamp, link, response, session, data, mime_type=ct_type, html=False)
 
-                return
+def persist_requests(crawled: 'Crawled') -> None:
+    """Persist stage of :func:`~darc.crawl.crawler`.
+
+    Args:
+        crawled: Link crawled and parsed, c.f. :func:`~darc.crawl.parse_requests`.
+
+    The function saves the headers, submits the document, saves the
+    links extracted into the :mod:`requests` database, and finally
+    releases the link.
+
+    """
+    timestamp, link, session, response = crawled.timestamp, crawled.link, crawled.session, crawled.response
+    try:
+        # save headers
+        save_headers(timestamp, link, response, session)
+
+        ct_type = crawled.ct_type
+        if ct_type not in ['text/html', 'application/xhtml+xml']:
+            logger.warning('[REQUESTS] Generic content type from %s (%s)', link.url, ct_type)
+
+            # probably hosts.txt
+            if crawled.links:
+                save_requests(crawled.links, source='text')
 
-            html = response.content
-            if not html:
-                logger.error('[REQUESTS] Empty response from %s', link.url)
-                save_requests(link, single=True)
+            if match_mime(ct_type):
+                drop_requests(link)
                 return
 
             # submit data
-            submit_requests(timestamp, link, response, session, html, mime_type=ct_type, html=True)
+            data = response.content
+            submit_requests(timestamp, link, response, session, data, mime_type=ct_type, html=False)
 
-            # add link to queue
-            save_requests(extract_links(link, html), score=0, nx=True)
+            ack_requests(link)
+            return
 
-            if not response.ok:
-                logger.error('[REQUESTS] Failed on %s [%d]', link.url, response.status_code)
-                save_requests(link, single=True)
-                return
+        html = response.content
+        if not html:
+            logger.error('[REQUESTS] Empty response from %s', link.url)
+            nack_requests(link)
+            return
 
-            # add link to queue
-            save_selenium(link, single=True, score=0, nx=True)
-    except Exception:
-        if SAVE_DB:
-            with contextlib.suppress(Exception):
-                host = HostnameModel.get_or_none(HostnameModel.hostname == link.host)  # type: Optional[HostnameModel]
-                if host is not None:
-                    host.alive = False
-                    host.save()
-
-            with contextlib.suppress(Exception):
-                url = URLModel.get_or_none(URLModel.hash == link.name)  # type: Optional[URLModel]
-                if url is not None:
-                    url.alias = False
-                    url.save()
+        # submit data
+        submit_requests(timestamp, link, response, session, html, mime_type=ct_type, html=True)
 
-        logger.ptb('[Error from %s]', link.url)
-        save_requests(link, single=True)
+        # add link to queue
+        save_requests(crawled.links, score=0, nx=True, source='html')
+
+        if not response.ok:
+            logger.error('[REQUESTS] Failed on %s [%d]', link.url, response.status_code)
+            nack_requests(link)
+            return
+
+        # add link to queue
+        save_selenium(link, single=True, score=0, nx=True)
+        ack_requests(link)
+    except Exception:
+        _crawler_failed(link)
+        return
 
     logger.info('[REQUESTS] Requested %s', link.url)
 
 
+def fetch_new_host(timestamp: 'datetime', link: 'darc_link.Link', force: bool = False) -> None:
+    """Fetch documents of a new host.
+
+    Args:
+        timestamp: Timestamp of the worker node reference.
+        link: Link from the new host.
+        force: Force refetch the documents.
+
+    The function fetches the sitemaps (c.f. :func:`~darc.proxy.null.fetch_sitemap`)
+    and, for I2P hosts, ``hosts.txt`` (c.f. :func:`~darc.proxy.i2p.fetch_hosts`),
+    then submits the documents through :func:`~darc.submit.submit_new_host`.
+    If any document failed to be fetched, the host will be removed from the
+    hostname database (c.f. :func:`~darc.db.drop_hostname`).
+
+    See Also:
+        * :func:`darc.crawl.crawler`
+        * :func:`darc.aiocrawl.crawler`
+
+    """
+    partial = False
+
+    if link.proxy not in ('zeronet', 'freenet'):
+        # fetch sitemap.xml
+        try:
+            fetch_sitemap(link, force=force)
+        except Exception:
+            logger.ptb('[Error fetching sitemap of %s]', link.url)
+            partial = True
+
+    if link.proxy == 'i2p':
+        # fetch hosts.txt
+        try:
+            fetch_hosts(link, force=force)
+        except Exception:
+            logger.ptb('[Error subscribing hosts from %s]', link.url)
+            partial = True
+
+    # submit data / drop hostname from db
+    if partial:
+        drop_hostname(link)
+    submit_new_host(timestamp, link, partial=partial, force=force)
+
+
+def mark_failed(link: 'darc_link.Link') -> None:
+    """Mark the host and URL of a failed link as not alive.
+
+    Args:
+        link: Link failed to be crawled.
+
+    The records are updated only if :data:`~darc.submit.SAVE_DB` is
+    :data:`True`, and any error upon updating is ignored.
+
+    """
+    if not SAVE_DB:
+        return
+
+    with contextlib.suppress(Exception):
+        host = HostnameModel.get_or_none(HostnameModel.hostname == link.host)  # type: Optional[HostnameModel]
+        if host is not None:
+            host.alive = False
+            host.save()
+
+    with contextlib.suppress(Exception):
+        url = URLModel.get_or_none(URLModel.hash == link.name)  # type: Optional[URLModel]
+        if url is not None:
+            url.alias = False
+            url.save()
+
+
 def loader(link: 'darc_link.Link') -> None:
     """Single :mod:`selenium` loader for an entry link.
 
@@ -289,7 +452,10 @@ def loader(link: 'darc_link.Link') -> None:
 
     Later, :func:`~darc.parse.extract_links` will be called then to
     extract all possible links from the HTML document and save such
-    links into the :mod:`requests` database (c.f. :func:`~darc.db.save_requests`).
+    links into the :mod:`requests` database (c.f. :func:`~darc.db.save_requests`),
+    and the URL will be acknowledged in the :mod:`selenium` database
+    (c.f. :func:`~darc.db.ack_selenium`). If failed, the URL will be
+    released back for retry (c.f. :func:`~darc.db.nack_selenium`).
 
     .. seealso::
 
@@ -309,16 +475,18 @@ def loader(link: 'darc_link.Link') -> None:
                 driver = loader_hook(timestamp, driver, link)
             except urllib3_exceptions.HTTPError:
                 logger.pexc(message=f'[SELENIUM] Fail to load {link.url}')
-                save_selenium(link, single=True)
+                nack_selenium(link)
                 return
             except selenium_exceptions.WebDriverException as error:
                 logger.pexc(message=f'[SELENIUM] Fail to load {link.url}')
-                save_selenium(link, single=True)
+                nack_selenium(link)
                 return
             except LinkNoReturn as error:
                 logger.pexc(LOG_WARNING, f'[SELENIUM] Removing from database: {link.url}')
                 if error.drop:
                     drop_selenium(link)
+                else:
+                    ack_selenium(link)
                 return
 
             # get HTML source
@@ -326,7 +494,7 @@ def loader(link: 'darc_link.Link') -> None:
 
             if html == SE_EMPTY:
                 logger.error('[SELENIUM] Empty page from %s', link.url)
-                save_selenium(link, single=True)
+                nack_selenium(link)
                 return
 
             screenshot = None
@@ -346,9 +514,10 @@ def loader(link: 'darc_link.Link') -> None:
             submit_selenium(timestamp, link, html, screenshot)
 
             # add link to queue
-            save_requests(extract_links(link, html), score=0, nx=True)
+            save_requests(extract_links(link, html), score=0, nx=True, source='html')
+            ack_selenium(link)
     except Exception:
         logger.ptb('[Error from %s]', link.url)
-        save_selenium(link, single=True)
+        nack_selenium(link)
 
     logger.info('[SELENIUM] Loaded %s', link.url)
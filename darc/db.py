@@ -27,17 +27,75 @@ If :data:`~darc.const.FLAG_DB` is :data:`True`, then the
 module uses the RDS storage described by the :mod:`peewee`
 models as backend.
 
+Links loaded from ``queue_requests`` and ``queue_selenium`` are
+*leased* to the worker (c.f. :func:`~darc.db.worker_id`) for
+:data:`~darc.db.LEASE_TIMEOUT` seconds. The worker shall then
+acknowledge (c.f. :func:`~darc.db.ack_requests`) or negatively
+acknowledge (c.f. :func:`~darc.db.nack_requests`) each link,
+otherwise the link will be claimed again once its lease expired.
+
+If :data:`~darc.db.SHARD_NUM` is positive, ``queue_requests`` and
+``queue_selenium`` are further partitioned into *shards* by the
+proxy type and the hostname hash of the links (c.f.
+:func:`~darc.db.shard_name`), e.g. ``queue_requests{tor:3}``, so
+that the load can be spread across a Redis Cluster. Workers claim
+links only from the shards they subscribed to (c.f.
+:data:`~darc.db.SHARD_SUBSCRIBE`).
+
+If :data:`~darc.db.AFFINITY` is set, the shards are further assigned to
+the live worker processes by consistent hashing (c.f. :func:`~darc.db._affinity_filter`),
+so that links of each host are always claimed by the same process, and
+its per-host states (e.g. sessions and ``robots.txt``) stay warm. The
+workers send heartbeats to ``workers_requests`` and ``workers_selenium``
+(c.f. :class:`~darc.model.tasks.worker.WorkerModel`), and the shards are
+rebalanced as workers join or leave.
+
+If :data:`~darc.db.OVERFLOW_HIGH` is positive, each shard of
+``queue_requests`` and ``queue_selenium`` in Redis holds only the *hot*
+head of the frontier, and the *cold* tail (i.e. links due the latest)
+is spilled to the :class:`~darc.model.tasks.overflow.OverflowQueueModel`
+table, from which the shard is refilled in bulk upon dropping below
+:data:`~darc.db.OVERFLOW_LOW`, c.f. :func:`~darc.db._overflow_spill`
+and :func:`~darc.db._overflow_refill`.
+
+If :data:`~darc.db.REDIS_QUEUE` is ``stream``, the sorted sets of
+``queue_requests`` and ``queue_selenium`` only serve as *delay indexes*:
+due links are promoted to Redis streams (e.g. ``stream_requests``) and
+delivered to the workers through a consumer group, which tracks the
+delivery of each link until acknowledged.
+
+Within :func:`~darc.db.write_behind`, writes of a worker to the task
+queues are coalesced by a write-behind buffer and flushed in bulk,
+c.f. :class:`~darc.db.WriteBuffer`.
+
+The task queues can be exported to and imported from a *frontier dump*,
+e.g. to move the frontier between backends, c.f.
+:func:`~darc.db.export_queues` and :func:`~darc.db.import_queues`.
+
 .. _Redis: https://redis.io/
 
 """
 
+import atexit
+import bisect
+import collections
 import contextlib
+import dataclasses
+import fnmatch
+import itertools
+import json
 import math
 import os
-import pickle  # nosec: B403
+import random
+import re
 import shutil
+import socket
+import struct
+import sys
 import textwrap
+import threading
 import time
+import zlib
 from datetime import timedelta
 from typing import TYPE_CHECKING, TypeVar, cast, overload
 
@@ -52,28 +110,45 @@ from darc.const import DB as database
 from darc.const import FLAG_DB
 from darc.const import REDIS as redis
 from darc.const import TIME_CACHE
-from darc.error import DatabaseOperaionFailed, LockWarning, RedisCommandFailed
-from darc.link import Link
+from darc.error import DatabaseOperaionFailed, RedisCommandFailed
+from darc.link import LINK_MAGIC, Link, dumps_link, loads_link
 from darc.logging import VERBOSE as LOG_VERBOSE
 from darc.logging import WARNING as LOG_WARNING
 from darc.logging import logger
-from darc.model.tasks import HostnameQueueModel, RequestsQueueModel, SeleniumQueueModel
+from darc.model.tasks import (HostnameQueueModel, HostReadyModel, OverflowQueueModel, QueueStatsModel,
+                              RequestsQueueModel, SeleniumQueueModel, WorkerModel)
 from darc.parse import _check
 
 _T = TypeVar('_T')
 
 if TYPE_CHECKING:
-    from types import MethodType
-    from typing import Any, Callable, ContextManager, List, Optional, Tuple, Union
+    from collections import OrderedDict
+    from signal import Signals  # pylint: disable=no-name-in-module
+    from types import FrameType, MethodType
+    from typing import (Any, BinaryIO, Callable, ContextManager, Counter, Dict, Iterable, Iterator, List,
+                        Optional, Set, Tuple, Type, Union)
 
-    from peewee import TextField
+    from peewee import CharField, Expression
     from pottery.redlock import Redlock
+    from redis.asyncio.client import Pipeline as AsyncPipeline
+    from redis.client import Pipeline
+    from redis.commands.core import Script
     from typing_extensions import Literal
 
 # Redis retry interval
 RETRY_INTERVAL = float(os.getenv('DARC_RETRY', '10'))
 if not math.isfinite(RETRY_INTERVAL):
     RETRY_INTERVAL = None  # type: ignore[assignment]
+# retry backoff factor, max delay & max elapsed time
+RETRY_FACTOR = float(os.getenv('DARC_RETRY_FACTOR', '2'))
+RETRY_MAX = float(os.getenv('DARC_RETRY_MAX', '300'))
+RETRY_ELAPSED = float(os.getenv('DARC_RETRY_ELAPSED', 'inf'))
+if not math.isfinite(RETRY_ELAPSED):
+    RETRY_ELAPSED = None  # type: ignore[assignment]
+
+# circuit breaker threshold & reset timeout
+CIRCUIT_THRESHOLD = int(os.getenv('DARC_CIRCUIT_THRESHOLD', '5'))
+CIRCUIT_RESET = float(os.getenv('DARC_CIRCUIT_RESET', '60'))
 
 # lock blocking timeout
 _LOCK_TIMEOUT = float(os.getenv('DARC_LOCK_TIMEOUT', '10'))
@@ -92,6 +167,307 @@ if redis is not None and REDIS_LOCK:
         'queue_selenium': pottery_redlock.Redlock(key='queue_selenium', masters={redis}, auto_release_time=LOCK_TIMEOUT),  # pylint: disable=line-too-long
     }
 
+# payload hash buckets, i.e. number of hex digits of the digest prefix (0 for one key per payload)
+PAYLOAD_BUCKET = int(os.getenv('DARC_PAYLOAD_BUCKET', '0'))
+if not 0 <= PAYLOAD_BUCKET < 64:
+    sys.exit(f'invalid payload bucket prefix: {PAYLOAD_BUCKET}')
+
+#: Lua functions shared by the scripts to read (``get_payload``) and delete
+#: (``del_payload``) the payload of a link, given the payload prefix and the
+#: link name, c.f. :data:`~darc.db.PAYLOAD_BUCKET`. Payloads not found in the
+#: hash buckets are looked up at their own keys, i.e. the per-key layout.
+#:
+#: The payload prefix is passed to the scripts in ``KEYS``: being the hash tag
+#: of the shard (c.f. :func:`~darc.db._payload_prefix`), it declares the Redis
+#: Cluster slot of the payload keys derived from it, i.e. the slot of the other
+#: keys of the shard.
+_REDIS_PAYLOAD_FUNCTIONS = textwrap.dedent('''\
+    local bucket = %d
+    local function payload_field(name)
+        return (string.gsub(name, '..', function(digit) return string.char(tonumber(digit, 16)) end))
+    end
+    local function get_payload(prefix, name)
+        if bucket > 0 then
+            local payload = redis.call('HGET', prefix .. 'bucket:' .. string.sub(name, 1, bucket), payload_field(name))
+            if payload then
+                return payload
+            end
+        end
+        return redis.call('GET', prefix .. name)
+    end
+    local function del_payload(prefix, name)
+        local count = redis.call('DEL', prefix .. name)
+        if bucket > 0 then
+            count = count + redis.call('HDEL', prefix .. 'bucket:' .. string.sub(name, 1, bucket), payload_field(name))
+        end
+        return count
+    end
+''') % PAYLOAD_BUCKET
+
+#: Lua script to claim a batch of due links from a task queue, i.e. select
+#: members of ``KEYS[1]`` with score in ``[0, ARGV[1]]`` (at most ``ARGV[2]``
+#: of them, ``-1`` for no limit), lease them to worker ``ARGV[4]`` in ``KEYS[2]``
+#: until score ``ARGV[3]`` and return their payloads, stored at the member
+#: names prefixed with ``KEYS[5]``. Members without payload are removed. The
+#: number of claimed links is counted in the ``out`` field of ``KEYS[3]``, which
+#: expires in ``ARGV[5]`` seconds.
+#:
+#: If either ``ARGV[6]`` or ``ARGV[7]`` is positive, the claim is *polite*:
+#: within the first ``ARGV[9]`` due members, at most ``ARGV[6]`` links are
+#: claimed per host (``0`` for no limit), skipping hosts cooling down in
+#: ``KEYS[4]``, i.e. scored after ``ARGV[8]`` (current time); claimed hosts
+#: then cool down for ``ARGV[7]`` seconds per link claimed. The host of a link
+#: is read from its payload, c.f. :func:`~darc.link.dumps_link`.
+_REDIS_CLAIM_SCRIPT = _REDIS_PAYLOAD_FUNCTIONS + textwrap.dedent('''\
+    local limit = tonumber(ARGV[2])
+    local per_host = tonumber(ARGV[6])
+    local delay = tonumber(ARGV[7])
+    local polite = per_host > 0 or delay > 0
+    local scan = ARGV[2]
+    if polite then
+        redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', ARGV[8])
+        scan = ARGV[9]
+    end
+    local names = redis.call('ZRANGEBYSCORE', KEYS[1], 0, ARGV[1], 'LIMIT', 0, scan)
+    local payloads = {}
+    local counts = {}
+    for _, name in ipairs(names) do
+        if limit >= 0 and #payloads >= limit then
+            break
+        end
+        local payload = get_payload(KEYS[5], name)
+        if payload then
+            local host = name
+            if polite and string.sub(payload, 1, 2) == 'DL' then
+                local a, b, c, d = string.byte(payload, 4, 7)
+                host = string.sub(payload, 8, 7 + ((a * 256 + b) * 256 + c) * 256 + d)
+            end
+            local count = counts[host] or 0
+            if not polite or ((per_host <= 0 or count < per_host)
+                              and (count > 0 or not redis.call('ZSCORE', KEYS[4], host))) then
+                redis.call('ZADD', KEYS[1], 'XX', ARGV[3], name)
+                redis.call('HSET', KEYS[2], name, ARGV[4])
+                payloads[#payloads + 1] = payload
+                counts[host] = count + 1
+            end
+        else
+            redis.call('ZREM', KEYS[1], name)
+            redis.call('HDEL', KEYS[2], name)
+        end
+    end
+    if polite and delay > 0 then
+        for host, count in pairs(counts) do
+            redis.call('ZADD', KEYS[4], ARGV[8] + delay * count, host)
+        end
+    end
+    if #payloads > 0 then
+        redis.call('HINCRBY', KEYS[3], 'out', #payloads)
+        redis.call('EXPIRE', KEYS[3], ARGV[5])
+    end
+    return payloads
+''')
+
+#: Lua script to release the lease of link ``ARGV[1]`` in ``KEYS[2]`` if
+#: still held by worker ``ARGV[2]``, and reschedule it in ``KEYS[1]`` with
+#: score ``ARGV[3]``. If ``ARGV[4]`` is ``1``, the failure counter of the
+#: link in ``KEYS[3]`` is reset. Returns ``1`` if released, ``0`` if the
+#: lease had expired and been reclaimed by another worker.
+#:
+#: For the stream backed task queues (c.f. :data:`~darc.db.REDIS_QUEUE`),
+#: the stream entry of the link recorded in ``KEYS[5]`` is also acknowledged
+#: in consumer group ``ARGV[5]`` and deleted from stream ``KEYS[4]``.
+_REDIS_RELEASE_SCRIPT = textwrap.dedent('''\
+    if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+        return 0
+    end
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+    if ARGV[4] == '1' then
+        redis.call('HDEL', KEYS[3], ARGV[1])
+    end
+    if #KEYS > 3 then
+        local entry = redis.call('HGET', KEYS[5], ARGV[1])
+        if entry then
+            redis.call('HDEL', KEYS[5], ARGV[1])
+            redis.call('XACK', KEYS[4], ARGV[5], entry)
+            redis.call('XDEL', KEYS[4], entry)
+        end
+    end
+    return 1
+''')
+
+#: Lua script to claim a batch of links from a task queue backed by Redis
+#: stream ``KEYS[4]`` (c.f. :data:`~darc.db.REDIS_QUEUE`). Members of the
+#: delay index ``KEYS[1]`` with score in ``[0, ARGV[1]]`` (at most ``ARGV[7]``
+#: of them) are first promoted to the stream, and scored ``+inf`` in
+#: ``KEYS[1]`` while being delivered. Then consumer ``ARGV[3]`` of group
+#: ``ARGV[5]`` auto-claims entries pending for at least ``ARGV[6]`` milliseconds
+#: with other (dead) consumers, and reads new entries, ``ARGV[2]`` in total.
+#: Claimed links are leased to ``ARGV[3]`` in ``KEYS[2]``, their entry IDs
+#: recorded in ``KEYS[5]``, and their payloads, stored at the member names
+#: prefixed with ``KEYS[6]``, returned. Entries without payload are acknowledged
+#: and deleted. The number of claimed links is counted in the ``out`` field of
+#: ``KEYS[3]``, which expires in ``ARGV[4]`` seconds.
+_REDIS_STREAM_SCRIPT = _REDIS_PAYLOAD_FUNCTIONS + textwrap.dedent('''\
+    local limit = tonumber(ARGV[2])
+    local names = redis.call('ZRANGEBYSCORE', KEYS[1], 0, ARGV[1], 'LIMIT', 0, ARGV[7])
+    for _, name in ipairs(names) do
+        redis.call('XADD', KEYS[4], '*', 'name', name)
+        redis.call('ZADD', KEYS[1], 'XX', 'inf', name)
+    end
+    local entries = redis.call('XAUTOCLAIM', KEYS[4], ARGV[5], ARGV[3], ARGV[6], '0-0', 'COUNT', limit)[2]
+    if #entries < limit then
+        local reply = redis.call('XREADGROUP', 'GROUP', ARGV[5], ARGV[3], 'COUNT', limit - #entries,
+                                 'STREAMS', KEYS[4], '>')
+        if reply then
+            for _, entry in ipairs(reply[1][2]) do
+                entries[#entries + 1] = entry
+            end
+        end
+    end
+    local payloads = {}
+    for _, entry in ipairs(entries) do
+        local name = entry[2] and entry[2][2]
+        local payload = name and get_payload(KEYS[6], name)
+        if payload then
+            redis.call('HSET', KEYS[2], name, ARGV[3])
+            redis.call('HSET', KEYS[5], name, entry[1])
+            payloads[#payloads + 1] = payload
+        else
+            redis.call('XACK', KEYS[4], ARGV[5], entry[1])
+            redis.call('XDEL', KEYS[4], entry[1])
+        end
+    end
+    if #payloads > 0 then
+        redis.call('HINCRBY', KEYS[3], 'out', #payloads)
+        redis.call('EXPIRE', KEYS[3], ARGV[4])
+    end
+    return payloads
+''')
+
+#: Lua script to test-and-set links in the seen filter, i.e. for each link
+#: given as ``ARGV[1]`` bit offsets in ``ARGV[3:]``, set the bits in Bloom
+#: filter ``KEYS[1]`` and check if they were all set in either ``KEYS[1]`` or
+#: the previous generation ``KEYS[2]``. ``KEYS[1]`` expires in ``ARGV[2]``
+#: milliseconds (``0`` for never). Returns ``1`` for seen links, ``0`` otherwise.
+_REDIS_SEEN_SCRIPT = textwrap.dedent('''\
+    local hashes = tonumber(ARGV[1])
+    local flags = {}
+    for index = 3, #ARGV, hashes do
+        local seen = 1
+        for offset = index, index + hashes - 1 do
+            if redis.call('SETBIT', KEYS[1], ARGV[offset], 1) == 0 then
+                seen = 0
+            end
+        end
+        if seen == 0 and KEYS[2] ~= KEYS[1] then
+            seen = 1
+            for offset = index, index + hashes - 1 do
+                if redis.call('GETBIT', KEYS[2], ARGV[offset]) == 0 then
+                    seen = 0
+                    break
+                end
+            end
+        end
+        flags[#flags + 1] = seen
+    end
+    if tonumber(ARGV[2]) > 0 then
+        redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    end
+    return flags
+''')
+
+#: Lua script to collect orphaned payloads of a shard, i.e. delete payloads
+#: of links named as ``ARGV[2:]`` prefixed with ``KEYS[3]`` which are members
+#: of neither ``KEYS[1]`` nor ``KEYS[2]``, and have been idle for at least
+#: ``ARGV[1]`` seconds (if ``OBJECT IDLETIME`` is available, and only for the
+#: per-key layout, c.f. :data:`~darc.db.PAYLOAD_BUCKET`). Returns the number
+#: of deleted payloads.
+_REDIS_COLLECT_SCRIPT = _REDIS_PAYLOAD_FUNCTIONS + textwrap.dedent('''\
+    local grace = tonumber(ARGV[1])
+    local count = 0
+    for index = 2, #ARGV do
+        local name = ARGV[index]
+        if not redis.call('ZSCORE', KEYS[1], name) and not redis.call('ZSCORE', KEYS[2], name) then
+            local ok, idle = pcall(redis.call, 'OBJECT', 'IDLETIME', KEYS[3] .. name)
+            if not ok or not idle or idle >= grace then
+                count = count + del_payload(KEYS[3], name)
+            end
+        end
+    end
+    return count
+''')
+
+#: Lua script to trim members of ``KEYS[1]`` with score in ``[ARGV[1], ARGV[2]]``
+#: (at most ``ARGV[3]`` of them). For task queues, their leases in ``KEYS[2]``
+#: and failure counters in ``KEYS[3]`` are removed as well, and so are their
+#: payloads (prefixed with ``KEYS[5]``) unless still queued in ``KEYS[4]``.
+#: Returns the number of trimmed members.
+_REDIS_TRIM_SCRIPT = _REDIS_PAYLOAD_FUNCTIONS + textwrap.dedent('''\
+    local names = redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[1], ARGV[2], 'LIMIT', 0, ARGV[3])
+    for _, name in ipairs(names) do
+        redis.call('ZREM', KEYS[1], name)
+        if #KEYS > 1 then
+            redis.call('HDEL', KEYS[2], name)
+            redis.call('HDEL', KEYS[3], name)
+            if not redis.call('ZSCORE', KEYS[4], name) then
+                del_payload(KEYS[5], name)
+            end
+        end
+    end
+    return #names
+''')
+
+#: Lua script to spill the cold tail of a task queue, i.e. remove members of
+#: ``KEYS[1]`` with the highest finite scores (at most ``ARGV[1]`` of them)
+#: which are not leased in ``KEYS[2]``, along with their failure counters in
+#: ``KEYS[3]`` and their payloads (prefixed with ``KEYS[5]``) unless still
+#: queued in ``KEYS[4]``. Returns the names, scores, payloads and numbers of
+#: failures of the removed members, flattened. Members without payload are
+#: removed and not returned.
+_REDIS_SPILL_SCRIPT = _REDIS_PAYLOAD_FUNCTIONS + textwrap.dedent('''\
+    local limit = tonumber(ARGV[1])
+    local scan = limit + redis.call('HLEN', KEYS[2])
+    local members = redis.call('ZREVRANGEBYSCORE', KEYS[1], '(+inf', '-inf', 'WITHSCORES', 'LIMIT', 0, scan)
+    local spilled = {}
+    local count = 0
+    for index = 1, #members, 2 do
+        if count >= limit then
+            break
+        end
+        local name = members[index]
+        if redis.call('HEXISTS', KEYS[2], name) == 0 then
+            local payload = get_payload(KEYS[5], name)
+            redis.call('ZREM', KEYS[1], name)
+            if payload then
+                local failures = redis.call('HGET', KEYS[3], name) or '0'
+                spilled[#spilled + 1] = name
+                spilled[#spilled + 1] = members[index + 1]
+                spilled[#spilled + 1] = payload
+                spilled[#spilled + 1] = failures
+                count = count + 1
+            end
+            redis.call('HDEL', KEYS[3], name)
+            if not redis.call('ZSCORE', KEYS[4], name) then
+                del_payload(KEYS[5], name)
+            end
+        end
+    end
+    return spilled
+''')
+
+# Redis scripts
+if redis is not None:
+    REDIS_SCRIPTS = {
+        'claim': redis.register_script(_REDIS_CLAIM_SCRIPT),
+        'stream': redis.register_script(_REDIS_STREAM_SCRIPT),
+        'release': redis.register_script(_REDIS_RELEASE_SCRIPT),
+        'seen': redis.register_script(_REDIS_SEEN_SCRIPT),
+        'collect': redis.register_script(_REDIS_COLLECT_SCRIPT),
+        'trim': redis.register_script(_REDIS_TRIM_SCRIPT),
+        'spill': redis.register_script(_REDIS_SPILL_SCRIPT),
+    }  # type: Dict[str, Script]
+
 # bulk size
 BULK_SIZE = int(os.getenv('DARC_BULK_SIZE', '100'))
 
@@ -100,6 +476,184 @@ MAX_POOL = float(os.getenv('DARC_MAX_POOL', '100'))
 if math.isfinite(MAX_POOL):
     MAX_POOL = math.floor(MAX_POOL)
 
+# lease timeout
+LEASE_TIMEOUT = float(os.getenv('DARC_LEASE_TIMEOUT', '300'))
+
+# Redis task queue data type
+REDIS_QUEUE = os.getenv('DARC_REDIS_QUEUE', 'zset').casefold()
+if REDIS_QUEUE not in ('zset', 'stream'):
+    sys.exit(f'invalid Redis task queue type: {REDIS_QUEUE}')
+# consumer group of the Redis streams
+STREAM_GROUP = os.getenv('DARC_STREAM_GROUP', 'darc')
+# max due links promoted to the Redis streams per claim
+STREAM_PROMOTE = int(os.getenv('DARC_STREAM_PROMOTE', '1_000'))
+
+#: Redis streams whose consumer groups exist, c.f. :func:`~darc.db._stream_group`.
+_STREAM_GROUPS = set()  # type: Set[str]
+
+# max links per host per claim
+HOST_LIMIT = int(os.getenv('DARC_HOST_LIMIT', '0'))
+# min delay between fetches of a host
+HOST_DELAY = float(os.getenv('DARC_HOST_DELAY', '0'))
+# max due links scanned per polite claim
+HOST_SCAN = float(os.getenv('DARC_HOST_SCAN', '1_000'))
+if math.isfinite(HOST_SCAN):
+    HOST_SCAN = math.floor(HOST_SCAN)
+
+# shard number
+SHARD_NUM = int(os.getenv('DARC_SHARD_NUM', '0'))
+
+# subscribed shards
+_SHARD_SUBSCRIBE = json.loads(os.getenv('DARC_SHARD_SUBSCRIBE', '["*"]'))
+if isinstance(_SHARD_SUBSCRIBE, dict):
+    SHARD_SUBSCRIBE = {str(pattern): float(weight) for pattern, weight in _SHARD_SUBSCRIBE.items()}  # type: Dict[str, float]
+else:
+    SHARD_SUBSCRIBE = {str(pattern): 1.0 for pattern in _SHARD_SUBSCRIBE}
+del _SHARD_SUBSCRIBE
+
+# shard claiming policy
+SHARD_POLICY = os.getenv('DARC_SHARD_POLICY', 'round-robin').casefold()
+if SHARD_POLICY not in ('round-robin', 'weighted'):
+    sys.exit(f'invalid shard policy: {SHARD_POLICY}')
+
+#: Round-robin cursors of the task queues, c.f. :func:`~darc.db._redis_order_shards`.
+_SHARD_CURSOR = {}  # type: Dict[str, int]
+
+# host affinity of workers
+AFFINITY = bool(int(os.getenv('DARC_AFFINITY', '0')))
+if AFFINITY and SHARD_NUM <= 0:
+    sys.exit('host affinity requires sharding, c.f. DARC_SHARD_NUM')
+# heartbeat timeout of workers
+AFFINITY_TTL = float(os.getenv('DARC_AFFINITY_TTL', '60'))
+if not AFFINITY_TTL > 0:
+    sys.exit(f'invalid affinity heartbeat timeout: {AFFINITY_TTL}')
+# virtual nodes per worker
+AFFINITY_REPLICAS = int(os.getenv('DARC_AFFINITY_REPLICAS', '64'))
+if AFFINITY_REPLICAS <= 0:
+    sys.exit(f'invalid affinity replicas: {AFFINITY_REPLICAS}')
+
+#: Cached hash rings of the task queues, mapping the task queues to the
+#: monotonic time of the last heartbeat, the live workers and the ring,
+#: c.f. :func:`~darc.db._affinity_ring`.
+_AFFINITY_RING = {}  # type: Dict[str, Tuple[float, List[str], List[Tuple[int, str]]]]
+#: Cached shard names of the task queue tables, c.f. :func:`~darc.db._db_shard_names`.
+_AFFINITY_SHARDS = {}  # type: Dict[str, Tuple[float, List[str]]]
+_AFFINITY_LOCK = threading.Lock()
+
+#: Edges (in seconds, relative to the due threshold) of the score
+#: histograms, c.f. :func:`~darc.db.stats`.
+STATS_BUCKETS = (-86_400, -3_600, -600, 0, 600, 3_600, 86_400)
+#: Windows (in seconds) of the rolling throughput rates.
+STATS_WINDOWS = (60, 300, 900)
+#: Time-to-live (in seconds) of the per-minute throughput counters.
+STATS_TTL = 3_600
+
+#: Names of the task queues stored in RDS tables.
+_DB_QUEUE = {
+    RequestsQueueModel: 'queue_requests',
+    SeleniumQueueModel: 'queue_selenium',
+}  # type: Dict[Type[Union[RequestsQueueModel, SeleniumQueueModel]], str]
+
+#: Pending counts of links enqueued to Redis task queues, mapping the
+#: per-minute counter keys to the counts, c.f. :func:`~darc.db._redis_enqueue`.
+_STATS_PENDING = collections.Counter()  # type: Counter[str]
+_STATS_LOCK = threading.Lock()
+
+# use seen filter?
+SEEN_FILTER = bool(int(os.getenv('DARC_SEEN_FILTER', '0')))
+
+# seen filter capacity & false positive rate
+SEEN_CAPACITY = int(os.getenv('DARC_SEEN_CAPACITY', '10_000_000'))
+SEEN_ERROR = float(os.getenv('DARC_SEEN_ERROR', '0.001'))
+
+# seen filter size in bits (at most 512 MiB as Redis strings)
+_SEEN_MEMORY = float(os.getenv('DARC_SEEN_MEMORY', 'inf'))
+SEEN_BITS = math.ceil(-SEEN_CAPACITY * math.log(SEEN_ERROR) / math.log(2) ** 2)
+if math.isfinite(_SEEN_MEMORY):
+    SEEN_BITS = min(SEEN_BITS, math.floor(_SEEN_MEMORY * 8 * 1_048_576))
+SEEN_BITS = max(min(SEEN_BITS, 2 ** 32), 8)
+del _SEEN_MEMORY
+
+# seen filter hash functions
+SEEN_HASHES = max(round(SEEN_BITS / SEEN_CAPACITY * math.log(2)), 1)
+
+# seen filter rotation interval
+SEEN_ROTATE = float(os.getenv('DARC_SEEN_ROTATE', 'inf'))
+
+# seen filter front cache size
+SEEN_CACHE = int(os.getenv('DARC_SEEN_CACHE', '100_000'))
+
+#: In-process front cache of the seen filter, mapping link hashes to
+#: their generations, c.f. :func:`~darc.db.filter_seen`.
+_SEEN_CACHE = collections.OrderedDict()  # type: OrderedDict[str, int]
+_SEEN_LOCK = threading.Lock()
+
+# hostname cache size & time-to-live
+HOSTNAME_CACHE = int(os.getenv('DARC_HOSTNAME_CACHE', '10_000'))
+HOSTNAME_TTL = float(os.getenv('DARC_HOSTNAME_TTL', '10'))
+
+#: In-process cache of known hostnames, mapping hostnames to the
+#: timestamps when their records expire, c.f. :func:`~darc.db.have_hostname`.
+_HOSTNAME_CACHE = collections.OrderedDict()  # type: OrderedDict[str, float]
+_HOSTNAME_LOCK = threading.Lock()
+
+# priority scoring
+PRIORITY = bool(int(os.getenv('DARC_PRIORITY', '0')))
+#: Weights (in seconds per unit of penalty) of the priority signals.
+PRIORITY_WEIGHTS = {
+    'depth': 60.0,
+    'host': 300.0,
+    'source': 60.0,
+    'failure': 600.0,
+}  # type: Dict[str, float]
+PRIORITY_WEIGHTS.update(json.loads(os.getenv('DARC_PRIORITY_WEIGHTS', '{}')))
+#: Ranks of the link sources, i.e. the penalties of :func:`~darc.db.priority_source`.
+LINK_SOURCES = {
+    'seed': 0,
+    'sitemap': 1,
+    'html': 2,
+    'text': 3,
+}  # type: Dict[str, float]
+#: Registry of the priority signals, c.f. :func:`~darc.db.register_priority`.
+_PRIORITY_REGISTRY = {}  # type: Dict[str, Callable[[Link, PriorityContext], float]]
+
+# garbage collection interval
+GC_INTERVAL = float(os.getenv('DARC_GC_INTERVAL', 'inf'))
+if not math.isfinite(GC_INTERVAL) or GC_INTERVAL <= 0:
+    GC_INTERVAL = None  # type: ignore[assignment]
+# garbage collection batch size
+GC_COUNT = int(os.getenv('DARC_GC_COUNT', '1_000'))
+# garbage collection grace period
+GC_GRACE = float(os.getenv('DARC_GC_GRACE', '60'))
+# retention age
+GC_RETENTION = float(os.getenv('DARC_GC_RETENTION', 'inf'))
+if not math.isfinite(GC_RETENTION):
+    GC_RETENTION = None  # type: ignore[assignment]
+#: Scores (timestamps) below which links are never trimmed, i.e. new
+#: links scored ``0`` plus their priority penalties (2000-01-01).
+GC_FLOOR = 946_684_800
+
+# write-behind buffer size & time (in milliseconds)
+BUFFER_SIZE = int(os.getenv('DARC_BUFFER_SIZE', '0'))
+BUFFER_TIME = float(os.getenv('DARC_BUFFER_TIME', '1000'))
+
+# overflow tier high & low watermarks (number of links per task queue shard)
+OVERFLOW_HIGH = int(os.getenv('DARC_OVERFLOW_HIGH', '0'))
+OVERFLOW_LOW = int(os.getenv('DARC_OVERFLOW_LOW', str(OVERFLOW_HIGH // 2)))
+if OVERFLOW_HIGH > 0 and not 0 <= OVERFLOW_LOW < OVERFLOW_HIGH:
+    sys.exit(f'invalid overflow watermarks: {OVERFLOW_LOW} / {OVERFLOW_HIGH}')
+
+#: Worker ID of the lease owner on whose behalf each thread works,
+#: c.f. :func:`~darc.db.lease_owner`.
+_LEASE_OWNER = threading.local()
+
+#: Write-behind buffer of each worker thread (``buffer``), c.f. :func:`~darc.db.write_behind`,
+#: and the buffer being flushed by the thread (``flushing``), c.f. :func:`~darc.db.defer_exit`.
+_WRITE_BUFFER = threading.local()
+#: Active write-behind buffers in current process, c.f. :func:`~darc.db.flush_buffers`.
+_BUFFER_POOL = []  # type: List[WriteBuffer]
+_BUFFER_LOCK = threading.Lock()
+
 
 def _gen_arg_msg(*args: 'Any', **kwargs: 'Any') -> str:
     """Sanitise arguments representation string.
@@ -123,6 +677,159 @@ def _gen_arg_msg(*args: 'Any', **kwargs: 'Any') -> str:
     return textwrap.shorten(_args, shutil.get_terminal_size().columns)
 
 
+@dataclasses.dataclass
+class CircuitBreaker:
+    """Circuit breaker of a task queue backend.
+
+    The circuit *opens* after :data:`~darc.db.CIRCUIT_THRESHOLD` consecutive
+    failed attempts, during which workers pause claiming new links (c.f.
+    :func:`~darc.db.load_requests`); after :data:`~darc.db.CIRCUIT_RESET`
+    seconds, it turns *half-open*, i.e. claiming is resumed and the circuit
+    opens again upon the next failure, or closes upon the next success.
+
+    Only transient errors count as failures, c.f. :data:`~darc.db._REDIS_TRANSIENT`
+    and :data:`~darc.db._DB_TRANSIENT`.
+
+    """
+
+    #: Name of the backend, i.e. ``redis`` or ``db``.
+    name: str
+    #: Number of consecutive failed attempts.
+    failures: int = 0
+    #: Monotonic time when the circuit opened.
+    opened: 'Optional[float]' = None
+    #: Number of retried attempts.
+    retries: int = 0
+    #: Number of times the circuit opened.
+    trips: int = 0
+    lock: 'threading.Lock' = dataclasses.field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def is_open(self) -> bool:
+        """If the circuit is open, i.e. workers shall pause claiming."""
+        with self.lock:
+            return self.opened is not None and time.monotonic() - self.opened < CIRCUIT_RESET
+
+    def failure(self) -> None:
+        """Record a failed attempt."""
+        with self.lock:
+            self.failures += 1
+            self.retries += 1
+            if self.failures < CIRCUIT_THRESHOLD:
+                return
+            if self.opened is not None and time.monotonic() - self.opened < CIRCUIT_RESET:
+                return
+            self.opened = time.monotonic()
+            self.trips += 1
+        logger.warning('[%s] Circuit opened after %d failures', self.name.upper(), self.failures)
+
+    def success(self) -> None:
+        """Record a successful attempt."""
+        if not self.failures:
+            return
+        with self.lock:
+            opened, self.opened, self.failures = self.opened, None, 0
+        if opened is not None:
+            logger.info('[%s] Circuit closed', self.name.upper())
+
+
+#: Circuit breaker of the Redis backend.
+_REDIS_BREAKER = CircuitBreaker('redis')
+#: Circuit breaker of the RDS backend.
+_DB_BREAKER = CircuitBreaker('db')
+
+
+def circuit_breaker() -> 'CircuitBreaker':
+    """Circuit breaker of current task queue backend.
+
+    Returns:
+        The circuit breaker of RDS if :data:`~darc.const.FLAG_DB`
+        is :data:`True`, otherwise of Redis.
+
+    """
+    return _DB_BREAKER if FLAG_DB else _REDIS_BREAKER
+
+
+def backend_metrics() -> 'Dict[str, Dict[str, int]]':
+    """Retry metrics of the task queue backends in current process.
+
+    Returns:
+        Numbers of retried attempts (``retries``), times the circuit
+        opened (``trips``) and if the circuit is open now (``open``),
+        of Redis (``redis``) and RDS (``db``).
+
+    """
+    return {breaker.name: {'retries': breaker.retries, 'trips': breaker.trips, 'open': int(breaker.is_open())}
+            for breaker in (_REDIS_BREAKER, _DB_BREAKER)}
+
+
+#: Transient errors of Redis, upon which the operations are retried; other
+#: errors (e.g. ``WRONGTYPE`` or script errors) are deterministic, thus raised
+#: immediately and not counted by the circuit breaker.
+_REDIS_TRANSIENT = (redis_lib.exceptions.ConnectionError, redis_lib.exceptions.TimeoutError,
+                    redis_lib.exceptions.BusyLoadingError, pottery_exceptions.QuorumNotAchieved)
+#: Transient errors of RDS, c.f. :data:`~darc.db._REDIS_TRANSIENT`.
+_DB_TRANSIENT = (peewee.OperationalError, peewee.InterfaceError)
+
+
+def _retry_delay(attempt: int) -> 'Optional[float]':
+    """Backoff delay before retrying a failed attempt.
+
+    Args:
+        attempt: Number of failed attempts so far, minus one.
+
+    Returns:
+        A random delay between zero and :data:`~darc.db.RETRY_INTERVAL`
+        times :data:`~darc.db.RETRY_FACTOR` to the power of ``attempt``,
+        capped at :data:`~darc.db.RETRY_MAX` (i.e. exponential backoff with
+        *full jitter*), so that workers do not retry in lockstep;
+        :data:`None` if :data:`~darc.db.RETRY_INTERVAL` is not set.
+
+    """
+    if RETRY_INTERVAL is None:
+        return None
+    return random.uniform(0, min(RETRY_MAX, RETRY_INTERVAL * RETRY_FACTOR ** min(attempt, 64)))  # nosec: B311
+
+
+def _retry_failed(breaker: 'CircuitBreaker', attempt: int, start: float,
+                  category: 'Type[Warning]', line: 'Callable[[], str]') -> 'Optional[float]':
+    """Handle a failed attempt of a backend operation.
+
+    The function is to be called within the ``except`` clause. The full
+    traceback is only logged upon the first failed attempt, and the
+    following ones are logged in one line each.
+
+    Args:
+        breaker: Circuit breaker of the backend.
+        attempt: Number of failed attempts so far, minus one.
+        start: Monotonic time of the first attempt.
+        category: Warning category.
+        line: Callback to render the source line of the operation.
+
+    Returns:
+        Seconds to sleep before the next attempt, c.f. :func:`~darc.db._retry_delay`.
+
+    Raises:
+        Exception: The exception being handled, if the attempts have
+            lasted for :data:`~darc.db.RETRY_ELAPSED` seconds.
+
+    """
+    breaker.failure()
+
+    elapsed = time.monotonic() - start
+    if RETRY_ELAPSED is not None and elapsed >= RETRY_ELAPSED:
+        logger.pexc(LOG_WARNING, f'[{breaker.name.upper()}] Giving up after {attempt + 1} attempts',
+                    category=category, line=line())
+        raise  # pylint: disable=misplaced-bare-raise
+
+    delay = _retry_delay(attempt)
+    if attempt == 0:
+        logger.pexc(LOG_WARNING, category=category, line=line())
+    else:
+        logger.warning('[%s] Attempt #%d failed after %.1fs: %s; retrying in %.1fs',
+                       breaker.name.upper(), attempt + 1, elapsed, sys.exc_info()[1], delay or 0)
+    return delay
+
+
 def _redis_command(command: str, *args: 'Any', **kwargs: 'Any') -> 'Any':
     """Wrapper function for Redis command.
 
@@ -140,27 +847,119 @@ def _redis_command(command: str, *args: 'Any', **kwargs: 'Any') -> 'Any':
         RedisCommandFailed: Warns at each round when the command failed.
 
     See Also:
-        Between each retry, the function sleeps for :data:`~darc.db.RETRY_INTERVAL`
-        second(s) if such value is **NOT** :data:`None`.
+        Between each retry, the function sleeps with exponential backoff,
+        c.f. :func:`~darc.db._retry_delay`, and gives up after
+        :data:`~darc.db.RETRY_ELAPSED` seconds, c.f. :func:`~darc.db._retry_failed`.
+        Only transient errors are retried, c.f. :data:`~darc.db._REDIS_TRANSIENT`
+        and :data:`~darc.db._DB_TRANSIENT`.
 
     """
-    _arg_msg = None
-
     method = getattr(redis, command)
+    start = time.monotonic()
+    attempt = 0
     while True:
         try:
             value = method(*args, **kwargs)
-        except (redis_lib.exceptions.RedisError, pottery_exceptions.PotteryError):
-            if _arg_msg is None:
-                _arg_msg = _gen_arg_msg(*args, **kwargs)
+        except _REDIS_TRANSIENT:
+            delay = _retry_failed(_REDIS_BREAKER, attempt, start, RedisCommandFailed,
+                                  lambda: f'value = redis.{command}({_gen_arg_msg(*args, **kwargs)})')
+            if delay is not None:
+                time.sleep(delay)
+            attempt += 1
+            continue
+        break
+    _REDIS_BREAKER.success()
+    return value
+
+
+def _redis_script(name: 'Literal["claim", "stream", "release", "seen", "collect", "trim", "spill"]', keys: 'List[str]', args: 'List[Any]') -> 'Any':  # pylint: disable=line-too-long
+    """Wrapper function for Redis (Lua) script.
+
+    Args:
+        name: Script name, c.f. :data:`~darc.db.REDIS_SCRIPTS`.
+        keys: Key names accessed by the script.
+        args: Arbitrary arguments for the script.
+
+    Return:
+        Values returned from the Redis script.
+
+    Warns:
+        RedisCommandFailed: Warns at each round when the script failed.
+
+    See Also:
+        Between each retry, the function sleeps with exponential backoff,
+        c.f. :func:`~darc.db._retry_delay`, and gives up after
+        :data:`~darc.db.RETRY_ELAPSED` seconds, c.f. :func:`~darc.db._retry_failed`.
+        Only transient errors are retried, c.f. :data:`~darc.db._REDIS_TRANSIENT`
+        and :data:`~darc.db._DB_TRANSIENT`.
+
+    """
+    script = REDIS_SCRIPTS[name]
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            value = script(keys=keys, args=args)
+        except _REDIS_TRANSIENT:
+            delay = _retry_failed(_REDIS_BREAKER, attempt, start, RedisCommandFailed,
+                                  lambda: f'value = REDIS_SCRIPTS[{name!r}]({_gen_arg_msg(keys=keys, args=args)})')
+            if delay is not None:
+                time.sleep(delay)
+            attempt += 1
+            continue
+        break
+    _REDIS_BREAKER.success()
+    return value
+
+
+def _redis_pipeline(build: 'Callable[[Pipeline], None]', *, transaction: bool = False) -> 'List[Any]':
+    """Wrapper function for Redis pipeline.
+
+    Args:
+        build: Callback to queue commands onto the
+            :class:`~redis.client.Pipeline` object.
+
+    Keyword Args:
+        transaction: If wrap the commands in ``MULTI`` / ``EXEC``.
+
+    Return:
+        Values returned from the queued Redis commands.
+
+    Warns:
+        RedisCommandFailed: Warns at each round when the pipeline failed.
+
+    Note:
+        The pipeline is rebuilt through ``build`` at each retry, as
+        :meth:`Pipeline.execute() <redis.client.Pipeline.execute>`
+        discards the command stack whatsoever. Thus, the queued
+        commands should be *idempotent*.
 
-            logger.pexc(LOG_WARNING, category=RedisCommandFailed,
-                        line=f'value = redis.{command}({_arg_msg})')
+    See Also:
+        Between each retry, the function sleeps with exponential backoff,
+        c.f. :func:`~darc.db._retry_delay`, and gives up after
+        :data:`~darc.db.RETRY_ELAPSED` seconds, c.f. :func:`~darc.db._retry_failed`.
+        Only transient errors are retried, c.f. :data:`~darc.db._REDIS_TRANSIENT`
+        and :data:`~darc.db._DB_TRANSIENT`.
 
-            if RETRY_INTERVAL is not None:
-                time.sleep(RETRY_INTERVAL)
+    """
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        pipeline = redis.pipeline(transaction=transaction)  # type: Pipeline
+        try:
+            build(pipeline)
+            value = pipeline.execute()
+        except _REDIS_TRANSIENT:
+            delay = _retry_failed(_REDIS_BREAKER, attempt, start, RedisCommandFailed,
+                                  lambda: f'value = redis.pipeline({build.__name__})')
+            if delay is not None:
+                time.sleep(delay)
+            attempt += 1
             continue
+        finally:
+            pipeline.reset()
         break
+    _REDIS_BREAKER.success()
     return value
 
 
@@ -178,916 +977,4188 @@ def _db_operation(operation: 'Callable[..., _T]', *args: 'Any', **kwargs: 'Any')
         Any return value from a successful
         ``operation`` call.
 
+    See Also:
+        Between each retry, the function sleeps with exponential backoff,
+        c.f. :func:`~darc.db._retry_delay`, and gives up after
+        :data:`~darc.db.RETRY_ELAPSED` seconds, c.f. :func:`~darc.db._retry_failed`.
+        Only transient errors are retried, c.f. :data:`~darc.db._REDIS_TRANSIENT`
+        and :data:`~darc.db._DB_TRANSIENT`.
+
     """
-    _arg_msg = None
+    def line() -> str:
+        model = cast('MethodType', operation).__self__.__class__.__name__
+        return f'{model}.{operation.__name__}({_gen_arg_msg(*args, **kwargs)})'
 
+    start = time.monotonic()
+    attempt = 0
     while True:
         try:
             value = operation(*args, **kwargs)
-        except peewee.PeeweeException:
-            if _arg_msg is None:
-                _arg_msg = _gen_arg_msg(*args, **kwargs)
-
-            model = cast('MethodType', operation).__self__.__class__.__name__
-            logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed,
-                        line=f'{model}.{operation.__name__}({_arg_msg})')
-
-            if RETRY_INTERVAL is not None:
-                time.sleep(RETRY_INTERVAL)
+        except _DB_TRANSIENT:
+            delay = _retry_failed(_DB_BREAKER, attempt, start, DatabaseOperaionFailed, line)
+            if delay is not None:
+                time.sleep(delay)
+            attempt += 1
             continue
         break
+    _DB_BREAKER.success()
     return value
 
 
-def _redis_get_lock(key: 'Literal["queue_hostname", "queue_requests", "queue_selenium"]') -> 'Union[Redlock, ContextManager]':  # pylint: disable=line-too-long
-    """Get a lock for Redis operations.
-
-    Args:
-        key: Lock target key.
+def _db_transaction() -> 'ContextManager[Any]':
+    """Transaction of task queue writes.
 
     Returns:
-        Return a new :class:`pottery.redlock.Redlock` object using key ``key``
-        that mimics the behavior of :class:`threading.Lock`.
+        A transaction of the database. On SQLite, the transaction is
+        ``IMMEDIATE``, i.e. it takes the write lock upon start, such that
+        concurrent writers wait on the busy timeout (c.f.
+        :data:`~darc.const.SQLITE_TIMEOUT`) rather than fail to upgrade
+        their read locks half-way, when committing a batch of writes.
 
-    Seel Also:
-        If :data:`~darc.db.REDIS_LOCK` is :data:`False`, returns a
-        :class:`contextlib.nullcontext` instead.
+    """
+    if isinstance(database, peewee.SqliteDatabase):
+        return database.atomic('IMMEDIATE')
+    return database.atomic()
+
+
+def worker_id() -> str:
+    """Identifier of current worker.
+
+    Returns:
+        Worker ID composed of hostname, process ID and
+        thread ID, which holds the leases of claimed links;
+        or the worker ID of the thread on whose behalf current
+        thread works, c.f. :func:`~darc.db.lease_owner`.
 
     """
-    if REDIS_LOCK:
-        return REDIS_LOCK_POOL.get(key) or nullcontext()
-    return nullcontext()
+    worker = getattr(_LEASE_OWNER, 'worker', None)
+    if worker is not None:
+        return worker
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
 
 
-def have_hostname(link: 'Link') -> 'Tuple[bool, bool]':
-    """Check if current link is a new host.
+@contextlib.contextmanager
+def lease_owner(worker: 'Optional[str]') -> 'Iterator[None]':
+    """Work on behalf of another worker.
 
     Args:
-        link: Link to check against.
-
-    Returns:
-        A tuple of two :obj:`bool` values representing
-        if such link is a known host and needs force
-        refetch respectively.
+        worker: Worker ID of the thread which claimed the links, e.g.
+            of the worker dispatching links to its round threads (c.f.
+            :func:`darc.process.process_round`), such that the links are
+            acknowledged (or released) as of the same lease owner;
+            :data:`None` to work as current thread.
 
-    See Also:
-        * :func:`darc.db._have_hostname_db`
-        * :func:`darc.db._have_hostname_redis`
+    Yields:
+        Within the context, :func:`~darc.db.worker_id` returns ``worker``.
 
     """
-    if FLAG_DB:
-        with database.connection_context():
-            try:
-                return _have_hostname_db(link)
-            except Exception:
-                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_have_hostname_db({link.url})')
-                return False, False
-    return _have_hostname_redis(link)
-
+    previous = getattr(_LEASE_OWNER, 'worker', None)
+    _LEASE_OWNER.worker = worker
+    try:
+        yield
+    finally:
+        _LEASE_OWNER.worker = previous
 
-def _have_hostname_db(link: 'Link') -> 'Tuple[bool, bool]':
-    """Check if current link is a new host.
 
-    The function checks the :class:`~darc.models.tasks.hostname.HostnameQueueModel` table.
+def _lease_key(key: str) -> str:
+    """Name of the lease hash of a task queue.
 
     Args:
-        link: Link to check against.
+        key: Name of the task queue (or its shard).
 
     Returns:
-        A tuple of two :obj:`bool` values representing
-        if such link is a known host and needs force
-        refetch respectively.
+        Name of the Redis hash mapping links to the worker IDs
+        holding their leases, e.g. ``lease_requests`` (or
+        ``lease_requests{tor:3}``).
 
     """
-    timestamp = datetime.now()
-    if TIME_CACHE is None:
-        threshold = math.inf
-    else:
-        threshold = (timestamp - TIME_CACHE).timestamp()
-
-    model, created = cast(
-        'Tuple[HostnameQueueModel, bool]',
-        _db_operation(HostnameQueueModel.get_or_create, hostname=link.host, defaults={
-            'timestamp': timestamp,
-        })
-    )
-    if created:
-        return False, False
-    return True, model.timestamp.timestamp() < threshold
-
+    return key.replace('queue_', 'lease_', 1)
 
-def _have_hostname_redis(link: 'Link') -> 'Tuple[bool, bool]':
-    """Check if current link is a new host.
 
-    The function checks the ``queue_hostname`` database.
+def _ready_key(key: str) -> str:
+    """Name of the ready hosts of a task queue.
 
     Args:
-        link: Link to check against.
+        key: Name of the task queue (or its shard).
 
     Returns:
-        A tuple of two :obj:`bool` values representing
-        if such link is a known host and needs force
-        refetch respectively.
+        Name of the Redis sorted set mapping hosts cooling down to
+        the timestamps when they are ready to be fetched again, e.g.
+        ``ready_requests`` (or ``ready_requests{tor:3}``).
 
     """
-    new_score = time.time()
-    if TIME_CACHE is None:
-        threshold = math.inf
-    else:
-        threshold = new_score - TIME_CACHE.total_seconds()
+    return key.replace('queue_', 'ready_', 1)
 
-    with _redis_get_lock('queue_hostname'):
-        score = _redis_command('zscore', 'queue_hostname', link.host)  # type: Optional[int]
-        if score is None:
-            have_flag = False
-            force_fetch = False
 
-            # update Redis record
-            redis_update = True
-        else:
-            have_flag = True
-            force_fetch = score < threshold
+def _failure_key(key: str) -> str:
+    """Name of the failure counters of a task queue.
 
-            # update Redis record (only if re-fetch)
-            redis_update = force_fetch
+    Args:
+        key: Name of the task queue (or its shard).
 
-    if redis_update:
-        _redis_command('zadd', 'queue_hostname', {
-            link.host: new_score,
-        })
-    return have_flag, force_fetch
+    Returns:
+        Name of the Redis hash mapping links to their numbers of
+        past failures, e.g. ``fails_requests`` (or ``fails_requests{tor:3}``).
+
+    """
+    return key.replace('queue_', 'fails_', 1)
 
 
-def drop_hostname(link: 'Link') -> None:
-    """Remove link from the hostname database.
+def _stream_key(key: str) -> str:
+    """Name of the stream of a task queue.
 
     Args:
-        link: Link to be removed.
+        key: Name of the task queue (or its shard).
 
-    See Also:
-        * :func:`darc.db._drop_hostname_db`
-        * :func:`darc.db._drop_hostname_redis`
+    Returns:
+        Name of the Redis stream delivering due links to the workers,
+        e.g. ``stream_requests`` (or ``stream_requests{tor:3}``),
+        c.f. :data:`~darc.db.REDIS_QUEUE`.
 
     """
-    if FLAG_DB:
-        with database.connection_context():
-            try:
-                return _drop_hostname_db(link)
-            except Exception:
-                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_drop_hostname_db({link.url})')
-                return None
-    return _drop_hostname_redis(link)
-
+    return key.replace('queue_', 'stream_', 1)
 
-def _drop_hostname_db(link: 'Link') -> None:
-    """Remove link from the hostname database.
 
-    The function updates the :class:`~darc.models.tasks.hostname.HostnameQueueModel` table.
+def _entry_key(key: str) -> str:
+    """Name of the stream entries of a task queue.
 
     Args:
-        link: Link to be removed.
+        key: Name of the task queue (or its shard).
+
+    Returns:
+        Name of the Redis hash mapping leased links to the IDs of
+        their stream entries, e.g. ``entry_requests`` (or
+        ``entry_requests{tor:3}``).
 
     """
-    model = _db_operation(HostnameQueueModel.get_or_none,
-                          HostnameQueueModel.hostname == link.host)  # type: HostnameQueueModel
-    if model is not None:
-        model.delete_instance()
+    return key.replace('queue_', 'entry_', 1)
 
 
-def _drop_hostname_redis(link: 'Link') -> None:
-    """Remove link from the hostname database.
+def _stream_group(stream: str) -> None:
+    """Create the consumer group of a stream.
 
-    The function updates the ``queue_hostname`` database.
+    The group :data:`~darc.db.STREAM_GROUP` is created (along with
+    the stream, if not exists) upon the first claim from the stream in
+    each process, delivering all entries in the stream.
 
     Args:
-        link: Link to be removed.
+        stream: Name of the stream.
 
     """
-    with _redis_get_lock('queue_hostname'):
-        _redis_command('zrem', 'queue_hostname', link.host)
-
+    if stream in _STREAM_GROUPS:
+        return
+    try:
+        _redis_command('xgroup_create', stream, STREAM_GROUP, id='0', mkstream=True)
+    except redis_lib.exceptions.ResponseError as error:
+        # BUSYGROUP, i.e. created by another worker already
+        if not str(error).startswith('BUSYGROUP'):
+            raise
+    _STREAM_GROUPS.add(stream)
 
-def drop_requests(link: 'Link') -> None:  # pylint: disable=inconsistent-return-statements
-    """Remove link from the :mod:`requests` database.
 
-    Args:
-        link: Link to be removed.
+def leave_streams() -> None:
+    """Remove current worker from the consumer groups of the streams upon exit.
 
-    See Also:
-        * :func:`darc.db._drop_requests_db`
-        * :func:`darc.db._drop_requests_redis`
+    As each worker thread joins the consumer groups with its own
+    :func:`~darc.db.worker_id`, the consumers of exited workers would
+    pile up otherwise. Consumers with pending entries are kept, as the
+    entries could no longer be auto-claimed by the other workers once
+    removed; they are removed by the garbage collection instead, c.f.
+    :func:`~darc.db._compact_streams`. Failures are ignored.
 
     """
-    if FLAG_DB:
-        with database.connection_context():
-            try:
-                return _drop_requests_db(link)
-            except Exception:
-                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_drop_requests_db({link.url})')
-                return None
-    return _drop_requests_redis(link)
+    if FLAG_DB or REDIS_QUEUE != 'stream':
+        return
+    worker = worker_id()
+    for stream in list(_STREAM_GROUPS):
+        with contextlib.suppress(Exception):
+            if not redis.xpending_range(stream, STREAM_GROUP, '-', '+', 1, consumername=worker):  # pylint: disable=line-too-long
+                redis.xgroup_delconsumer(stream, STREAM_GROUP, worker)
 
 
-def _drop_requests_db(link: 'Link') -> None:
-    """Remove link from the :mod:`requests` database.
+atexit.register(leave_streams)
 
-    The function updates the :class:`~darc.model.tasks.requests.RequestsQueueModel` table.
+
+def shard_name(link: 'Link') -> 'Optional[str]':
+    """Shard of a link in the task queues.
 
     Args:
-        link: Link to be removed.
+        link: Link to be queued.
 
-    """
-    model = _db_operation(RequestsQueueModel.get_or_none,
-                          RequestsQueueModel.text == link.url)  # type: RequestsQueueModel
-    if model is not None:
-        model.delete_instance()
+    Returns:
+        Shard name composed of the proxy type and the CRC32 hash of
+        the hostname modulo :data:`~darc.db.SHARD_NUM`, e.g. ``tor:3``;
+        :data:`None` if sharding is disabled.
 
+    """
+    if SHARD_NUM <= 0:
+        return None
+    return f'{link.proxy}:{zlib.crc32((link.host or "").encode()) % SHARD_NUM}'
 
-def _drop_requests_redis(link: 'Link') -> None:
-    """Remove link from the :mod:`requests` database.
 
-    The function updates the ``queue_requests`` database.
+def shard_weight(shard: str) -> float:
+    """Subscription weight of a shard.
 
     Args:
-        link: Link to be removed.
+        shard: Shard name.
+
+    Returns:
+        The greatest weight of the patterns in :data:`~darc.db.SHARD_SUBSCRIBE`
+        matching ``shard``; ``0`` if not subscribed.
 
     """
-    with _redis_get_lock('queue_requests'):
-        _redis_command('zrem', 'queue_requests', link.name)
-    _redis_command('delete', link.name)
+    return max((weight for pattern, weight in SHARD_SUBSCRIBE.items()
+                if fnmatch.fnmatchcase(shard, pattern)), default=0.0)
 
 
-def drop_selenium(link: 'Link') -> None:  # pylint: disable=inconsistent-return-statements
-    """Remove link from the :mod:`selenium` database.
+def _shard_key(key: str, shard: 'Optional[str]') -> str:
+    """Name of a shard of a task queue.
 
     Args:
-        link: Link to be removed.
+        key: Name of the task queue.
+        shard: Shard name.
 
-    See Also:
-        * :func:`darc.db._drop_selenium_db`
-        * :func:`darc.db._drop_selenium_redis`
+    Returns:
+        Name of the shard with the shard name as the Redis Cluster
+        *hash tag*, e.g. ``queue_requests{tor:3}``; ``key`` as is if
+        ``shard`` is :data:`None`.
 
     """
-    if FLAG_DB:
-        with database.connection_context():
+    if shard is None:
+        return key
+    return f'{key}{{{shard}}}'
+
+
+def _payload_prefix(shard: 'Optional[str]') -> str:
+    """Prefix of payload keys of a shard.
+
+    Args:
+        shard: Shard name.
+
+    Returns:
+        The hash tag of ``shard``, such that the payloads reside in
+        the same Redis Cluster slot as the shard; empty if ``shard``
+        is :data:`None`.
+
+    """
+    if shard is None:
+        return ''
+    return f'{{{shard}}}'
+
+
+def _payload_bucket(prefix: str, name: str) -> str:
+    """Name of the hash bucket of a payload.
+
+    Args:
+        prefix: Prefix of payload keys, c.f. :func:`~darc.db._payload_prefix`.
+        name: Link name, i.e. the hex digest.
+
+    Returns:
+        Name of the Redis hash storing the serialised link, addressed
+        by the first :data:`~darc.db.PAYLOAD_BUCKET` hex digits of the
+        digest, e.g. ``bucket:3fa`` (or ``{tor:3}bucket:3fa``).
+
+    """
+    return f'{prefix}bucket:{name[:PAYLOAD_BUCKET]}'
+
+
+def _payload_field(name: str) -> bytes:
+    """Field of a payload in its hash bucket.
+
+    Args:
+        name: Link name, i.e. the hex digest.
+
+    Returns:
+        The binary digest, i.e. half the size of ``name``.
+
+    """
+    return bytes.fromhex(name)
+
+
+def _payload_set(pipeline: 'Union[Pipeline, AsyncPipeline]', prefix: str, name: str,
+                 payload: bytes, xx: bool = False) -> None:
+    """Queue writing a payload onto a pipeline.
+
+    Args:
+        pipeline: Redis pipeline.
+        prefix: Prefix of payload keys, c.f. :func:`~darc.db._payload_prefix`.
+        name: Link name.
+        payload: Serialised link, c.f. :func:`~darc.link.dumps_link`.
+        xx: Overwrite an existing payload, otherwise only
+            write if not existing.
+
+    Note:
+        Unless ``xx``, exactly one command is queued per payload, c.f.
+        :func:`~darc.db._count_enqueued`. In the hash bucket layout (c.f.
+        :data:`~darc.db.PAYLOAD_BUCKET`), an overwrite moves the payload
+        from its own key (if any) into the bucket.
+
+    """
+    if PAYLOAD_BUCKET <= 0:
+        pipeline.set(prefix + name, payload, nx=not xx, xx=xx)
+    elif xx:
+        pipeline.hset(_payload_bucket(prefix, name), _payload_field(name), payload)
+        pipeline.delete(prefix + name)
+    else:
+        pipeline.hsetnx(_payload_bucket(prefix, name), _payload_field(name), payload)
+
+
+def _payload_delete(pipeline: 'Union[Pipeline, AsyncPipeline]', prefix: str, name: str) -> None:
+    """Queue deleting a payload onto a pipeline.
+
+    Args:
+        pipeline: Redis pipeline.
+        prefix: Prefix of payload keys, c.f. :func:`~darc.db._payload_prefix`.
+        name: Link name.
+
+    """
+    pipeline.delete(prefix + name)
+    if PAYLOAD_BUCKET > 0:
+        pipeline.hdel(_payload_bucket(prefix, name), _payload_field(name))
+
+
+def _payload_get(prefix: str, names: 'List[str]') -> 'List[Optional[bytes]]':
+    """Read payloads of links.
+
+    Args:
+        prefix: Prefix of payload keys, c.f. :func:`~darc.db._payload_prefix`.
+        names: Link names.
+
+    Returns:
+        Serialised links; :data:`None` for those without payload. In the
+        hash bucket layout (c.f. :data:`~darc.db.PAYLOAD_BUCKET`), payloads
+        not found in the buckets are looked up at their own keys.
+
+    """
+    if not names:
+        return []
+    if PAYLOAD_BUCKET <= 0:
+        return _redis_command('mget', [prefix + name for name in names])
+
+    def get(pipeline: 'Pipeline') -> None:
+        for name in names:
+            pipeline.hget(_payload_bucket(prefix, name), _payload_field(name))
+    payloads = _redis_pipeline(get)  # type: List[Optional[bytes]]
+
+    missing = [index for index, payload in enumerate(payloads) if payload is None]
+    if missing:
+        for index, payload in zip(missing, _redis_command('mget', [prefix + names[index] for index in missing])):
+            payloads[index] = payload
+    return payloads
+
+
+def _registry_key(key: 'Literal["queue_requests", "queue_selenium"]') -> str:
+    """Name of the shard registry of a task queue.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        Name of the Redis set of known shard names, e.g. ``shards_requests``.
+
+    """
+    return key.replace('queue_', 'shards_', 1)
+
+
+def _redis_shards(key: 'Literal["queue_requests", "queue_selenium"]') -> 'List[Optional[str]]':
+    """Known shards of a task queue.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        Sorted names of all shards registered in the task queue;
+        ``[None]`` if sharding is disabled.
+
+    """
+    if SHARD_NUM <= 0:
+        return [None]
+    return sorted(name.decode() for name in _redis_command('smembers', _registry_key(key)))
+
+
+def _redis_order_shards(key: 'Literal["queue_requests", "queue_selenium"]') -> 'List[str]':
+    """Subscribed shards of a task queue in claiming order.
+
+    With ``round-robin`` policy, the shards are rotated by a cursor
+    advanced at each call; with ``weighted`` policy, the shards are
+    shuffled by their weights (c.f. :func:`~darc.db.shard_weight`),
+    i.e. shards with greater weights are more likely to come first.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        Names of subscribed shards, limited to those owned by current
+        worker if :data:`~darc.db.AFFINITY` is set.
+
+    See Also:
+        * :data:`darc.db.SHARD_SUBSCRIBE`
+        * :data:`darc.db.SHARD_POLICY`
+        * :func:`darc.db._affinity_filter`
+
+    """
+    return _order_shards(key, _affinity_filter(key, cast('List[str]', _redis_shards(key))))
+
+
+def _order_shards(key: 'Literal["queue_requests", "queue_selenium"]', names: 'List[str]') -> 'List[str]':
+    """Order subscribed shards of a task queue.
+
+    Args:
+        key: Name of the task queue.
+        names: Names of all shards registered in the task queue.
+
+    Returns:
+        Names of subscribed shards in claiming order,
+        c.f. :func:`~darc.db._redis_order_shards`.
+
+    """
+    weights = {}  # type: Dict[str, float]
+    for shard in names:
+        weight = shard_weight(shard)
+        if weight > 0:
+            weights[shard] = weight
+    shards = list(weights)
+    if not shards:
+        return shards
+
+    if SHARD_POLICY == 'weighted':
+        # weighted random sampling without replacement (Efraimidis-Spirakis)
+        return sorted(shards, key=lambda shard: random.random() ** (1 / weights[shard]), reverse=True)  # nosec: B311
+
+    cursor = _SHARD_CURSOR.get(key, 0) % len(shards)
+    _SHARD_CURSOR[key] = cursor + 1
+    return shards[cursor:] + shards[:cursor]
+
+
+def _db_shard_filter(model: 'Union[Type[RequestsQueueModel], Type[SeleniumQueueModel]]') -> 'Expression':
+    """Filter records of subscribed shards.
+
+    The glob patterns of :data:`~darc.db.SHARD_SUBSCRIBE` are translated
+    into SQL ``LIKE`` patterns on the ``shard`` column. Records saved
+    before sharding was enabled, i.e. without a shard, are claimed by
+    workers subscribed to all shards (``*``) only.
+
+    If :data:`~darc.db.AFFINITY` is set, the records are further limited
+    to the shards owned by current worker, c.f. :func:`~darc.db._affinity_filter`.
+
+    Args:
+        model: Task queue table.
+
+    Returns:
+        Filter expression for the ``WHERE`` clause.
+
+    """
+    if SHARD_NUM <= 0:
+        return peewee.SQL('1 = 1')
+
+    if SHARD_SUBSCRIBE.get('*', 0) > 0:
+        expression = peewee.SQL('1 = 1')  # type: Expression
+    else:
+        expression = peewee.SQL('1 = 0')
+        for pattern, weight in SHARD_SUBSCRIBE.items():
+            if weight > 0:
+                # NB: peewee translates ``LIKE`` into ``GLOB`` on SQLite
+                expression |= peewee.NodeList((model.shard, peewee.SQL('LIKE'),
+                                               pattern.replace('*', '%').replace('?', '_')))
+
+    if AFFINITY:
+        owned = _affinity_filter(_DB_QUEUE[model], _db_shard_names(model))
+        affinity = model.shard.in_([shard for shard in owned if shard])  # type: Expression
+        if '' in owned:
+            affinity |= model.shard.is_null()
+        expression &= affinity
+    return expression
+
+
+def affinity_node() -> str:
+    """Node of current worker on the hash ring.
+
+    Returns:
+        Node composed of hostname and process ID, such that all threads
+        of a worker process claim from the same shards, and thus share
+        their per-host states, e.g. sessions and ``robots.txt``.
+
+    """
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _worker_key(key: 'Literal["queue_requests", "queue_selenium"]') -> str:
+    """Name of the live workers of a task queue.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        Name of the Redis sorted set mapping the worker nodes to the
+        timestamps of their last heartbeats, e.g. ``workers_requests``.
+
+    """
+    return key.replace('queue_', 'workers_', 1)
+
+
+def _ring_point(value: str) -> int:
+    """Position of a value on the hash ring, i.e. its CRC32 hash."""
+    return zlib.crc32(value.encode())
+
+
+def _build_ring(workers: 'List[str]') -> 'List[Tuple[int, str]]':
+    """Build the hash ring of live workers.
+
+    Args:
+        workers: Worker nodes, c.f. :func:`~darc.db.affinity_node`.
+
+    Returns:
+        Sorted positions of :data:`~darc.db.AFFINITY_REPLICAS` virtual
+        nodes per worker, paired with the worker nodes.
+
+    """
+    return sorted((_ring_point(f'{worker}#{index}'), worker)
+                  for worker in workers for index in range(AFFINITY_REPLICAS))
+
+
+def _affinity_owner(ring: 'List[Tuple[int, str]]', shard: str) -> 'Optional[str]':
+    """Owner of a shard on the hash ring.
+
+    Args:
+        ring: Hash ring, c.f. :func:`~darc.db._build_ring`.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`; empty
+            for records saved before sharding was enabled.
+
+    Returns:
+        The worker of the first virtual node clockwise from the
+        position of ``shard``; :data:`None` if the ring is empty.
+
+    """
+    if not ring:
+        return None
+    index = bisect.bisect_left(ring, (_ring_point(shard), ''))
+    return ring[index % len(ring)][1]
+
+
+def _affinity_heartbeat_redis(key: 'Literal["queue_requests", "queue_selenium"]') -> 'List[str]':
+    """Send the heartbeat of current worker to Redis.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        Sorted nodes of live workers of the task queue, i.e. with
+        heartbeats within :data:`~darc.db.AFFINITY_TTL` seconds.
+
+    """
+    now = time.time()
+    workers = _worker_key(key)
+
+    def heartbeat(pipeline: 'Pipeline') -> None:
+        pipeline.zadd(workers, {affinity_node(): now})
+        pipeline.zremrangebyscore(workers, '-inf', now - AFFINITY_TTL)
+        pipeline.zrange(workers, 0, -1)
+    return sorted(worker.decode() for worker in _redis_pipeline(heartbeat)[-1])
+
+
+def _affinity_heartbeat_db(key: 'Literal["queue_requests", "queue_selenium"]') -> 'List[str]':
+    """Send the heartbeat of current worker to the database.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        Sorted nodes of live workers of the task queue, i.e. with
+        heartbeats within :data:`~darc.db.AFFINITY_TTL` seconds.
+
+    """
+    now = datetime.now()
+    query = WorkerModel.insert(queue=key, worker=affinity_node(), timestamp=now)
+    if isinstance(database, peewee.MySQLDatabase):
+        query = query.on_conflict(preserve=[WorkerModel.timestamp])
+    else:
+        query = query.on_conflict(conflict_target=[WorkerModel.queue, WorkerModel.worker],
+                                  preserve=[WorkerModel.timestamp])
+
+    with _db_transaction():
+        _db_operation(query.execute)
+        _db_operation(WorkerModel
+                      .delete()
+                      .where((WorkerModel.queue == key)
+                             & (WorkerModel.timestamp < now - timedelta(seconds=AFFINITY_TTL)))
+                      .execute)
+        return sorted(worker for worker, in _db_operation(WorkerModel
+                                                          .select(WorkerModel.worker)
+                                                          .where(WorkerModel.queue == key)
+                                                          .tuples()
+                                                          .execute))
+
+
+def _affinity_ring(key: 'Literal["queue_requests", "queue_selenium"]') -> 'List[Tuple[int, str]]':
+    """Hash ring of live workers of a task queue.
+
+    The heartbeat of current worker is sent, and the ring rebuilt from
+    the live workers, once per third of :data:`~darc.db.AFFINITY_TTL`.
+    Workers joining the task queue take over their shares of shards
+    upon the next rebuild, and shards of workers gone silent for
+    :data:`~darc.db.AFFINITY_TTL` seconds are taken over by the rest.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        The hash ring, c.f. :func:`~darc.db._build_ring`.
+
+    Note:
+        As each worker rebuilds its ring on its own, two workers may
+        claim from the same shard for a short while upon rebalancing;
+        the leases still prevent the same link from being claimed twice.
+
+    """
+    with _AFFINITY_LOCK:
+        cached = _AFFINITY_RING.get(key)
+        if cached is not None and time.monotonic() - cached[0] < AFFINITY_TTL / 3:
+            return cached[2]
+
+        workers = _affinity_heartbeat_db(key) if FLAG_DB else _affinity_heartbeat_redis(key)
+        if cached is not None and cached[1] == workers:
+            ring = cached[2]
+        else:
+            ring = _build_ring(workers)
+            logger.info('[AFFINITY] Rebalanced %s over %d worker(s)', key, len(workers))
+        _AFFINITY_RING[key] = (time.monotonic(), workers, ring)
+    return ring
+
+
+def _affinity_filter(key: 'Literal["queue_requests", "queue_selenium"]', names: 'List[str]') -> 'List[str]':
+    """Filter shards owned by current worker.
+
+    Hosts are partitioned into shards by :func:`~darc.db.shard_name`,
+    and the shards are assigned to the live workers by consistent hashing,
+    c.f. :func:`~darc.db._affinity_owner`, such that links of each host
+    are claimed by one worker process only, and only a fair share of the
+    shards is reassigned when workers join or leave.
+
+    Args:
+        key: Name of the task queue.
+        names: Shard names.
+
+    Returns:
+        Names of the shards owned by current worker; ``names`` as is
+        if :data:`~darc.db.AFFINITY` is not set.
+
+    """
+    if not AFFINITY:
+        return names
+    ring = _affinity_ring(key)
+    node = affinity_node()
+    return [shard for shard in names if _affinity_owner(ring, shard) == node]
+
+
+def _db_shard_names(model: 'Union[Type[RequestsQueueModel], Type[SeleniumQueueModel]]') -> 'List[str]':
+    """Shard names of a task queue table.
+
+    The names are cached for a third of :data:`~darc.db.AFFINITY_TTL`.
+
+    Args:
+        model: Task queue table.
+
+    Returns:
+        Sorted distinct shard names of the records; empty for
+        records saved before sharding was enabled.
+
+    """
+    key = _DB_QUEUE[model]
+    with _AFFINITY_LOCK:
+        cached = _AFFINITY_SHARDS.get(key)
+        if cached is not None and time.monotonic() - cached[0] < AFFINITY_TTL / 3:
+            return cached[1]
+
+    names = sorted(shard or '' for shard, in _db_operation(model.select(model.shard).distinct().tuples().execute))
+    with _AFFINITY_LOCK:
+        _AFFINITY_SHARDS[key] = (time.monotonic(), names)
+    return names
+
+
+def _affinity_leave() -> None:
+    """Remove current worker from the hash rings upon exit.
+
+    Thus, shards of current worker are taken over by the rest upon
+    their next rebuild of the ring, instead of after :data:`~darc.db.AFFINITY_TTL`
+    seconds. Failures are ignored, as the heartbeat expires anyway.
+
+    """
+    node = affinity_node()
+    for key in list(_AFFINITY_RING):
+        with contextlib.suppress(Exception):
+            if FLAG_DB:
+                with database.connection_context():
+                    WorkerModel.delete().where((WorkerModel.queue == key) & (WorkerModel.worker == node)).execute()
+            else:
+                redis.zrem(_worker_key(key), node)  # type: ignore[arg-type]
+
+
+atexit.register(_affinity_leave)
+
+
+def _seen_generation() -> int:
+    """Current generation of the seen filter.
+
+    Returns:
+        Number of :data:`~darc.db.SEEN_ROTATE` intervals since epoch;
+        ``0`` if rotation is disabled.
+
+    """
+    if math.isfinite(SEEN_ROTATE):
+        return int(time.time() // SEEN_ROTATE)
+    return 0
+
+
+def _seen_key(generation: int) -> str:
+    """Name of the seen filter of a generation.
+
+    Args:
+        generation: Generation of the seen filter.
+
+    Returns:
+        Name of the Redis bitmap, e.g. ``{seen_requests}:0``,
+        with a common hash tag for all generations.
+
+    """
+    return f'{{seen_requests}}:{generation}'
+
+
+def _seen_offsets(link: 'Link') -> 'List[int]':
+    """Bit offsets of a link in the seen filter.
+
+    The offsets are derived from :attr:`Link.name <darc.link.Link.name>`
+    through double hashing, i.e. no more hashing is required.
+
+    Args:
+        link: Link to be tested.
+
+    Returns:
+        :data:`~darc.db.SEEN_HASHES` offsets in the Bloom filter.
+
+    """
+    hash_1 = int(link.name[:16], 16)
+    hash_2 = int(link.name[16:32], 16) | 1
+    return [(hash_1 + index * hash_2) % SEEN_BITS for index in range(SEEN_HASHES)]
+
+
+def filter_seen(entries: 'List[Link]') -> 'List[Link]':
+    """Drop links which have been saved before.
+
+    The function tests ``entries`` against an in-process LRU front
+    cache of :data:`~darc.db.SEEN_CACHE` links, then against a Bloom
+    filter stored as Redis bitmap (one round trip per
+    :data:`~darc.db.BULK_SIZE` links, c.f. :data:`~darc.db._REDIS_SEEN_SCRIPT`),
+    and marks the remaining links as seen.
+
+    If :data:`~darc.db.SEEN_ROTATE` is finite, the Bloom filter rotates
+    at each interval, and links are remembered for one to two intervals.
+
+    Args:
+        entries: Links to be saved.
+
+    Returns:
+        Links which have not been seen, with a false positive rate of
+        about :data:`~darc.db.SEEN_ERROR` (if the filter is within
+        its :data:`~darc.db.SEEN_CAPACITY`).
+
+    Note:
+        With the RDS backend (c.f. :data:`~darc.const.FLAG_DB`), only
+        the front cache is used.
+
+    Warning:
+        Links cannot be removed from the seen filter, i.e. links removed
+        through :func:`~darc.db.drop_requests` will not be saved again
+        through ``nx`` bulk saves until the filter rotates.
+
+    """
+    if not SEEN_FILTER:
+        return entries
+    generation = _seen_generation()
+    pool = _seen_uncached(entries, generation)
+
+    if FLAG_DB:
+        link_pool = list(pool.values())
+    else:
+        keys, expire = _seen_keys(generation)
+
+        link_pool = []
+        for chunk in peewee.chunked(pool.values(), BULK_SIZE):
+            flags = _redis_script('seen', keys, _seen_args(chunk, expire))  # type: List[int]
+            link_pool.extend(link for link, seen in zip(chunk, flags) if not seen)
+
+    _seen_cache(pool, generation)
+    return link_pool
+
+
+def _seen_uncached(entries: 'List[Link]', generation: int) -> 'Dict[str, Link]':
+    """Drop links found in the front cache of the seen filter.
+
+    Args:
+        entries: Links to be saved.
+        generation: Current generation of the seen filter.
+
+    Returns:
+        Unique links not in the front cache, mapped by their names.
+
+    """
+    pool = {}  # type: Dict[str, Link]
+    with _SEEN_LOCK:
+        for link in entries:
+            if not isinstance(link, Link) or link.name in pool:
+                continue
+            cached = _SEEN_CACHE.get(link.name)
+            if cached is not None and cached >= generation - 1:
+                _SEEN_CACHE.move_to_end(link.name)
+                continue
+            pool[link.name] = link
+    return pool
+
+
+def _seen_cache(pool: 'Dict[str, Link]', generation: int) -> None:
+    """Add links to the front cache of the seen filter.
+
+    Args:
+        pool: Links tested against the seen filter, mapped by their names.
+        generation: Current generation of the seen filter.
+
+    """
+    with _SEEN_LOCK:
+        for name in pool:
+            _SEEN_CACHE[name] = generation
+            _SEEN_CACHE.move_to_end(name)
+        while len(_SEEN_CACHE) > SEEN_CACHE:
+            _SEEN_CACHE.popitem(last=False)
+
+
+def _seen_keys(generation: int) -> 'Tuple[List[str], int]':
+    """Keys and expiry of the seen filter.
+
+    Args:
+        generation: Current generation of the seen filter.
+
+    Returns:
+        ``KEYS`` of :data:`~darc.db._REDIS_SEEN_SCRIPT`, i.e. the
+        current and the previous generations, and the expiry (in
+        milliseconds) of the current generation.
+
+    """
+    if math.isfinite(SEEN_ROTATE):
+        return [_seen_key(generation), _seen_key(generation - 1)], math.ceil(SEEN_ROTATE * 2_000)
+    return [_seen_key(generation)] * 2, 0
+
+
+def _seen_args(chunk: 'Iterable[Link]', expire: int) -> 'List[Any]':
+    """Arguments to test-and-set links in the seen filter.
+
+    Args:
+        chunk: Links to be tested.
+        expire: Expiry (in milliseconds) of the current generation.
+
+    Returns:
+        ``ARGV`` of :data:`~darc.db._REDIS_SEEN_SCRIPT`.
+
+    """
+    args = [SEEN_HASHES, expire]  # type: List[Any]
+    for link in chunk:
+        args.extend(_seen_offsets(link))
+    return args
+
+
+def _stats_key(key: 'Literal["queue_requests", "queue_selenium"]', shard: 'Optional[str]', minute: int) -> str:
+    """Name of the per-minute throughput counters of a task queue.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name.
+        minute: Minutes since epoch.
+
+    Returns:
+        Name of the Redis hash counting links enqueued (``in``) and
+        claimed (``out``) within the minute, e.g. ``stats_requests{tor:3}:29000000``.
+
+    """
+    return f'{_shard_key(key.replace("queue_", "stats_", 1), shard)}:{minute}'
+
+
+def _pop_stats_pending() -> 'Dict[str, int]':
+    """Pop pending throughput counters.
+
+    Returns:
+        Pending counts of enqueued links, c.f. :data:`~darc.db._STATS_PENDING`.
+
+    """
+    with _STATS_LOCK:
+        pending = {name: count for name, count in _STATS_PENDING.items() if count > 0}
+        _STATS_PENDING.clear()
+    return pending
+
+
+def _queue_stats_pending(pipeline: 'Pipeline', pending: 'Dict[str, int]') -> None:
+    """Queue pending throughput counters onto a pipeline.
+
+    Args:
+        pipeline: Redis pipeline.
+        pending: Pending counts of enqueued links.
+
+    """
+    for name, count in pending.items():
+        pipeline.hincrby(name, 'in', count)
+        pipeline.expire(name, STATS_TTL)
+
+
+def _redis_flush_stats() -> None:
+    """Flush pending throughput counters to Redis."""
+    pending = _pop_stats_pending()
+    if not pending:
+        return
+
+    def flush(pipeline: 'Pipeline') -> None:
+        _queue_stats_pending(pipeline, pending)
+    _redis_pipeline(flush)
+
+
+def _db_count(model: 'Union[Type[RequestsQueueModel], Type[SeleniumQueueModel]]',
+              field: 'Literal["enqueued", "claimed"]', count: int) -> None:
+    """Count links enqueued to or claimed from a task queue table.
+
+    The function *upserts* the per-minute counters in the
+    :class:`~darc.model.tasks.stats.QueueStatsModel` table.
+
+    Args:
+        model: Task queue table.
+        field: Name of the counter.
+        count: Number of links.
+
+    """
+    if count <= 0:
+        return
+
+    column = getattr(QueueStatsModel, field)
+    query = QueueStatsModel.insert(queue=_DB_QUEUE[model], minute=int(time.time() // 60), **{field: count})
+    if isinstance(database, peewee.MySQLDatabase):
+        query = query.on_conflict(update={column: column + count})
+    else:
+        query = query.on_conflict(conflict_target=[QueueStatsModel.queue, QueueStatsModel.minute],
+                                  update={column: column + count})
+    _db_operation(query.execute)
+
+
+def _redis_get_lock(key: 'Literal["queue_hostname", "queue_requests", "queue_selenium"]') -> 'Union[Redlock, ContextManager]':  # pylint: disable=line-too-long
+    """Get a lock for Redis operations.
+
+    Args:
+        key: Lock target key.
+
+    Returns:
+        Return a new :class:`pottery.redlock.Redlock` object using key ``key``
+        that mimics the behavior of :class:`threading.Lock`.
+
+    Seel Also:
+        If :data:`~darc.db.REDIS_LOCK` is :data:`False`, returns a
+        :class:`contextlib.nullcontext` instead.
+
+    """
+    if REDIS_LOCK:
+        return REDIS_LOCK_POOL.get(key) or nullcontext()
+    return nullcontext()
+
+
+def _cache_hostname(host: str, timestamp: float) -> None:
+    """Cache a known hostname.
+
+    Args:
+        host: Hostname of the record.
+        timestamp: Timestamp of the record in the hostname database.
+
+    Note:
+        The cache is disabled if :data:`~darc.const.TIME_CACHE` is
+        :data:`None`, i.e. hosts are always refetched, or if
+        :data:`~darc.db.HOSTNAME_CACHE` or :data:`~darc.db.HOSTNAME_TTL`
+        is not positive.
+
+        As :func:`~darc.db.drop_hostname` only evicts the host from the
+        cache of current process, a host is cached for at most
+        :data:`~darc.db.HOSTNAME_TTL` seconds, so that the other workers
+        consider a dropped host as new again within as long.
+
+    """
+    if TIME_CACHE is None or HOSTNAME_CACHE <= 0 or HOSTNAME_TTL <= 0:
+        return
+
+    expiry = min(timestamp + TIME_CACHE.total_seconds(), time.time() + HOSTNAME_TTL)
+    with _HOSTNAME_LOCK:
+        _HOSTNAME_CACHE[host] = expiry
+        _HOSTNAME_CACHE.move_to_end(host)
+        while len(_HOSTNAME_CACHE) > HOSTNAME_CACHE:
+            _HOSTNAME_CACHE.popitem(last=False)
+
+
+def _cached_hostname(host: str) -> bool:
+    """Check if a hostname is cached as known and fresh.
+
+    Args:
+        host: Hostname to check against.
+
+    Returns:
+        If the record of ``host`` is known not to expire yet,
+        i.e. :func:`~darc.db.have_hostname` shall return
+        ``(True, False)`` without querying the backend.
+
+    """
+    with _HOSTNAME_LOCK:
+        expiry = _HOSTNAME_CACHE.get(host)
+        if expiry is None:
+            return False
+        if expiry <= time.time():
+            del _HOSTNAME_CACHE[host]
+            return False
+        _HOSTNAME_CACHE.move_to_end(host)
+    return True
+
+
+@dataclasses.dataclass
+class PriorityContext:
+    """Context of a link being scored, c.f. :func:`~darc.db.priority_score`."""
+
+    #: Source of the link, c.f. :data:`~darc.db.LINK_SOURCES`.
+    source: 'Optional[str]' = None
+    #: Number of past failures of the link.
+    failures: int = 0
+
+
+def register_priority(name: str, signal: 'Callable[[Link, PriorityContext], float]',
+                      weight: 'Optional[float]' = None) -> None:
+    """Register a priority signal.
+
+    Args:
+        name: Name of the signal.
+        signal: Signal function, which takes the link being scored
+            and its :class:`~darc.db.PriorityContext`, and returns a
+            non-negative *penalty*, i.e. greater values defer the link.
+        weight: Default weight (in seconds per unit of penalty) of
+            the signal, if not configured through
+            :envvar:`DARC_PRIORITY_WEIGHTS`; ``1`` if not given.
+
+    See Also:
+        The signals will be saved into :data:`~darc.db._PRIORITY_REGISTRY`.
+
+    """
+    _PRIORITY_REGISTRY[name] = signal
+    if weight is not None:
+        PRIORITY_WEIGHTS.setdefault(name, weight)
+
+
+def priority_score(link: 'Link', score: float, context: 'Optional[PriorityContext]' = None) -> float:
+    """Score of a link in the task queues.
+
+    Args:
+        link: Link to be queued.
+        score: Due time of the link, i.e. the timestamp score.
+        context: Context of the link.
+
+    Returns:
+        ``score`` deferred by the weighted sum of the penalties from
+        the registered priority signals, if :data:`~darc.db.PRIORITY`
+        is enabled; as links with lower scores are claimed first, due
+        links are claimed in the order of their priorities.
+
+    """
+    if not PRIORITY:
+        return score
+    if context is None:
+        context = PriorityContext()
+
+    for name, signal in _PRIORITY_REGISTRY.items():
+        weight = PRIORITY_WEIGHTS.get(name, 1.0)
+        if weight:
+            score += weight * signal(link, context)
+    return max(score, 0.0)
+
+
+def _priority_timestamp(link: 'Link', score: float, context: 'PriorityContext') -> 'datetime':
+    """Timestamp of a record in the task queue tables.
+
+    Args:
+        link: Link to be queued.
+        score: Due time of the link.
+        context: Context of the link.
+
+    Returns:
+        The score of the link (c.f. :func:`~darc.db.priority_score`)
+        as :class:`~datetime.datetime`.
+
+    """
+    return datetime.fromtimestamp(priority_score(link, score, context))
+
+
+def priority_depth(link: 'Link', context: 'PriorityContext') -> float:  # pylint: disable=unused-argument
+    """Priority signal of crawl depth.
+
+    Args:
+        link: Link to be scored.
+        context: Context of the link.
+
+    Returns:
+        The crawl depth, c.f. :attr:`Link.depth <darc.link.Link.depth>`.
+
+    """
+    return link.depth
+
+
+def priority_host(link: 'Link', context: 'PriorityContext') -> float:  # pylint: disable=unused-argument
+    """Priority signal of known hosts.
+
+    Args:
+        link: Link to be scored.
+        context: Context of the link.
+
+    Returns:
+        ``1`` if the host is known to current process (c.f.
+        :func:`~darc.db.have_hostname`), ``0`` for new hosts.
+
+    """
+    return float(_cached_hostname(link.host))
+
+
+def priority_source(link: 'Link', context: 'PriorityContext') -> float:  # pylint: disable=unused-argument
+    """Priority signal of link sources.
+
+    Args:
+        link: Link to be scored.
+        context: Context of the link.
+
+    Returns:
+        Rank of the source of the link, c.f. :data:`~darc.db.LINK_SOURCES`;
+        ``0`` if the source is unknown.
+
+    """
+    if context.source is None:
+        return 0.0
+    return LINK_SOURCES.get(context.source, 0)
+
+
+def priority_failure(link: 'Link', context: 'PriorityContext') -> float:  # pylint: disable=unused-argument
+    """Priority signal of past failures.
+
+    Args:
+        link: Link to be scored.
+        context: Context of the link.
+
+    Returns:
+        Number of past failures, c.f. :func:`~darc.db.nack_requests`.
+
+    """
+    return context.failures
+
+
+register_priority('depth', priority_depth)
+register_priority('host', priority_host)
+register_priority('source', priority_source)
+register_priority('failure', priority_failure)
+
+
+def have_hostname(link: 'Link') -> 'Tuple[bool, bool]':
+    """Check if current link is a new host.
+
+    Args:
+        link: Link to check against.
+
+    Returns:
+        A tuple of two :obj:`bool` values representing
+        if such link is a known host and needs force
+        refetch respectively.
+
+    The answers are cached in process until the record of the host
+    expires (c.f. :data:`~darc.const.TIME_CACHE`), or for at most
+    :data:`~darc.db.HOSTNAME_TTL` seconds, so that only the first link
+    of each host in each window queries the backend. The cache holds at
+    most :data:`~darc.db.HOSTNAME_CACHE` hosts.
+
+    See Also:
+        * :func:`darc.db._have_hostname_db`
+        * :func:`darc.db._have_hostname_redis`
+
+    """
+    if _cached_hostname(link.host):
+        return True, False
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _have_hostname_db(link)
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_have_hostname_db({link.url})')
+                return False, False
+    return _have_hostname_redis(link)
+
+
+def _have_hostname_db(link: 'Link') -> 'Tuple[bool, bool]':
+    """Check if current link is a new host.
+
+    The function checks the :class:`~darc.models.tasks.hostname.HostnameQueueModel` table.
+
+    Args:
+        link: Link to check against.
+
+    Returns:
+        A tuple of two :obj:`bool` values representing
+        if such link is a known host and needs force
+        refetch respectively.
+
+    """
+    timestamp = datetime.now()
+    if TIME_CACHE is None:
+        threshold = math.inf
+    else:
+        threshold = (timestamp - TIME_CACHE).timestamp()
+
+    model, created = cast(
+        'Tuple[HostnameQueueModel, bool]',
+        _db_operation(HostnameQueueModel.get_or_create, hostname=link.host, defaults={
+            'timestamp': timestamp,
+        })
+    )
+    if created:
+        _cache_hostname(link.host, timestamp.timestamp())
+        return False, False
+
+    force_fetch = model.timestamp.timestamp() < threshold
+    if force_fetch:
+        # update database record (only if re-fetch)
+        model.timestamp = timestamp
+        _db_operation(model.save)
+    _cache_hostname(link.host, model.timestamp.timestamp())
+    return True, force_fetch
+
+
+def _have_hostname_redis(link: 'Link') -> 'Tuple[bool, bool]':
+    """Check if current link is a new host.
+
+    The function checks the ``queue_hostname`` database.
+
+    Args:
+        link: Link to check against.
+
+    Returns:
+        A tuple of two :obj:`bool` values representing
+        if such link is a known host and needs force
+        refetch respectively.
+
+    """
+    new_score = time.time()
+    if TIME_CACHE is None:
+        threshold = math.inf
+    else:
+        threshold = new_score - TIME_CACHE.total_seconds()
+
+    with _redis_get_lock('queue_hostname'):
+        score = _redis_command('zscore', 'queue_hostname', link.host)  # type: Optional[int]
+        if score is None:
+            have_flag = False
+            force_fetch = False
+
+            # update Redis record
+            redis_update = True
+        else:
+            have_flag = True
+            force_fetch = score < threshold
+
+            # update Redis record (only if re-fetch)
+            redis_update = force_fetch
+
+    if redis_update:
+        _redis_command('zadd', 'queue_hostname', {
+            link.host: new_score,
+        })
+        _cache_hostname(link.host, new_score)
+    else:
+        _cache_hostname(link.host, cast(float, score))
+    return have_flag, force_fetch
+
+
+def drop_hostname(link: 'Link') -> None:
+    """Remove link from the hostname database.
+
+    Args:
+        link: Link to be removed.
+
+    The host is also evicted from the in-process cache of
+    :func:`~darc.db.have_hostname`, so that it will be considered
+    as new when next encounter; other processes consider it as new
+    once their cached answers expire, i.e. within
+    :data:`~darc.db.HOSTNAME_TTL` seconds.
+
+    See Also:
+        * :func:`darc.db._drop_hostname_db`
+        * :func:`darc.db._drop_hostname_redis`
+
+    """
+    try:
+        if FLAG_DB:
+            with database.connection_context():
+                try:
+                    return _drop_hostname_db(link)
+                except Exception:
+                    logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_drop_hostname_db({link.url})')
+                    return None
+        return _drop_hostname_redis(link)
+    finally:
+        with _HOSTNAME_LOCK:
+            _HOSTNAME_CACHE.pop(link.host, None)
+
+
+def _drop_hostname_db(link: 'Link') -> None:
+    """Remove link from the hostname database.
+
+    The function updates the :class:`~darc.models.tasks.hostname.HostnameQueueModel` table.
+
+    Args:
+        link: Link to be removed.
+
+    """
+    model = _db_operation(HostnameQueueModel.get_or_none,
+                          HostnameQueueModel.hostname == link.host)  # type: HostnameQueueModel
+    if model is not None:
+        model.delete_instance()
+
+
+def _drop_hostname_redis(link: 'Link') -> None:
+    """Remove link from the hostname database.
+
+    The function updates the ``queue_hostname`` database.
+
+    Args:
+        link: Link to be removed.
+
+    """
+    with _redis_get_lock('queue_hostname'):
+        _redis_command('zrem', 'queue_hostname', link.host)
+
+
+def drop_requests(link: 'Link') -> None:  # pylint: disable=inconsistent-return-statements
+    """Remove link from the :mod:`requests` database.
+
+    Args:
+        link: Link to be removed.
+
+    See Also:
+        * :func:`darc.db._drop_requests_db`
+        * :func:`darc.db._drop_requests_redis`
+
+    """
+    buffer = _active_buffer()
+    if buffer is not None:
+        return buffer.drop('queue_requests', link)
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _drop_requests_db(link)
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_drop_requests_db({link.url})')
+                return None
+    return _drop_requests_redis(link)
+
+
+def _drop_requests_db(link: 'Link') -> None:
+    """Remove link from the :mod:`requests` database.
+
+    The function updates the :class:`~darc.model.tasks.requests.RequestsQueueModel` table.
+
+    Args:
+        link: Link to be removed.
+
+    """
+    model = _db_operation(RequestsQueueModel.get_or_none,
+                          RequestsQueueModel.text == link.url)  # type: RequestsQueueModel
+    if model is not None:
+        model.delete_instance()
+
+
+def _drop_requests_redis(link: 'Link') -> None:
+    """Remove link from the :mod:`requests` database.
+
+    The function updates the ``queue_requests`` database.
+
+    Args:
+        link: Link to be removed.
+
+    """
+    shard = shard_name(link)
+
+    def drop(pipeline: 'Pipeline') -> None:
+        pipeline.zrem(_shard_key('queue_requests', shard), link.name)
+        pipeline.hdel(_shard_key('lease_requests', shard), link.name)
+        pipeline.hdel(_shard_key('fails_requests', shard), link.name)
+        if REDIS_QUEUE == 'stream':
+            pipeline.hdel(_shard_key('entry_requests', shard), link.name)
+        _payload_delete(pipeline, _payload_prefix(shard), link.name)
+
+    with _redis_get_lock('queue_requests'):
+        _redis_pipeline(drop)
+    if OVERFLOW_HIGH > 0:
+        _overflow_drop('queue_requests', [link])
+
+
+def drop_selenium(link: 'Link') -> None:  # pylint: disable=inconsistent-return-statements
+    """Remove link from the :mod:`selenium` database.
+
+    Args:
+        link: Link to be removed.
+
+    See Also:
+        * :func:`darc.db._drop_selenium_db`
+        * :func:`darc.db._drop_selenium_redis`
+
+    """
+    buffer = _active_buffer()
+    if buffer is not None:
+        return buffer.drop('queue_selenium', link)
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _drop_selenium_db(link)
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_drop_selenium_db({link.url})')
+                return None
+    return _drop_selenium_redis(link)
+
+
+def _drop_selenium_db(link: 'Link') -> None:
+    """Remove link from the :mod:`selenium` database.
+
+    The function updates the :class:`~darc.model.tasks.selenium.SeleniumQueueModel` table.
+
+    Args:
+        link: Link to be removed.
+
+    """
+    model = _db_operation(SeleniumQueueModel.get_or_none,
+                          SeleniumQueueModel.text == link.url)  # type: SeleniumQueueModel
+    if model is not None:
+        model.delete_instance()
+
+
+def _drop_selenium_redis(link: 'Link') -> None:
+    """Remove link from the :mod:`selenium` database.
+
+    The function updates the ``queue_selenium`` database.
+
+    Args:
+        link: Link to be removed.
+
+    """
+    shard = shard_name(link)
+
+    def drop(pipeline: 'Pipeline') -> None:
+        pipeline.zrem(_shard_key('queue_selenium', shard), link.name)
+        pipeline.hdel(_shard_key('lease_selenium', shard), link.name)
+        pipeline.hdel(_shard_key('fails_selenium', shard), link.name)
+        if REDIS_QUEUE == 'stream':
+            pipeline.hdel(_shard_key('entry_selenium', shard), link.name)
+        _payload_delete(pipeline, _payload_prefix(shard), link.name)
+
+    with _redis_get_lock('queue_selenium'):
+        _redis_pipeline(drop)
+    if OVERFLOW_HIGH > 0:
+        _overflow_drop('queue_selenium', [link])
+
+
+def _redis_enqueue(key: 'Literal["queue_requests", "queue_selenium"]', pool: 'List[Link]',
+                   score: float, nx: bool = False, xx: bool = False,
+                   source: 'Optional[str]' = None) -> None:
+    """Enqueue links to a task queue in one round trip.
+
+    The function writes the serialised payloads (``SET NX``) and
+    the sorted set scores (``ZADD``) of ``pool`` through a single
+    Redis pipeline, c.f. :func:`~darc.db._redis_pipeline`. Links are
+    grouped by their shards (c.f. :func:`~darc.db.shard_name`), and
+    the shards are recorded in the shard registry of the task queue.
+
+    The numbers of links newly added are counted as pending throughput
+    counters, and flushed through the next pipeline, c.f.
+    :func:`~darc.db._redis_flush_stats`.
+
+    If :data:`~darc.db.OVERFLOW_HIGH` is positive, the sizes of the shards
+    are checked through the same pipeline, and shards above the watermark
+    are spilled to the overflow tier, c.f. :func:`~darc.db._overflow_spill`.
+
+    Args:
+        key: Name of the task queue.
+        pool: Links to be added to the task queue.
+        score: Score to for the Redis sorted set.
+        nx: Forces ``ZADD`` to only create new elements and not to
+            update scores for elements that already exist.
+        xx: Forces ``ZADD`` to only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    """
+    if not pool:
+        return
+
+    shards = {}  # type: Dict[Optional[str], List[Link]]
+    for link in pool:
+        shards.setdefault(shard_name(link), []).append(link)
+
+    context = PriorityContext(source=source)
+    pending = _pop_stats_pending()
+
+    def enqueue(pipeline: 'Pipeline') -> None:
+        _queue_stats_pending(pipeline, pending)
+        for shard, links in shards.items():
+            prefix = _payload_prefix(shard)
+            for link in links:
+                _payload_set(pipeline, prefix, link.name, dumps_link(link))
+            pipeline.zadd(_shard_key(key, shard), {
+                link.name: priority_score(link, score, context) for link in links
+            }, nx=nx, xx=xx)
+        if SHARD_NUM > 0:
+            pipeline.sadd(_registry_key(key), *shards)
+        if OVERFLOW_HIGH > 0:
+            for shard in shards:
+                pipeline.zcard(_shard_key(key, shard))
+
+    with _redis_get_lock(key):
+        values = _redis_pipeline(enqueue)
+
+    _count_enqueued(key, shards, pending, values)
+    if OVERFLOW_HIGH > 0:
+        for shard, size in zip(shards, values[-len(shards):]):
+            if size > OVERFLOW_HIGH:
+                _overflow_spill(key, shard, size)
+
+
+def _count_enqueued(key: 'Literal["queue_requests", "queue_selenium"]', shards: 'Dict[Optional[str], List[Link]]',
+                    pending: 'Dict[str, int]', values: 'List[Any]') -> None:
+    """Count newly added links as pending throughput counters.
+
+    Args:
+        key: Name of the task queue.
+        shards: Links enqueued, grouped by their shards.
+        pending: Pending counts flushed through the pipeline.
+        values: Values returned from the pipeline,
+            c.f. :func:`~darc.db._redis_enqueue`.
+
+    """
+    # count newly added links (i.e. ``ZADD`` replies)
+    minute = int(time.time() // 60)
+    index = len(pending) * 2
+    with _STATS_LOCK:
+        for shard, links in shards.items():
+            index += len(links) + 1
+            _STATS_PENDING[_stats_key(key, shard, minute)] += values[index - 1]
+
+
+@overload
+def save_requests(entries: 'Link', single: 'Literal[True]',
+                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                  source: 'Optional[str]' = None) -> None: ...
+@overload
+def save_requests(entries: 'List[Link]', single: 'Literal[False]' = False,
+                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                  source: 'Optional[str]' = None) -> None: ...
+def save_requests(entries: 'Union[Link, List[Link]]', single: bool = False,
+                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                  source: 'Optional[str]' = None) -> None:
+    """Save link to the :mod:`requests` database.
+
+    The function updates the ``queue_requests`` database.
+
+    Args:
+        entries: Links to be added to the :mod:`requests` database.
+            It can be either a :obj:`list` of links, or a single
+            link string (if ``single`` set as :data:`True`).
+        single: Indicate if ``entries`` is a :obj:`list` of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Only create new elements and not to
+            update scores for elements that already exist.
+        xx: Only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    Notes:
+        The ``entries`` will be dumped through :func:`~darc.link.dumps_link`
+        so that :mod:`darc` do not need to parse them again.
+
+    When ``entries`` is a list of :class:`~darc.link.Link` instances,
+    we tries to perform *bulk* update to easy the memory consumption.
+    The *bulk* size is defined by :data:`~darc.db.BULK_SIZE`.
+
+    If ``nx`` is set for a list of links, links seen before are dropped
+    through :func:`~darc.db.filter_seen` before being serialised, as
+    they will not be updated anyway.
+
+    See Also:
+        * :func:`darc.db.filter_seen`
+        * :func:`darc.db._save_requests_db`
+        * :func:`darc.db._save_requests_redis`
+
+    """
+    buffer = _active_buffer()
+    if buffer is not None:
+        pool = [entries] if single else entries  # type: List[Link]
+        return buffer.save('queue_requests', [link for link in pool if isinstance(link, Link)],
+                           time.time() if score is None else score, nx, xx, source)
+
+    if nx and not single:
+        entries = filter_seen(cast('List[Link]', entries))
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _save_requests_db(entries, single, score, nx, xx, source)  # type: ignore[call-overload]
+            except Exception:
+                _arg_msg = _gen_arg_msg(entries, single, score, nx, xx, source)
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed,
+                            line=f'_save_requests_db({_arg_msg})')
+                return None
+    return _save_requests_redis(entries, single, score, nx, xx, source)
+
+
+@overload
+def _save_requests_db(entries: 'Link', single: 'Literal[True]',
+                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                      source: 'Optional[str]' = None) -> None: ...
+@overload
+def _save_requests_db(entries: 'List[Link]', single: 'Literal[False]' = False,
+                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                      source: 'Optional[str]' = None) -> None: ...
+def _save_requests_db(entries: 'Union[Link, List[Link]]', single: bool = False,
+                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                      source: 'Optional[str]' = None) -> None:
+    """Save link to the :mod:`requests` database.
+
+    The function updates the :class:`~darc.model.tasks.requests.RequestsQueueModel` table.
+
+    Args:
+        entries: Links to be added to the :mod:`requests` database.
+            It can be either a :obj:`list` of links, or a single
+            link string (if ``single`` set as :data:`True`).
+        single: Indicate if ``entries`` is a :obj:`list` of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Only create new elements and not to
+            update scores for elements that already exist.
+        xx: Only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    """
+    if not entries:
+        return None
+    if score is None:
+        score = time.time()
+    context = PriorityContext(source=source)
+
+    if not single:
+        if TYPE_CHECKING:
+            entries = cast('List[Link]', entries)
+
+        if nx:
+            with _db_transaction():
+                count = 0
+                for batch in peewee.chunked(entries, BULK_SIZE):
+                    insert_many = [{
+                        'text': link.url,
+                        'hash': link.name,
+                        'link': link,
+                        'timestamp': _priority_timestamp(link, score, context),
+                        'shard': shard_name(link),
+                    } for link in batch]
+                    count += _db_operation(RequestsQueueModel
+                                           .insert_many(insert_many)
+                                           .on_conflict_ignore()
+                                           .as_rowcount()
+                                           .execute)
+                _db_count(RequestsQueueModel, 'enqueued', count)
+            return None
+
+        if xx:
+            with _db_transaction():
+                for batch in peewee.chunked(entries, BULK_SIZE):
+                    # group by timestamps, c.f. :func:`~darc.db.priority_score`
+                    batch_hash = {}  # type: Dict[datetime, List[str]]
+                    for link in batch:
+                        batch_hash.setdefault(_priority_timestamp(link, score, context), []).append(link.name)
+                    for timestamp, entries_hash in batch_hash.items():
+                        _db_operation(RequestsQueueModel
+                                      .update(timestamp=timestamp)
+                                      .where(cast('CharField', RequestsQueueModel.hash).in_(entries_hash))
+                                      .execute)
+            return None
+
+        with _db_transaction():
+            for batch in peewee.chunked(entries, BULK_SIZE):
+                replace_many = [{
+                    'text': link.url,
+                    'hash': link.name,
+                    'link': link,
+                    'timestamp': _priority_timestamp(link, score, context),
+                    'shard': shard_name(link),
+                } for link in batch]
+                _db_operation(RequestsQueueModel.replace_many(replace_many).execute)
+            _db_count(RequestsQueueModel, 'enqueued', len(entries))
+        return None
+
+    if TYPE_CHECKING:
+        entries = cast('Link', entries)
+
+    if nx:
+        _, created = _db_operation(RequestsQueueModel.get_or_create,
+                                   text=entries.url,
+                                   defaults={
+                                       'hash': entries.name,
+                                       'link': entries,
+                                       'timestamp': _priority_timestamp(entries, score, context),
+                                       'shard': shard_name(entries),
+                                   })
+        if created:
+            _db_count(RequestsQueueModel, 'enqueued', 1)
+        return None
+
+    if xx:
+        with contextlib.suppress(peewee.DoesNotExist):
+            model = _db_operation(RequestsQueueModel.get, RequestsQueueModel.text == entries.url)  # type: RequestsQueueModel # pylint: disable=line-too-long
+            model.timestamp = _priority_timestamp(entries, score, context)
+            _db_operation(model.save)
+        return None
+
+    _db_operation(RequestsQueueModel.replace(
+        text=entries.url,
+        hash=entries.name,
+        link=entries,
+        timestamp=_priority_timestamp(entries, score, context),
+        shard=shard_name(entries),
+    ).execute)
+    _db_count(RequestsQueueModel, 'enqueued', 1)
+    return None
+
+
+def _save_requests_redis(entries: 'Union[Link, List[Link]]', single: bool = False,
+                         score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                         source: 'Optional[str]' = None) -> None:
+    """Save link to the :mod:`requests` database.
+
+    The function updates the ``queue_requests`` database.
+
+    Args:
+        entries: Links to be added to the :mod:`requests` database.
+            It can be either a :obj:`list` of links, or a single
+            link string (if ``single`` set as :data:`True`).
+        single: Indicate if ``entries`` is a :obj:`list` of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Forces ``ZADD`` to only create new elements and not to
+            update scores for elements that already exist.
+        xx: Forces ``ZADD`` to only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    Each *bulk* of :data:`~darc.db.BULK_SIZE` links costs only one
+    network round trip, c.f. :func:`~darc.db._redis_enqueue`.
+
+    """
+    if score is None:
+        score = time.time()
+
+    if not single:
+        if TYPE_CHECKING:
+            entries = cast('List[Link]', entries)
+
+        for chunk in peewee.chunked(entries, BULK_SIZE):
+            pool = list(filter(lambda link: isinstance(link, Link), chunk))  # type: List[Link]
+            _redis_enqueue('queue_requests', pool, score, nx=nx, xx=xx, source=source)
+        return None
+
+    if TYPE_CHECKING:
+        entries = cast('Link', entries)
+
+    _redis_enqueue('queue_requests', [entries], score, nx=nx, xx=xx, source=source)
+    return None
+
+
+@overload
+def save_selenium(entries: 'Link', single: 'Literal[True]',
+                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                  source: 'Optional[str]' = None) -> None: ...
+@overload
+def save_selenium(entries: 'List[Link]', single: 'Literal[False]' = False,
+                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                  source: 'Optional[str]' = None) -> None: ...
+def save_selenium(entries: 'Union[Link, List[Link]]', single: bool = False,  # pylint: disable=inconsistent-return-statements
+                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                  source: 'Optional[str]' = None) -> None:
+    """Save link to the :mod:`selenium` database.
+
+    Args:
+        entries: Links to be added to the :mod:`selenium` database.
+            It can be either a :obj:`list` of links, or a single
+            link string (if ``single`` set as :data:`True`).
+        single: Indicate if ``entries`` is a :obj:`list` of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Only create new elements and not to
+            update scores for elements that already exist.
+        xx: Only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    Notes:
+        The ``entries`` will be dumped through :func:`~darc.link.dumps_link`
+        so that :mod:`darc` do not need to parse them again.
+
+    When ``entries`` is a list of :class:`~darc.link.Link` instances,
+    we tries to perform *bulk* update to easy the memory consumption.
+    The *bulk* size is defined by :data:`~darc.db.BULK_SIZE`.
+
+    See Also:
+        * :func:`darc.db._save_selenium_db`
+        * :func:`darc.db._save_selenium_redis`
+
+    """
+    buffer = _active_buffer()
+    if buffer is not None:
+        pool = [entries] if single else entries  # type: List[Link]
+        return buffer.save('queue_selenium', [link for link in pool if isinstance(link, Link)],
+                           time.time() if score is None else score, nx, xx, source)
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _save_selenium_db(entries, single, score, nx, xx, source)  # type: ignore[call-overload]
+            except Exception:
+                _arg_msg = _gen_arg_msg(entries, single, score, nx, xx, source)
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed,
+                            line=f'_save_selenium_db({_arg_msg})')
+                return None
+    return _save_selenium_redis(entries, single, score, nx, xx, source)
+
+
+@overload
+def _save_selenium_db(entries: 'Link', single: 'Literal[True]',
+                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                      source: 'Optional[str]' = None) -> None: ...
+@overload
+def _save_selenium_db(entries: 'List[Link]', single: 'Literal[False]' = False,
+                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                      source: 'Optional[str]' = None) -> None: ...
+def _save_selenium_db(entries: 'Union[Link, List[Link]]', single: bool = False,
+                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                      source: 'Optional[str]' = None) -> None:
+    """Save link to the :mod:`selenium` database.
+
+    The function updates the :class:`~darc.model.tasks.selenium.SeleniumQueueModel` table.
+
+    Args:
+        entries: Links to be added to the :mod:`selenium` database.
+            It can be either a :obj:`list` of links, or a single
+            link string (if ``single`` set as :data:`True`).
+        single: Indicate if ``entries`` is a :obj:`list` of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Only create new elements and not to
+            update scores for elements that already exist.
+        xx: Only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    """
+    if not entries:
+        return None
+    if score is None:
+        score = time.time()
+    context = PriorityContext(source=source)
+
+    if not single:
+        if TYPE_CHECKING:
+            entries = cast('List[Link]', entries)
+
+        if nx:
+            with _db_transaction():
+                count = 0
+                for batch in peewee.chunked(entries, BULK_SIZE):
+                    insert_many = [{
+                        'text': link.url,
+                        'hash': link.name,
+                        'link': link,
+                        'timestamp': _priority_timestamp(link, score, context),
+                        'shard': shard_name(link),
+                    } for link in batch]
+                    count += _db_operation(SeleniumQueueModel
+                                           .insert_many(insert_many)
+                                           .on_conflict_ignore()
+                                           .as_rowcount()
+                                           .execute)
+                _db_count(SeleniumQueueModel, 'enqueued', count)
+            return None
+
+        if xx:
+            with _db_transaction():
+                for batch in peewee.chunked(entries, BULK_SIZE):
+                    # group by timestamps, c.f. :func:`~darc.db.priority_score`
+                    batch_hash = {}  # type: Dict[datetime, List[str]]
+                    for link in batch:
+                        batch_hash.setdefault(_priority_timestamp(link, score, context), []).append(link.name)
+                    for timestamp, entries_hash in batch_hash.items():
+                        _db_operation(SeleniumQueueModel
+                                      .update(timestamp=timestamp)
+                                      .where(cast('CharField', SeleniumQueueModel.hash).in_(entries_hash))
+                                      .execute)
+            return None
+
+        with _db_transaction():
+            for batch in peewee.chunked(entries, BULK_SIZE):
+                replace_many = [{
+                    'text': link.url,
+                    'hash': link.name,
+                    'link': link,
+                    'timestamp': _priority_timestamp(link, score, context),
+                    'shard': shard_name(link),
+                } for link in batch]
+                _db_operation(SeleniumQueueModel.replace_many(replace_many).execute)
+            _db_count(SeleniumQueueModel, 'enqueued', len(entries))
+        return None
+
+    if TYPE_CHECKING:
+        entries = cast('Link', entries)
+
+    if nx:
+        _, created = _db_operation(SeleniumQueueModel.get_or_create,
+                                   text=entries.url,
+                                   defaults={
+                                       'hash': entries.name,
+                                       'link': entries,
+                                       'timestamp': _priority_timestamp(entries, score, context),
+                                       'shard': shard_name(entries),
+                                   })
+        if created:
+            _db_count(SeleniumQueueModel, 'enqueued', 1)
+        return None
+
+    if xx:
+        with contextlib.suppress(peewee.DoesNotExist):
+            model = _db_operation(SeleniumQueueModel.get, SeleniumQueueModel.text == entries.url)  # type: SeleniumQueueModel # pylint: disable=line-too-long
+            model.timestamp = _priority_timestamp(entries, score, context)
+            _db_operation(model.save)
+        return None
+
+    _db_operation(SeleniumQueueModel.replace(
+        text=entries.url,
+        hash=entries.name,
+        link=entries,
+        timestamp=_priority_timestamp(entries, score, context),
+        shard=shard_name(entries),
+    ).execute)
+    _db_count(SeleniumQueueModel, 'enqueued', 1)
+    return None
+
+
+def _save_selenium_redis(entries: 'Union[Link, List[Link]]', single: bool = False,
+                         score: 'Optional[float]' = None, nx: bool = False, xx: bool = False,
+                         source: 'Optional[str]' = None) -> None:
+    """Save link to the :mod:`selenium` database.
+
+    The function updates the ``queue_selenium`` database.
+
+    Args:
+        entries: Links to be added to the :mod:`selenium` database.
+            It can be either an *iterable* of links, or a single
+            link string (if ``single`` set as :data:`True`).
+        single: Indicate if ``entries`` is an *iterable* of links
+            or a single link string.
+        score: Score to for the Redis sorted set.
+        nx: Forces ``ZADD`` to only create new elements and not to
+            update scores for elements that already exist.
+        xx: Forces ``ZADD`` to only update scores of elements that
+            already exist. New elements will not be added.
+        source: Source of the links for priority scoring,
+            c.f. :data:`~darc.db.LINK_SOURCES`.
+
+    When ``entries`` is a list of :class:`~darc.link.Link` instances,
+    we tries to perform *bulk* update to easy the memory consumption.
+    The *bulk* size is defined by :data:`~darc.db.BULK_SIZE`.
+
+    Each *bulk* costs only one network round trip, c.f.
+    :func:`~darc.db._redis_enqueue`.
+
+    Notes:
+        The ``entries`` will be dumped through :func:`~darc.link.dumps_link`
+        so that :mod:`darc` do not need to parse them again.
+
+    """
+    if not entries:
+        return None
+    if score is None:
+        score = time.time()
+
+    if not single:
+        if TYPE_CHECKING:
+            entries = cast('List[Link]', entries)
+
+        for chunk in peewee.chunked(entries, BULK_SIZE):
+            pool = list(filter(lambda link: isinstance(link, Link), chunk))  # type: List[Link]
+            _redis_enqueue('queue_selenium', pool, score, nx=nx, xx=xx, source=source)
+        return None
+
+    if TYPE_CHECKING:
+        entries = cast('Link', entries)
+
+    _redis_enqueue('queue_selenium', [entries], score, nx=nx, xx=xx, source=source)
+    return None
+
+
+def _redis_claim(key: 'Literal["queue_requests", "queue_selenium"]') -> 'List[Link]':
+    """Claim a batch of due links from a task queue.
+
+    The function selects, leases and fetches the payloads of due
+    links in one atomic call, c.f. :data:`~darc.db._REDIS_CLAIM_SCRIPT`,
+    thus no Redis lock is required.
+
+    Payloads in the legacy :mod:`pickle` format are re-encoded through
+    :func:`~darc.link.dumps_link` upon claimed, so that existing task
+    queues migrate gradually.
+
+    Claimed links are leased to :func:`~darc.db.worker_id` for
+    :data:`~darc.db.LEASE_TIMEOUT` seconds, during which they are
+    invisible to other workers, until acknowledged, c.f.
+    :func:`~darc.db.ack_requests` and :func:`~darc.db.nack_requests`.
+    Links of expired leases will be claimed again.
+
+    If :data:`~darc.db.REDIS_QUEUE` is ``stream``, due links are promoted
+    from the sorted set (as the delay index) to a Redis stream, and
+    claimed through its consumer group, c.f. :data:`~darc.db._REDIS_STREAM_SCRIPT`;
+    entries pending with dead consumers for :data:`~darc.db.LEASE_TIMEOUT`
+    seconds are auto-claimed. Polite claiming is not supported then.
+
+    If sharding is enabled, the function claims from the subscribed
+    shards in the order given by :func:`~darc.db._redis_order_shards`,
+    until :data:`~darc.db.MAX_POOL` links are claimed or all subscribed
+    shards are drained.
+
+    If :data:`~darc.db.HOST_LIMIT` or :data:`~darc.db.HOST_DELAY` is set,
+    at most :data:`~darc.db.HOST_LIMIT` links are claimed per host, from
+    hosts not cooling down in the ``ready_requests`` (or ``ready_selenium``)
+    sorted set; the claimed links are then interleaved by their hosts,
+    c.f. :func:`~darc.db._interleave_hosts`.
+
+    Args:
+        key: Name of the task queue.
+
+    Returns:
+        List of claimed links from the task queue.
+
+    Note:
+        At runtime, the function will load links with maximum number
+        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+
+    """
+    _redis_flush_stats()
+    if SHARD_NUM <= 0:
+        return _interleave_hosts(_redis_claim_shard(key, None, MAX_POOL))
+
+    link_pool = []  # type: List[Link]
+    for shard in _redis_order_shards(key):
+        link_pool.extend(_redis_claim_shard(key, shard, MAX_POOL - len(link_pool)))
+        if len(link_pool) >= MAX_POOL:
+            break
+    return _interleave_hosts(link_pool)
+
+
+def _redis_claim_shard(key: 'Literal["queue_requests", "queue_selenium"]',
+                       shard: 'Optional[str]', limit: float) -> 'List[Link]':
+    """Claim a batch of due links from a shard of a task queue.
+
+    If :data:`~darc.db.OVERFLOW_HIGH` is positive, the shard is refilled
+    from the overflow tier as needed, and claimed again should the claim
+    fall short, c.f. :func:`~darc.db._overflow_refill`.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        limit: Maximum number of links to claim.
+
+    Returns:
+        List of claimed links from the shard.
+
+    """
+    link_pool = _redis_claim_once(key, shard, limit)
+    if OVERFLOW_HIGH > 0 and _overflow_refill(key, shard, limit - len(link_pool)) > 0 and len(link_pool) < limit:
+        link_pool.extend(_redis_claim_once(key, shard, limit - len(link_pool)))
+    return link_pool
+
+
+def _redis_claim_once(key: 'Literal["queue_requests", "queue_selenium"]',
+                      shard: 'Optional[str]', limit: float) -> 'List[Link]':
+    """Claim a batch of due links from a shard of a task queue in Redis.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        limit: Maximum number of links to claim.
+
+    Returns:
+        List of claimed links from the shard.
+
+    """
+    if REDIS_QUEUE == 'stream':
+        _stream_group(_stream_key(_shard_key(key, shard)))
+        temp_pool = _redis_script('stream', *_stream_params(key, shard, limit))  # type: List[bytes]
+    else:
+        temp_pool = _redis_script('claim', *_claim_params(key, shard, limit))
+    link_pool = [loads_link(link) for link in temp_pool]
+
+    # re-encode legacy (pickled) payloads
+    legacy_pool = _claim_legacy(temp_pool, link_pool)
+    if legacy_pool:
+        def reencode(pipeline: 'Pipeline') -> None:
+            for link in legacy_pool:
+                _payload_set(pipeline, _payload_prefix(shard), link.name, dumps_link(link), xx=True)
+        _redis_pipeline(reencode)
+    return link_pool
+
+
+def _claim_params(key: 'Literal["queue_requests", "queue_selenium"]',
+                  shard: 'Optional[str]', limit: float) -> 'Tuple[List[str], List[Any]]':
+    """Parameters to claim a batch of due links from a shard.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        limit: Maximum number of links to claim.
+
+    Returns:
+        ``KEYS`` and ``ARGV`` of :data:`~darc.db._REDIS_CLAIM_SCRIPT`.
+
+    """
+    now = time.time()
+    if TIME_CACHE is None:
+        sec_delta = 0  # type: float
+    else:
+        sec_delta = TIME_CACHE.total_seconds()
+    max_score = now - sec_delta
+    new_score = now + LEASE_TIMEOUT - sec_delta
+
+    queue = _shard_key(key, shard)
+    return ([queue, _lease_key(queue), _stats_key(key, shard, int(now // 60)), _ready_key(queue),
+             _payload_prefix(shard)],
+            [max_score, limit if math.isfinite(limit) else -1,
+             new_score, worker_id(), STATS_TTL,
+             HOST_LIMIT, HOST_DELAY, now, HOST_SCAN if math.isfinite(HOST_SCAN) else -1])
+
+
+def _stream_params(key: 'Literal["queue_requests", "queue_selenium"]',
+                   shard: 'Optional[str]', limit: float) -> 'Tuple[List[str], List[Any]]':
+    """Parameters to claim a batch of links from a stream backed shard.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        limit: Maximum number of links to claim.
+
+    Returns:
+        ``KEYS`` and ``ARGV`` of :data:`~darc.db._REDIS_STREAM_SCRIPT`.
+
+    """
+    now = time.time()
+    if TIME_CACHE is None:
+        max_score = now
+    else:
+        max_score = now - TIME_CACHE.total_seconds()
+
+    queue = _shard_key(key, shard)
+    return ([queue, _lease_key(queue), _stats_key(key, shard, int(now // 60)), _stream_key(queue), _entry_key(queue),
+             _payload_prefix(shard)],
+            [max_score, limit if math.isfinite(limit) else STREAM_PROMOTE,
+             worker_id(), STATS_TTL,
+             STREAM_GROUP, int(LEASE_TIMEOUT * 1_000), STREAM_PROMOTE])
+
+
+def _interleave_hosts(link_pool: 'List[Link]') -> 'List[Link]':
+    """Interleave claimed links by their hosts.
+
+    Args:
+        link_pool: Claimed links.
+
+    Returns:
+        Claimed links in round-robin order of their hosts, such
+        that links of the same host are not fetched back to back;
+        ``link_pool`` as is if polite claiming is disabled.
+
+    """
+    if HOST_LIMIT <= 0 and HOST_DELAY <= 0:
+        return link_pool
+
+    hosts = collections.OrderedDict()  # type: OrderedDict[Optional[str], List[Link]]
+    for link in link_pool:
+        hosts.setdefault(link.host, []).append(link)
+    rounds = itertools.zip_longest(*hosts.values())
+    return [link for batch in rounds for link in batch if link is not None]
+
+
+def _claim_legacy(temp_pool: 'List[bytes]', link_pool: 'List[Link]') -> 'List[Link]':
+    """Select claimed links of legacy (pickled) payloads.
+
+    Args:
+        temp_pool: Payloads returned from :data:`~darc.db._REDIS_CLAIM_SCRIPT`.
+        link_pool: Links loaded from ``temp_pool``.
+
+    Returns:
+        Links to be re-encoded through :func:`~darc.link.dumps_link`.
+
+    """
+    return [link for data, link in zip(temp_pool, link_pool) if not data.startswith(LINK_MAGIC)]
+
+
+def _db_claim(model: 'Union[Type[RequestsQueueModel], Type[SeleniumQueueModel]]') -> 'List[Link]':
+    """Claim a batch of due records from a task queue table.
+
+    The function selects and leases the due records to
+    :func:`~darc.db.worker_id` for :data:`~darc.db.LEASE_TIMEOUT`
+    seconds, such that concurrent workers never claim the same
+    records:
+
+    * if the database supports ``RETURNING`` (e.g. PostgreSQL), the
+      records are claimed in one ``UPDATE ... WHERE id IN (SELECT ...
+      FOR UPDATE SKIP LOCKED) RETURNING`` statement;
+    * otherwise, the records are selected with ``FOR UPDATE SKIP LOCKED``
+      (e.g. MySQL 8) and updated in the same transaction;
+    * for SQLite, which locks the whole database instead of rows, the
+      transaction is started as ``IMMEDIATE`` to serialise the claims.
+
+    If :data:`~darc.db.HOST_LIMIT` or :data:`~darc.db.HOST_DELAY` is set,
+    up to :data:`~darc.db.HOST_SCAN` due records are selected and filtered
+    through :func:`~darc.db._db_polite` within the transaction.
+
+    Args:
+        model: Task queue table.
+
+    Returns:
+        List of claimed links from the table.
+
+    Note:
+        At runtime, the function will load links with maximum number
+        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+
+    """
+    now = datetime.now()
+    if TIME_CACHE is None:
+        sec_delta = timedelta(seconds=0)
+    else:
+        sec_delta = TIME_CACHE
+    max_score = now - sec_delta
+    new_score = now + timedelta(seconds=LEASE_TIMEOUT) - sec_delta
+
+    polite = HOST_LIMIT > 0 or HOST_DELAY > 0
+    query = (model
+             .select(model.id, model.link)
+             .where((model.timestamp <= max_score) & _db_shard_filter(model))
+             .order_by(model.timestamp))
+    limit = HOST_SCAN if polite else MAX_POOL
+    if math.isfinite(limit):
+        query = query.limit(limit)
+    if database.for_update:
+        query = query.for_update('FOR UPDATE SKIP LOCKED')
+
+    if database.returning_clause and not polite:
+        claim = (model
+                 .update(timestamp=new_score, lease=worker_id())
+                 .where(cast('peewee.AutoField', model.id).in_(query.select(model.id)))
+                 .returning(model.link))
+        link_pool = [record.link for record in _db_operation(claim.execute)]
+        _db_count(model, 'claimed', len(link_pool))
+        return link_pool
+
+    with _db_transaction():
+        records = list(_db_operation(query.execute))  # type: List[Union[RequestsQueueModel, SeleniumQueueModel]]
+        if polite:
+            records = _db_polite(model, records, now)
+        if records:
+            _db_operation(model
+                          .update(timestamp=new_score, lease=worker_id())
+                          .where(cast('peewee.AutoField', model.id).in_([record.id for record in records]))
+                          .execute)
+        _db_count(model, 'claimed', len(records))
+    return _interleave_hosts([record.link for record in records])
+
+
+def _db_polite(model: 'Union[Type[RequestsQueueModel], Type[SeleniumQueueModel]]',
+               records: 'List[Union[RequestsQueueModel, SeleniumQueueModel]]',
+               now: 'datetime') -> 'List[Union[RequestsQueueModel, SeleniumQueueModel]]':
+    """Filter due records for a polite claim.
+
+    The function selects at most :data:`~darc.db.HOST_LIMIT` records per
+    host (and :data:`~darc.db.MAX_POOL` in total), skipping hosts cooling
+    down in the :class:`~darc.model.tasks.ready.HostReadyModel` table. The
+    claimed hosts then cool down for :data:`~darc.db.HOST_DELAY` seconds
+    per record claimed.
+
+    Args:
+        model: Task queue table.
+        records: Due records in claiming order.
+        now: Current time.
+
+    Returns:
+        Records to be claimed.
+
+    """
+    key = _DB_QUEUE[model]
+    _db_operation(HostReadyModel
+                  .delete()
+                  .where((HostReadyModel.queue == key) & (HostReadyModel.timestamp <= now))
+                  .execute)
+    cooling = {hostname for hostname, in _db_operation(HostReadyModel
+                                                       .select(HostReadyModel.hostname)
+                                                       .where(HostReadyModel.queue == key)
+                                                       .tuples()
+                                                       .execute)}
+
+    counts = collections.Counter()  # type: Counter[str]
+    selected = []  # type: List[Union[RequestsQueueModel, SeleniumQueueModel]]
+    for record in records:
+        if len(selected) >= MAX_POOL:
+            break
+        host = record.link.host or ''
+        if host in cooling or 0 < HOST_LIMIT <= counts[host]:
+            continue
+        counts[host] += 1
+        selected.append(record)
+
+    if HOST_DELAY > 0 and counts:
+        query = HostReadyModel.insert_many([
+            {'queue': key, 'hostname': host, 'timestamp': now + timedelta(seconds=HOST_DELAY * count)}
+            for host, count in counts.items()
+        ])
+        if isinstance(database, peewee.MySQLDatabase):
+            query = query.on_conflict(preserve=[HostReadyModel.timestamp])
+        else:
+            query = query.on_conflict(conflict_target=[HostReadyModel.queue, HostReadyModel.hostname],
+                                      preserve=[HostReadyModel.timestamp])
+        _db_operation(query.execute)
+    return selected
+
+
+def load_requests(check: bool = CHECK) -> 'List[Link]':
+    """Load link from the :mod:`requests` database.
+
+    Args:
+        check: If perform checks on loaded links,
+            default to :data:`~darc.const.CHECK`.
+
+    Returns:
+        List of loaded links from the :mod:`requests` database.
+
+    Note:
+        At runtime, the function will load links with maximum number
+        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+
+        While the circuit of the backend is open (c.f. :func:`~darc.db.circuit_breaker`),
+        no link is claimed, so that workers back off from the backend.
+
+    See Also:
+        * :func:`darc.db._load_requests_db`
+        * :func:`darc.db._load_requests_redis`
+
+    """
+    if circuit_breaker().is_open():
+        logger.warning('[REQUESTS] Circuit open, pause claiming')
+        return []
+
+    if FLAG_DB:
+        with database.connection_context():
             try:
-                return _drop_selenium_db(link)
+                link_pool = _load_requests_db()
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line='_load_requests_db()')
+                link_pool = []
+    else:
+        link_pool = _load_requests_redis()
+
+    if check:
+        link_pool = _check(link_pool)
+
+    logger.plog(LOG_VERBOSE, '-*- [REQUESTS] LINK POOL -*-',
+                object=sorted(link.url for link in link_pool))
+    return link_pool
+
+
+def _load_requests_db() -> 'List[Link]':
+    """Load link from the :mod:`requests` database.
+
+    The function claims a batch of records from the
+    :class:`~darc.model.tasks.requests.RequestsQueueModel` table,
+    c.f. :func:`~darc.db._db_claim`.
+
+    Returns:
+        List of loaded links from the :mod:`requests` database.
+
+    Note:
+        At runtime, the function will load links with maximum number
+        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+
+    """
+    return _db_claim(RequestsQueueModel)
+
+
+def _load_requests_redis() -> 'List[Link]':
+    """Load link from the :mod:`requests` database.
+
+    The function claims a batch of links from the ``queue_requests``
+    database in one round trip, c.f. :func:`~darc.db._redis_claim`.
+
+    Returns:
+        List of loaded links from the :mod:`requests` database.
+
+    Note:
+        At runtime, the function will load links with maximum number
+        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+
+    """
+    return _redis_claim('queue_requests')
+
+
+def load_selenium(check: bool = CHECK) -> 'List[Link]':
+    """Load link from the :mod:`selenium` database.
+
+    Args:
+        check: If perform checks on loaded links,
+            default to :data:`~darc.const.CHECK`.
+
+    Returns:
+        List of loaded links from the :mod:`selenium` database.
+
+    Note:
+        At runtime, the function will load links with maximum number
+        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+
+        While the circuit of the backend is open (c.f. :func:`~darc.db.circuit_breaker`),
+        no link is claimed, so that workers back off from the backend.
+
+    See Also:
+        * :func:`darc.db._load_selenium_db`
+        * :func:`darc.db._load_selenium_redis`
+
+    """
+    if circuit_breaker().is_open():
+        logger.warning('[SELENIUM] Circuit open, pause claiming')
+        return []
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                link_pool = _load_selenium_db()
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line='_load_selenium_db()')
+                link_pool = []
+    else:
+        link_pool = _load_selenium_redis()
+
+    if check:
+        link_pool = _check(link_pool)
+
+    logger.plog(LOG_VERBOSE, '-*- [SELENIUM] LINK POOL -*-',
+                object=sorted(link.url for link in link_pool))
+    return link_pool
+
+
+def _load_selenium_db() -> 'List[Link]':
+    """Load link from the :mod:`selenium` database.
+
+    The function claims a batch of records from the
+    :class:`~darc.model.tasks.selenium.SeleniumQueueModel` table,
+    c.f. :func:`~darc.db._db_claim`.
+
+    Returns:
+        List of loaded links from the :mod:`selenium` database.
+
+    Note:
+        At runtime, the function will load links with maximum number
+        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+
+    """
+    return _db_claim(SeleniumQueueModel)
+
+
+def _load_selenium_redis() -> 'List[Link]':
+    """Load link from the :mod:`selenium` database.
+
+    The function claims a batch of links from the ``queue_selenium``
+    database in one round trip, c.f. :func:`~darc.db._redis_claim`.
+
+    Returns:
+        List of loaded links from the :mod:`selenium` database.
+
+    Note:
+        At runtime, the function will load links with maximum number
+        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+
+    """
+    return _redis_claim('queue_selenium')
+
+
+def _release_score(delay: 'Optional[float]' = None) -> float:
+    """Score of a link released from its lease.
+
+    Args:
+        delay: Seconds before the link is due again. If :data:`None`,
+            the link is due after :data:`~darc.const.TIME_CACHE`.
+
+    Returns:
+        Timestamp score for the task queue.
+
+    """
+    now = time.time()
+    if delay is None:
+        return now
+    # links are claimed once due for TIME_CACHE, c.f. :func:`~darc.db.load_requests`
+    if TIME_CACHE is None:
+        return now + delay
+    return now + delay - TIME_CACHE.total_seconds()
+
+
+def _release_db(model: 'Union[Type[RequestsQueueModel], Type[SeleniumQueueModel]]',
+                link: 'Link', score: float, failed: bool = False,
+                worker: 'Optional[str]' = None) -> bool:
+    """Release the lease of a link.
+
+    The function updates the given table, only if the lease of ``link``
+    is still held by current worker, c.f. :func:`~darc.db.worker_id`.
+
+    Args:
+        model: Task queue table.
+        link: Link to be released.
+        score: Score to reschedule the link.
+        failed: If the link failed to be processed, i.e. its failure
+            counter is increased, otherwise reset.
+        worker: Worker ID holding the lease, c.f. :func:`~darc.db.worker_id`.
+
+    Returns:
+        If the lease was released.
+
+    """
+    failures = 0
+    if failed and PRIORITY:
+        record = _db_operation(model.select(model.failures).where(model.hash == link.name).first)  # type: Optional[Union[RequestsQueueModel, SeleniumQueueModel]] # pylint: disable=line-too-long
+        failures = (0 if record is None else record.failures) + 1
+    timestamp = _priority_timestamp(link, score, PriorityContext(failures=failures))
+    return bool(_db_operation(model
+                              .update(timestamp=timestamp, lease=None,
+                                      failures=model.failures + 1 if failed and not PRIORITY else failures)
+                              .where((model.hash == link.name) & (model.lease == (worker or worker_id())))
+                              .execute))
+
+
+def _release_redis(key: 'Literal["queue_requests", "queue_selenium"]', link: 'Link',
+                   score: float, failed: bool = False) -> bool:
+    """Release the lease of a link.
+
+    The function updates the shard of ``link`` in the given task queue,
+    only if the lease of ``link`` is still held by current worker, c.f.
+    :data:`~darc.db._REDIS_RELEASE_SCRIPT`.
+
+    Args:
+        key: Name of the task queue.
+        link: Link to be released.
+        score: Score to reschedule the link.
+        failed: If the link failed to be processed, i.e. its failure
+            counter is increased, otherwise reset.
+
+    Returns:
+        If the lease was released.
+
+    Note:
+        The failure counters are only maintained if :data:`~darc.db.PRIORITY`
+        is enabled, and are increased even if the lease had expired.
+
+    """
+    failures = 0
+    if failed and PRIORITY:
+        failures = _redis_command('hincrby', _failure_key(_shard_key(key, shard_name(link))), link.name, 1)
+    return bool(_redis_script('release', *_release_params(key, link, score, failures, failed)))
+
+
+def _release_params(key: 'Literal["queue_requests", "queue_selenium"]', link: 'Link',
+                    score: float, failures: int, failed: bool,
+                    worker: 'Optional[str]' = None) -> 'Tuple[List[str], List[Any]]':
+    """Parameters to release the lease of a link.
+
+    Args:
+        key: Name of the task queue.
+        link: Link to be released.
+        score: Score to reschedule the link.
+        failures: Number of past failures of the link.
+        failed: If the link failed to be processed.
+        worker: Worker ID holding the lease, c.f. :func:`~darc.db.worker_id`.
+
+    Returns:
+        ``KEYS`` and ``ARGV`` of :data:`~darc.db._REDIS_RELEASE_SCRIPT`.
+
+    """
+    queue = _shard_key(key, shard_name(link))
+    score = priority_score(link, score, PriorityContext(failures=failures))
+    if REDIS_QUEUE == 'stream':
+        return ([queue, _lease_key(queue), _failure_key(queue), _stream_key(queue), _entry_key(queue)],
+                [link.name, worker or worker_id(), score, int(not failed), STREAM_GROUP])
+    return ([queue, _lease_key(queue), _failure_key(queue)],
+            [link.name, worker or worker_id(), score, int(not failed)])
+
+
+def ack_requests(link: 'Link') -> bool:
+    """Acknowledge a link claimed from the :mod:`requests` database.
+
+    The link has been processed and will be due again after
+    :data:`~darc.const.TIME_CACHE`.
+
+    Args:
+        link: Link to be acknowledged.
+
+    Returns:
+        If the lease was released, i.e. it had not expired and
+        been reclaimed by another worker.
+
+    See Also:
+        * :func:`darc.db._release_db`
+        * :func:`darc.db._release_redis`
+
+    """
+    buffer = _active_buffer()
+    if buffer is not None:
+        buffer.release('queue_requests', link, _release_score())
+        return True
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _release_db(RequestsQueueModel, link, _release_score())
             except Exception:
-                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_drop_selenium_db({link.url})')
-                return None
-    return _drop_selenium_redis(link)
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'ack_requests({link.url})')
+                return False
+    return _release_redis('queue_requests', link, _release_score())
 
 
-def _drop_selenium_db(link: 'Link') -> None:
-    """Remove link from the :mod:`selenium` database.
+def nack_requests(link: 'Link', delay: 'Optional[float]' = None) -> bool:
+    """Negatively acknowledge a link claimed from the :mod:`requests` database.
 
-    The function updates the :class:`~darc.model.tasks.selenium.SeleniumQueueModel` table.
+    The link failed to be processed and will be retried after ``delay``.
 
     Args:
-        link: Link to be removed.
+        link: Link to be negatively acknowledged.
+        delay: Seconds before the link is due again. If :data:`None`,
+            the link is due after :data:`~darc.const.TIME_CACHE`.
+
+    Returns:
+        If the lease was released, i.e. it had not expired and
+        been reclaimed by another worker.
+
+    See Also:
+        * :func:`darc.db._release_db`
+        * :func:`darc.db._release_redis`
 
     """
-    model = _db_operation(SeleniumQueueModel.get_or_none,
-                          SeleniumQueueModel.text == link.url)  # type: SeleniumQueueModel
-    if model is not None:
-        model.delete_instance()
+    buffer = _active_buffer()
+    if buffer is not None:
+        buffer.release('queue_requests', link, _release_score(delay), failed=True)
+        return True
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _release_db(RequestsQueueModel, link, _release_score(delay), failed=True)
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'nack_requests({link.url})')
+                return False
+    return _release_redis('queue_requests', link, _release_score(delay), failed=True)
 
 
-def _drop_selenium_redis(link: 'Link') -> None:
-    """Remove link from the :mod:`selenium` database.
+def ack_selenium(link: 'Link') -> bool:
+    """Acknowledge a link claimed from the :mod:`selenium` database.
 
-    The function updates the ``queue_selenium`` database.
+    The link has been processed and will be due again after
+    :data:`~darc.const.TIME_CACHE`.
 
     Args:
-        link: Link to be removed.
+        link: Link to be acknowledged.
+
+    Returns:
+        If the lease was released, i.e. it had not expired and
+        been reclaimed by another worker.
+
+    See Also:
+        * :func:`darc.db._release_db`
+        * :func:`darc.db._release_redis`
 
     """
-    with _redis_get_lock('queue_selenium'):
-        _redis_command('zrem', 'queue_selenium', link.name)
-    _redis_command('delete', link.name)
+    buffer = _active_buffer()
+    if buffer is not None:
+        buffer.release('queue_selenium', link, _release_score())
+        return True
+
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _release_db(SeleniumQueueModel, link, _release_score())
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'ack_selenium({link.url})')
+                return False
+    return _release_redis('queue_selenium', link, _release_score())
 
 
-@overload
-def save_requests(entries: 'Link', single: 'Literal[True]',
-                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None: ...
-@overload
-def save_requests(entries: 'List[Link]', single: 'Literal[False]' = False,
-                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None: ...
-def save_requests(entries: 'Union[Link, List[Link]]', single: bool = False,
-                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None:
-    """Save link to the :mod:`requests` database.
+def nack_selenium(link: 'Link', delay: 'Optional[float]' = None) -> bool:
+    """Negatively acknowledge a link claimed from the :mod:`selenium` database.
 
-    The function updates the ``queue_requests`` database.
+    The link failed to be processed and will be retried after ``delay``.
 
     Args:
-        entries: Links to be added to the :mod:`requests` database.
-            It can be either a :obj:`list` of links, or a single
-            link string (if ``single`` set as :data:`True`).
-        single: Indicate if ``entries`` is a :obj:`list` of links
-            or a single link string.
-        score: Score to for the Redis sorted set.
-        nx: Only create new elements and not to
-            update scores for elements that already exist.
-        xx: Only update scores of elements that
-            already exist. New elements will not be added.
-
-    Notes:
-        The ``entries`` will be dumped through :mod:`pickle` so that
-        :mod:`darc` do not need to parse them again.
+        link: Link to be negatively acknowledged.
+        delay: Seconds before the link is due again. If :data:`None`,
+            the link is due after :data:`~darc.const.TIME_CACHE`.
 
-    When ``entries`` is a list of :class:`~darc.link.Link` instances,
-    we tries to perform *bulk* update to easy the memory consumption.
-    The *bulk* size is defined by :data:`~darc.db.BULK_SIZE`.
+    Returns:
+        If the lease was released, i.e. it had not expired and
+        been reclaimed by another worker.
 
     See Also:
-        * :func:`darc.db._save_requests_db`
-        * :func:`darc.db._save_requests_redis`
+        * :func:`darc.db._release_db`
+        * :func:`darc.db._release_redis`
 
     """
+    buffer = _active_buffer()
+    if buffer is not None:
+        buffer.release('queue_selenium', link, _release_score(delay), failed=True)
+        return True
+
     if FLAG_DB:
         with database.connection_context():
             try:
-                return _save_requests_db(entries, single, score, nx, xx)  # type: ignore[call-overload]
+                return _release_db(SeleniumQueueModel, link, _release_score(delay), failed=True)
             except Exception:
-                _arg_msg = _gen_arg_msg(entries, single, score, nx, xx)
-                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed,
-                            line=f'_save_requests_db({_arg_msg})')
-                return None
-    return _save_requests_redis(entries, single, score, nx, xx)
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'nack_selenium({link.url})')
+                return False
+    return _release_redis('queue_selenium', link, _release_score(delay), failed=True)
 
 
-@overload
-def _save_requests_db(entries: 'Link', single: 'Literal[True]',
-                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None: ...
-@overload
-def _save_requests_db(entries: 'List[Link]', single: 'Literal[False]' = False,
-                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None: ...
-def _save_requests_db(entries: 'Union[Link, List[Link]]', single: bool = False,
-                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None:
-    """Save link to the :mod:`requests` database.
+@dataclasses.dataclass
+class _BufferedWrite:
+    """Coalesced writes of a link to a task queue."""
 
-    The function updates the :class:`~darc.model.tasks.requests.RequestsQueueModel` table.
+    #: Link to be written.
+    link: 'Link'
+    #: If the link is to be removed (before being saved).
+    drop: bool = False
+    #: Score, ``nx``, ``xx`` and source of the link to be saved.
+    save: 'Optional[Tuple[float, bool, bool, Optional[str]]]' = None
+    #: Score and failure flag of the link to be released.
+    release: 'Optional[Tuple[float, bool]]' = None
 
-    Args:
-        entries: Links to be added to the :mod:`requests` database.
-            It can be either a :obj:`list` of links, or a single
-            link string (if ``single`` set as :data:`True`).
-        single: Indicate if ``entries`` is a :obj:`list` of links
-            or a single link string.
-        score: Score to for the Redis sorted set.
-        nx: Only create new elements and not to
-            update scores for elements that already exist.
-        xx: Only update scores of elements that
-            already exist. New elements will not be added.
 
-    """
-    if not entries:
-        return None
-    if score is None:
-        timestamp = datetime.now()
-    else:
-        timestamp = datetime.fromtimestamp(score)
+class WriteBuffer:
+    """Write-behind buffer of the task queue writes of a worker.
 
-    if not single:
-        if TYPE_CHECKING:
-            entries = cast('List[Link]', entries)
+    The buffer coalesces :func:`~darc.db.save_requests`, :func:`~darc.db.save_selenium`,
+    :func:`~darc.db.drop_requests`, :func:`~darc.db.drop_selenium` and the
+    (negative) acknowledgements of a worker by link, and flushes them in
+    bulk once :data:`~darc.db.BUFFER_SIZE` links are pending, or the oldest
+    pending write is older than :data:`~darc.db.BUFFER_TIME` milliseconds.
 
-        if nx:
-            with database.atomic():
-                insert_many = [{
-                    'text': link.url,
-                    'hash': link.name,
-                    'link': link,
-                    'timestamp': timestamp,
-                } for link in entries]
-                for batch in peewee.chunked(insert_many, BULK_SIZE):
-                    _db_operation(RequestsQueueModel
-                                  .insert_many(insert_many)
-                                  .on_conflict_ignore()
-                                  .execute)
-            return None
+    For each link, a drop cancels the pending save and release, and a
+    save with ``nx`` never overrides a pending save. Upon flushing, the
+    links are dropped, saved and released in order.
 
-        if xx:
-            entries_text = [link.url for link in entries]
-            _db_operation(RequestsQueueModel
-                          .update(timestamp=timestamp)
-                          .where(cast('TextField', RequestsQueueModel.text).in_(entries_text))
-                          .execute)
-            return None
+    """
 
-        with database.atomic():
-            replace_many = [{
-                'text': link.url,
-                'hash': link.name,
-                'link': link,
-                'timestamp': timestamp,
-            } for link in entries]
-            for batch in peewee.chunked(replace_many, BULK_SIZE):
-                _db_operation(RequestsQueueModel.replace_many(batch).execute)
-        return None
+    def __init__(self) -> None:
+        #: Worker ID holding the leases of the buffered links.
+        self.worker = worker_id()
+        #: Pending writes, mapping the task queues and link names to the writes.
+        self.pending = collections.OrderedDict()  # type: OrderedDict[Tuple[str, str], _BufferedWrite]
+        #: Monotonic time of the oldest pending write.
+        self.since = None  # type: Optional[float]
+        #: Thread currently flushing the buffer.
+        self.flusher = None  # type: Optional[int]
+        #: Exit status deferred till flushed, c.f. :func:`~darc.db.defer_exit`.
+        self.exit = None  # type: Optional[int]
+        self.lock = threading.RLock()
+
+    def _write(self, key: str, link: 'Link') -> '_BufferedWrite':
+        """Pending writes of a link to a task queue."""
+        if self.since is None:
+            self.since = time.monotonic()
+        write = self.pending.get((key, link.name))
+        if write is None:
+            write = self.pending[(key, link.name)] = _BufferedWrite(link)
+        return write
+
+    def _check(self) -> None:
+        """Flush the buffer if full or expired."""
+        if self.since is None:
+            return
+        if len(self.pending) >= BUFFER_SIZE or (time.monotonic() - self.since) * 1_000 >= BUFFER_TIME:
+            self.flush()
+
+    def save(self, key: 'Literal["queue_requests", "queue_selenium"]', links: 'List[Link]',
+             score: float, nx: bool = False, xx: bool = False, source: 'Optional[str]' = None) -> None:
+        """Buffer links to be saved to a task queue.
+
+        Args:
+            key: Name of the task queue.
+            links: Links to be saved.
+            score: Score of the links.
+            nx: Only create new elements.
+            xx: Only update existing elements.
+            source: Source of the links for priority scoring.
+
+        """
+        with self.lock:
+            for link in links:
+                write = self._write(key, link)
+                if write.save is not None and nx:
+                    continue
+                if write.drop and write.save is None and xx:
+                    continue
+                write.link = link
+                write.save = (score, nx, xx, source)
+            self._check()
+
+    def drop(self, key: 'Literal["queue_requests", "queue_selenium"]', link: 'Link') -> None:
+        """Buffer a link to be removed from a task queue.
+
+        Args:
+            key: Name of the task queue.
+            link: Link to be removed.
+
+        """
+        with self.lock:
+            write = self._write(key, link)
+            write.drop = True
+            write.save = write.release = None
+            self._check()
+
+    def release(self, key: 'Literal["queue_requests", "queue_selenium"]', link: 'Link',
+                score: float, failed: bool = False) -> None:
+        """Buffer a link to be released from its lease.
+
+        Args:
+            key: Name of the task queue.
+            link: Link to be released.
+            score: Score to reschedule the link.
+            failed: If the link failed to be processed.
+
+        """
+        with self.lock:
+            self._write(key, link).release = (score, failed)
+            self._check()
+
+    def flush(self) -> None:
+        """Flush the pending writes.
+
+        Note:
+            The buffer is locked while flushing, such that writes from
+            other threads (e.g. the signal handler) wait till flushed.
+
+        Raises:
+            SystemExit: If the exit of the flushing thread has been
+                deferred till flushed, c.f. :func:`~darc.db.defer_exit`.
+
+        """
+        with self.lock:
+            pending, self.pending = self.pending, collections.OrderedDict()
+            self.since = None
+            if not pending:
+                return
+
+            drops = {}  # type: Dict[str, List[Link]]
+            saves = {}  # type: Dict[Tuple[str, float, bool, bool, Optional[str]], List[Link]]
+            releases = {}  # type: Dict[str, List[Tuple[Link, float, bool]]]
+            for (key, _), write in pending.items():
+                if write.drop:
+                    drops.setdefault(key, []).append(write.link)
+                if write.save is not None:
+                    saves.setdefault((key, *write.save), []).append(write.link)
+                if write.release is not None:
+                    releases.setdefault(key, []).append((write.link, *write.release))
+
+            self.flusher = threading.get_ident()
+            # NB: the signal handlers may flush other buffers amid the flush
+            flushing, _WRITE_BUFFER.flushing = getattr(_WRITE_BUFFER, 'flushing', None), self
+            try:
+                for key, links in drops.items():
+                    _drop_links(key, links)  # type: ignore[arg-type]
+                for (key, score, nx, xx, source), links in saves.items():
+                    if key == 'queue_requests':
+                        save_requests(links, score=score, nx=nx, xx=xx, source=source)
+                    else:
+                        save_selenium(links, score=score, nx=nx, xx=xx, source=source)
+                for key, entries in releases.items():
+                    _release_links(key, entries, self.worker)  # type: ignore[arg-type]
+            finally:
+                self.flusher = None
+                _WRITE_BUFFER.flushing = flushing
+                status, self.exit = self.exit, None
+                if status is not None:
+                    raise SystemExit(status)  # pylint: disable=lost-exception
+
+
+def _active_buffer() -> 'Optional[WriteBuffer]':
+    """Write-behind buffer of current worker.
 
-    if TYPE_CHECKING:
-        entries = cast('Link', entries)
+    Returns:
+        The buffer activated by :func:`~darc.db.write_behind` in current
+        thread; :data:`None` if not activated or being flushed.
 
-    if nx:
-        _db_operation(RequestsQueueModel.get_or_create,
-                      text=entries.url,
-                      defaults={
-                          'hash': entries.name,
-                          'link': entries,
-                          'timestamp': timestamp,
-                      })
+    """
+    buffer = getattr(_WRITE_BUFFER, 'buffer', None)  # type: Optional[WriteBuffer]
+    if buffer is None or buffer.flusher == threading.get_ident():
         return None
+    return buffer
 
-    if xx:
-        with contextlib.suppress(peewee.DoesNotExist):
-            model = _db_operation(RequestsQueueModel.get, RequestsQueueModel.text == entries.url)  # type: RequestsQueueModel # pylint: disable=line-too-long
-            model.timestamp = timestamp
-            _db_operation(model.save)
-        return None
 
-    _db_operation(RequestsQueueModel.replace(
-        text=entries.url,
-        hash=entries.name,
-        link=entries,
-        timestamp=timestamp,
-    ).execute)
-    return None
+@contextlib.contextmanager
+def write_behind(buffer: 'Optional[WriteBuffer]' = None) -> 'Iterator[Optional[WriteBuffer]]':
+    """Buffer task queue writes of current worker.
 
+    Within the context, task queue writes of current thread are
+    coalesced by a :class:`~darc.db.WriteBuffer`, which is flushed
+    upon exit. If :data:`~darc.db.BUFFER_SIZE` is not positive, the
+    writes are not buffered.
 
-def _save_requests_redis(entries: 'Union[Link, List[Link]]', single: bool = False,
-                         score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None:
-    """Save link to the :mod:`requests` database.
+    Args:
+        buffer: Buffer of another thread to be shared with, e.g. of the
+            worker dispatching links to its round threads (c.f.
+            :func:`darc.process.process_round`), which is then flushed
+            by its owner instead.
 
-    The function updates the ``queue_requests`` database.
+    Yields:
+        The write-behind buffer; :data:`None` if disabled.
 
-    Args:
-        entries: Links to be added to the :mod:`requests` database.
-            It can be either a :obj:`list` of links, or a single
-            link string (if ``single`` set as :data:`True`).
-        single: Indicate if ``entries`` is a :obj:`list` of links
-            or a single link string.
-        score: Score to for the Redis sorted set.
-        nx: Forces ``ZADD`` to only create new elements and not to
-            update scores for elements that already exist.
-        xx: Forces ``ZADD`` to only update scores of elements that
-            already exist. New elements will not be added.
+    Note:
+        Acknowledgements are buffered along with the writes, thus
+        :func:`~darc.db.ack_requests` and alike always return :data:`True`
+        within the context. The buffers are flushed upon exit, as well as
+        upon ``SIGINT`` and ``SIGTERM`` by each worker process (c.f.
+        :func:`~darc.db.flush_buffers`). Should the buffer be lost
+        nonetheless (e.g. the worker process killed), the acknowledged
+        links will be claimed again once their leases expired, whilst
+        the buffered new links are lost.
 
     """
-    if score is None:
-        score = time.time()
+    if buffer is not None:
+        _WRITE_BUFFER.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            _WRITE_BUFFER.buffer = None
+        return
+
+    buffer = getattr(_WRITE_BUFFER, 'buffer', None)
+    if BUFFER_SIZE <= 0 or buffer is not None:
+        yield buffer
+        return
+
+    buffer = _WRITE_BUFFER.buffer = WriteBuffer()
+    with _BUFFER_LOCK:
+        _BUFFER_POOL.append(buffer)
+    try:
+        yield buffer
+    finally:
+        _WRITE_BUFFER.buffer = None
+        with _BUFFER_LOCK:
+            _BUFFER_POOL.remove(buffer)
+        buffer.flush()
 
-    if not single:
-        if TYPE_CHECKING:
-            entries = cast('List[Link]', entries)
 
-        for chunk in peewee.chunked(entries, BULK_SIZE):
-            pool = list(filter(lambda link: isinstance(link, Link), chunk))  # type: List[Link]
-            for link in pool:
-                _redis_command('set', link.name, pickle.dumps(link), nx=True)
-            with _redis_get_lock('queue_requests'):
-                _redis_command('zadd', 'queue_requests', {
-                    link.name: score for link in pool
-                }, nx=nx, xx=xx)
-        return None
+def flush_buffers(signum: 'Optional[Union[int, Signals]]' = None,  # pylint: disable=unused-argument
+                  frame: 'Optional[FrameType]' = None) -> None:  # pylint: disable=unused-argument
+    """Flush write-behind buffers of all workers in current process.
 
-    if TYPE_CHECKING:
-        entries = cast('Link', entries)
+    The function is registered as a signal handler, of the worker processes
+    as well (c.f. :func:`darc.process.process`), and upon exit, so that
+    buffered writes are not lost on shutdown.
 
-    _redis_command('set', entries.name, pickle.dumps(entries), nx=True)
-    with _redis_get_lock('queue_requests'):
-        _redis_command('zadd', 'queue_requests', {
-            entries.name: score,
-        }, nx=nx, xx=xx)
-    return None
+    Args:
+        signum: The signal to handle.
+        frame (types.FrameType): The traceback frame from the signal.
 
+    """
+    with _BUFFER_LOCK:
+        buffers = list(_BUFFER_POOL)
+    for buffer in buffers:
+        buffer.flush()
 
-@overload
-def save_selenium(entries: 'Link', single: 'Literal[True]',
-                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None: ...
-@overload
-def save_selenium(entries: 'List[Link]', single: 'Literal[False]' = False,
-                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None: ...
-def save_selenium(entries: 'Union[Link, List[Link]]', single: bool = False,  # pylint: disable=inconsistent-return-statements
-                  score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None:
-    """Save link to the :mod:`selenium` database.
+
+atexit.register(flush_buffers)
+
+
+def defer_exit(status: int) -> bool:
+    """Defer exiting current thread if flushing a write-behind buffer.
+
+    Upon ``SIGINT`` and ``SIGTERM``, the signal handlers run in the main
+    thread, possibly interrupting the flush of a buffer, whose pending
+    writes have then been taken out of the buffer, i.e. are neither
+    flushed by :func:`~darc.db.flush_buffers` nor written at all if
+    the thread exited. Instead, the flush is resumed and the thread
+    exits once flushed, c.f. :meth:`WriteBuffer.flush <darc.db.WriteBuffer.flush>`.
 
     Args:
-        entries: Links to be added to the :mod:`selenium` database.
-            It can be either a :obj:`list` of links, or a single
-            link string (if ``single`` set as :data:`True`).
-        single: Indicate if ``entries`` is a :obj:`list` of links
-            or a single link string.
-        score: Score to for the Redis sorted set.
-        nx: Only create new elements and not to
-            update scores for elements that already exist.
-        xx: Only update scores of elements that
-            already exist. New elements will not be added.
+        status: Exit status of the thread.
 
-    Notes:
-        The ``entries`` will be dumped through :mod:`pickle` so that
-        :mod:`darc` do not need to parse them again.
+    Returns:
+        If the exit is deferred.
 
-    When ``entries`` is a list of :class:`~darc.link.Link` instances,
-    we tries to perform *bulk* update to easy the memory consumption.
-    The *bulk* size is defined by :data:`~darc.db.BULK_SIZE`.
+    """
+    buffer = getattr(_WRITE_BUFFER, 'flushing', None)  # type: Optional[WriteBuffer]
+    if buffer is None:
+        return False
+    buffer.exit = status
+    return True
 
-    See Also:
-        * :func:`darc.db._save_selenium_db`
-        * :func:`darc.db._save_selenium_redis`
+
+def _drop_links(key: 'Literal["queue_requests", "queue_selenium"]', links: 'List[Link]') -> None:
+    """Remove links from a task queue in bulk.
+
+    Args:
+        key: Name of the task queue.
+        links: Links to be removed.
 
     """
     if FLAG_DB:
+        model = {name: model for model, name in _DB_QUEUE.items()}[key]
         with database.connection_context():
             try:
-                return _save_selenium_db(entries, single, score, nx, xx)  # type: ignore[call-overload]
+                with _db_transaction():
+                    for chunk in peewee.chunked(links, BULK_SIZE):
+                        _db_operation(model.delete().where(model.hash.in_([link.name for link in chunk])).execute)
             except Exception:
-                _arg_msg = _gen_arg_msg(entries, single, score, nx, xx)
-                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed,
-                            line=f'_save_selenium_db({_arg_msg})')
-                return None
-    return _save_selenium_redis(entries, single, score, nx, xx)
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_drop_links({key!r})')
+        return
 
+    def drop(pipeline: 'Pipeline') -> None:
+        for link in links:
+            queue = _shard_key(key, shard_name(link))
+            pipeline.zrem(queue, link.name)
+            pipeline.hdel(_lease_key(queue), link.name)
+            pipeline.hdel(_failure_key(queue), link.name)
+            if REDIS_QUEUE == 'stream':
+                pipeline.hdel(_entry_key(queue), link.name)
+            _payload_delete(pipeline, _payload_prefix(shard_name(link)), link.name)
 
-@overload
-def _save_selenium_db(entries: 'Link', single: 'Literal[True]',
-                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None: ...
-@overload
-def _save_selenium_db(entries: 'List[Link]', single: 'Literal[False]' = False,
-                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None: ...
-def _save_selenium_db(entries: 'Union[Link, List[Link]]', single: bool = False,
-                      score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None:
-    """Save link to the :mod:`selenium` database.
+    with _redis_get_lock(key):
+        _redis_pipeline(drop)
+    if OVERFLOW_HIGH > 0:
+        _overflow_drop(key, links)
 
-    The function updates the :class:`~darc.model.tasks.selenium.SeleniumQueueModel` table.
+
+def _release_links(key: 'Literal["queue_requests", "queue_selenium"]',
+                   entries: 'List[Tuple[Link, float, bool]]', worker: str) -> None:
+    """Release the leases of links in bulk.
+
+    For Redis, the failure counters and the release scripts
+    (c.f. :data:`~darc.db._REDIS_RELEASE_SCRIPT`) are sent through
+    one pipeline each.
 
     Args:
-        entries: Links to be added to the :mod:`selenium` database.
-            It can be either a :obj:`list` of links, or a single
-            link string (if ``single`` set as :data:`True`).
-        single: Indicate if ``entries`` is a :obj:`list` of links
-            or a single link string.
-        score: Score to for the Redis sorted set.
-        nx: Only create new elements and not to
-            update scores for elements that already exist.
-        xx: Only update scores of elements that
-            already exist. New elements will not be added.
+        key: Name of the task queue.
+        entries: Links to be released, with their scores and
+            failure flags.
+        worker: Worker ID holding the leases.
 
     """
-    if not entries:
-        return None
-    if score is None:
-        timestamp = datetime.now()
-    else:
-        timestamp = datetime.fromtimestamp(score)
+    if FLAG_DB:
+        model = {name: model for model, name in _DB_QUEUE.items()}[key]
+        # NB: the leases are released in one transaction per batch, such
+        # that the (embedded) database syncs once rather than per link
+        with database.connection_context():
+            for chunk in peewee.chunked(entries, BULK_SIZE):
+                with _db_transaction():
+                    for link, score, failed in chunk:
+                        try:
+                            _release_db(model, link, score, failed=failed, worker=worker)
+                        except Exception:
+                            logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed,
+                                        line=f'_release_db({key!r}, {link.url})')
+        return
+
+    failures = {}  # type: Dict[str, int]
+    failed_links = [link for link, _, failed in entries if failed]
+    if PRIORITY and failed_links:
+        def count(pipeline: 'Pipeline') -> None:
+            for link in failed_links:
+                pipeline.hincrby(_failure_key(_shard_key(key, shard_name(link))), link.name, 1)
+        failures.update(zip((link.name for link in failed_links), _redis_pipeline(count)))
+
+    def release(pipeline: 'Pipeline') -> None:
+        for link, score, failed in entries:
+            keys, args = _release_params(key, link, score, failures.get(link.name, 0), failed, worker=worker)
+            REDIS_SCRIPTS['release'](keys=keys, args=args, client=pipeline)
+    _redis_pipeline(release)
+
+
+def _spill_key(key: str) -> str:
+    """Name of the spill lock of a task queue.
 
-    if not single:
-        if TYPE_CHECKING:
-            entries = cast('List[Link]', entries)
+    Args:
+        key: Name of the task queue (or its shard).
 
-        if nx:
-            with database.atomic():
-                insert_many = [{
-                    'text': link.url,
-                    'hash': link.name,
-                    'link': link,
-                    'timestamp': timestamp,
-                } for link in entries]
-                for batch in peewee.chunked(insert_many, BULK_SIZE):
-                    _db_operation(SeleniumQueueModel
-                                  .insert_many(insert_many)
-                                  .on_conflict_ignore()
-                                  .execute)
-            return None
+    Returns:
+        Name of the Redis key guarding the overflow tier of the task
+        queue, e.g. ``spill_requests`` (or ``spill_requests{tor:3}``).
 
-        if xx:
-            entries_text = [link.url for link in entries]
-            _db_operation(SeleniumQueueModel
-                          .update(timestamp=timestamp)
-                          .where(cast('TextField', SeleniumQueueModel.text).in_(entries_text))
-                          .execute)
-            return None
+    """
+    return key.replace('queue_', 'spill_', 1)
 
-        with database.atomic():
-            replace_many = [{
-                'text': link.url,
-                'hash': link.name,
-                'link': link,
-                'timestamp': timestamp,
-            } for link in entries]
-            for batch in peewee.chunked(replace_many, BULK_SIZE):
-                _db_operation(SeleniumQueueModel.replace_many(batch).execute)
-        return None
 
-    if TYPE_CHECKING:
-        entries = cast('Link', entries)
+def _overflow_target() -> int:
+    """Number of links a task queue shard is spilled or refilled to.
+
+    Returns:
+        The midpoint of :data:`~darc.db.OVERFLOW_LOW` and :data:`~darc.db.OVERFLOW_HIGH`,
+        such that links move between the tiers in batches rather than
+        back and forth around a single watermark.
+
+    """
+    return (OVERFLOW_HIGH + OVERFLOW_LOW) // 2
+
+
+def _overflow_store(queue: str, shard: 'Optional[str]', records: 'List[OverflowQueueModel]') -> None:
+    """Write links back from the overflow tier to a task queue shard.
+
+    Args:
+        queue: Name of the task queue shard.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        records: Links to be written, with their scores and
+            failure counters.
+
+    """
+    prefix = _payload_prefix(shard)
+
+    def store(pipeline: 'Pipeline') -> None:
+        for record in records:
+            _payload_set(pipeline, prefix, record.hash, dumps_link(record.link))
+        pipeline.zadd(queue, {record.hash: record.timestamp.timestamp() for record in records}, nx=True)
+        failures = {record.hash: record.failures for record in records if record.failures > 0}
+        if failures:
+            pipeline.hset(_failure_key(queue), mapping=failures)
+    _redis_pipeline(store)
+
+
+def _overflow_spill(key: 'Literal["queue_requests", "queue_selenium"]', shard: 'Optional[str]', size: int) -> int:
+    """Spill the cold tail of a task queue shard to the overflow tier.
+
+    Links with the highest scores (i.e. due the latest) and not leased are
+    moved from Redis to the :class:`~darc.model.tasks.overflow.OverflowQueueModel`
+    table in bulks of :data:`~darc.db.BULK_SIZE`, c.f. :data:`~darc.db._REDIS_SPILL_SCRIPT`,
+    till the shard is down to :func:`~darc.db._overflow_target`. The spill
+    is guarded by the ``spill_requests`` (or ``spill_selenium``) key, such
+    that only one worker spills a shard at a time.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        size: Number of links in the shard.
+
+    Returns:
+        Number of links spilled.
+
+    Note:
+        Should the links fail to be written to the database, they are
+        written back to Redis.
+
+    """
+    queue = _shard_key(key, shard)
+    if not _redis_command('set', _spill_key(queue), worker_id(), nx=True, px=LOCK_TIMEOUT):
+        return 0
+
+    other = _shard_key('queue_selenium' if key == 'queue_requests' else 'queue_requests', shard)
+    count = 0
+    try:
+        budget = size - _overflow_target()
+        while budget > 0:
+            reply = _redis_script('spill', [queue, _lease_key(queue), _failure_key(queue), other,
+                                            _payload_prefix(shard)], [min(budget, BULK_SIZE)])  # type: List[bytes]
+            if not reply:
+                break
+
+            records = [OverflowQueueModel(
+                queue=queue, hash=reply[index].decode(), link=loads_link(reply[index + 2]),
+                timestamp=datetime.fromtimestamp(float(reply[index + 1])), failures=int(reply[index + 3]),
+            ) for index in range(0, len(reply), 4)]
+            try:
+                with database.connection_context():
+                    with _db_transaction():
+                        _db_operation(OverflowQueueModel.replace_many([{
+                            'queue': record.queue,
+                            'hash': record.hash,
+                            'link': record.link,
+                            'timestamp': record.timestamp,
+                            'failures': record.failures,
+                        } for record in records]).execute)
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_overflow_spill({queue!r})')
+                _overflow_store(queue, shard, records)
+                break
+            count += len(records)
+            budget -= len(records)
+    finally:
+        _redis_command('delete', _spill_key(queue))
+
+    if count > 0:
+        logger.info('[OVERFLOW] Spilled %d links from %s', count, queue)
+    return count
+
+
+def _overflow_refill(key: 'Literal["queue_requests", "queue_selenium"]', shard: 'Optional[str]',
+                     demand: float = 0) -> int:
+    """Refill a task queue shard from the overflow tier.
+
+    If the shard has dropped below :data:`~darc.db.OVERFLOW_LOW`, links
+    with the lowest scores in the :class:`~darc.model.tasks.overflow.OverflowQueueModel`
+    table are moved back to Redis in bulks of :data:`~darc.db.BULK_SIZE`,
+    till the shard is up to :func:`~darc.db._overflow_target`.
+
+    Otherwise, only *due* links are moved back: as many as ``demand`` if
+    the last claim fell short, or else a bulk of those scored lower than
+    the head of the shard, since links rescheduled in Redis may be due
+    later than those spilled earlier. Surplus links are then spilled
+    again by the next enqueue, c.f. :func:`~darc.db._overflow_spill`.
+
+    Args:
+        key: Name of the task queue.
+        shard: Shard name, c.f. :func:`~darc.db.shard_name`.
+        demand: Number of links the last claim fell short of.
 
-    if nx:
-        _db_operation(SeleniumQueueModel.get_or_create,
-                      text=entries.url,
-                      defaults={
-                          'hash': entries.name,
-                          'link': entries,
-                          'timestamp': timestamp,
-                      })
-        return None
+    Returns:
+        Number of links refilled.
 
-    if xx:
-        with contextlib.suppress(peewee.DoesNotExist):
-            model = _db_operation(SeleniumQueueModel.get, SeleniumQueueModel.text == entries.url)  # type: SeleniumQueueModel # pylint: disable=line-too-long
-            model.timestamp = timestamp
-            _db_operation(model.save)
-        return None
+    Note:
+        Concurrent refills are harmless, as links are written back
+        with ``NX`` and removed from the table by their primary keys.
 
-    _db_operation(SeleniumQueueModel.replace(
-        text=entries.url,
-        hash=entries.name,
-        link=entries,
-        timestamp=timestamp,
-    ).execute)
-    return None
+    """
+    queue = _shard_key(key, shard)
 
+    def probe(pipeline: 'Pipeline') -> None:
+        pipeline.zcard(queue)
+        pipeline.zrange(queue, 0, 0, withscores=True)
+    size, head = _redis_pipeline(probe)  # type: int, List[Tuple[bytes, float]]
 
-def _save_selenium_redis(entries: 'Union[Link, List[Link]]', single: bool = False,
-                         score: 'Optional[float]' = None, nx: bool = False, xx: bool = False) -> None:
-    """Save link to the :mod:`selenium` database.
+    query = OverflowQueueModel.select().where(OverflowQueueModel.queue == queue)
+    if size < OVERFLOW_LOW:
+        budget = _overflow_target() - size
+    else:
+        if TIME_CACHE is None:
+            max_score = datetime.now()
+        else:
+            max_score = datetime.now() - TIME_CACHE
+        if demand > 0:
+            budget = int(min(demand, OVERFLOW_HIGH))
+        else:
+            budget = BULK_SIZE
+            max_score = min(max_score, datetime.fromtimestamp(head[0][1]) if head else max_score)
+        query = query.where(OverflowQueueModel.timestamp < max_score)
 
-    The function updates the ``queue_selenium`` database.
+    count = 0
+    with database.connection_context():
+        try:
+            while budget > 0:
+                records = list(_db_operation(query
+                                             .order_by(OverflowQueueModel.timestamp)
+                                             .limit(min(budget, BULK_SIZE))
+                                             .execute))  # type: List[OverflowQueueModel]
+                if not records:
+                    break
+                _overflow_store(queue, shard, records)
+                _db_operation(OverflowQueueModel
+                              .delete()
+                              .where(cast('peewee.AutoField', OverflowQueueModel.id).in_([record.id for record in records]))
+                              .execute)
+                count += len(records)
+                budget -= len(records)
+        except Exception:
+            logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_overflow_refill({queue!r})')
+
+    if count > 0:
+        logger.info('[OVERFLOW] Refilled %d links to %s', count, queue)
+    return count
+
+
+def _overflow_drop(key: 'Literal["queue_requests", "queue_selenium"]', links: 'List[Link]') -> None:
+    """Remove links from the overflow tier of a task queue.
 
     Args:
-        entries: Links to be added to the :mod:`selenium` database.
-            It can be either an *iterable* of links, or a single
-            link string (if ``single`` set as :data:`True`).
-        single: Indicate if ``entries`` is an *iterable* of links
-            or a single link string.
-        score: Score to for the Redis sorted set.
-        nx: Forces ``ZADD`` to only create new elements and not to
-            update scores for elements that already exist.
-        xx: Forces ``ZADD`` to only update scores of elements that
-            already exist. New elements will not be added.
+        key: Name of the task queue.
+        links: Links to be removed.
 
-    When ``entries`` is a list of :class:`~darc.link.Link` instances,
-    we tries to perform *bulk* update to easy the memory consumption.
-    The *bulk* size is defined by :data:`~darc.db.BULK_SIZE`.
+    """
+    shards = {}  # type: Dict[str, List[str]]
+    for link in links:
+        shards.setdefault(_shard_key(key, shard_name(link)), []).append(link.name)
 
-    Notes:
-        The ``entries`` will be dumped through :mod:`pickle` so that
-        :mod:`darc` do not need to parse them again.
+    with database.connection_context():
+        try:
+            with _db_transaction():
+                for queue, names in shards.items():
+                    for chunk in peewee.chunked(names, BULK_SIZE):
+                        _db_operation(OverflowQueueModel
+                                      .delete()
+                                      .where((OverflowQueueModel.queue == queue)
+                                             & cast('CharField', OverflowQueueModel.hash).in_(chunk))
+                                      .execute)
+        except Exception:
+            logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line=f'_overflow_drop({key!r})')
+
+
+@dataclasses.dataclass
+class QueueStats:
+    """Statistics of a task queue, or a group of its shards."""
+
+    #: Name of the task queue.
+    queue: str
+    #: Shard name, proxy type or :data:`None` for the whole task queue.
+    group: 'Optional[str]' = None
+
+    #: Number of links in the task queue.
+    depth: int = 0
+    #: Number of due links.
+    due: int = 0
+    #: Number of new links, i.e. never claimed and scored below
+    #: :data:`~darc.db.GC_FLOOR`, which are due as well.
+    fresh: int = 0
+    #: Number of leased links (approximate for Redis).
+    leased: int = 0
+    #: Number of links spilled to the overflow tier (c.f. :data:`~darc.db.OVERFLOW_HIGH`),
+    #: not included in ``depth``.
+    spilled: int = 0
+    #: Seconds since the oldest due link (excluding new links) became due.
+    oldest_due: 'Optional[float]' = None
+    #: Histogram of scores, i.e. numbers of links between each of
+    #: :data:`~darc.db.STATS_BUCKETS`, relative to the due threshold.
+    histogram: 'List[int]' = dataclasses.field(default_factory=lambda: [0] * (len(STATS_BUCKETS) + 1))
+    #: Links enqueued per second within each of :data:`~darc.db.STATS_WINDOWS`.
+    rate_in: 'Dict[int, float]' = dataclasses.field(default_factory=lambda: dict.fromkeys(STATS_WINDOWS, 0.0))
+    #: Links claimed per second within each of :data:`~darc.db.STATS_WINDOWS`.
+    rate_out: 'Dict[int, float]' = dataclasses.field(default_factory=lambda: dict.fromkeys(STATS_WINDOWS, 0.0))
+
+    @property
+    def scheduled(self) -> int:
+        """Number of links not yet due (including leased links)."""
+        return self.depth - self.due
+
+    def merge(self, other: 'QueueStats') -> None:
+        """Merge statistics of another shard.
+
+        Args:
+            other: Statistics to be merged.
+
+        """
+        self.depth += other.depth
+        self.due += other.due
+        self.fresh += other.fresh
+        self.leased += other.leased
+        self.spilled += other.spilled
+        if other.oldest_due is not None:
+            self.oldest_due = max(self.oldest_due or 0, other.oldest_due)
+        self.histogram = [count + other_count for count, other_count in zip(self.histogram, other.histogram)]
+        for window in STATS_WINDOWS:
+            self.rate_in[window] += other.rate_in[window]
+            self.rate_out[window] += other.rate_out[window]
+
+
+def _stats_rates(counts: 'Dict[int, int]', now: float) -> 'Dict[int, float]':
+    """Compute rolling rates from per-minute counters.
+
+    Args:
+        counts: Counts mapped by minutes since epoch.
+        now: Current timestamp.
+
+    Returns:
+        Rates per second within each of :data:`~darc.db.STATS_WINDOWS`,
+        i.e. counts since the start of the minute ``window`` seconds
+        ago divided by the elapsed time.
 
     """
-    if not entries:
-        return None
-    if score is None:
-        score = time.time()
+    current = int(now // 60)
+    rates = {}  # type: Dict[int, float]
+    for window in STATS_WINDOWS:
+        start = current - window // 60
+        rates[window] = sum(count for minute, count in counts.items() if minute >= start) / (now - start * 60)
+    return rates
 
-    if not single:
-        if TYPE_CHECKING:
-            entries = cast('List[Link]', entries)
 
-        for chunk in peewee.chunked(entries, BULK_SIZE):
-            pool = list(filter(lambda link: isinstance(link, Link), chunk))  # type: List[Link]
-            for link in pool:
-                _redis_command('set', link.name, pickle.dumps(link), nx=True)
-            with _redis_get_lock('queue_selenium'):
-                _redis_command('zadd', 'queue_selenium', {
-                    link.name: score for link in pool
-                }, nx=nx, xx=xx)
-        return None
+def _stats_histogram(cumulative: 'List[int]') -> 'List[int]':
+    """Convert cumulative counts into a histogram.
 
-    if TYPE_CHECKING:
-        entries = cast('Link', entries)
+    Args:
+        cumulative: Numbers of links with scores below each of
+            :data:`~darc.db.STATS_BUCKETS`, followed by the depth.
 
-    _redis_command('set', entries.name, pickle.dumps(entries), nx=True)
-    with _redis_get_lock('queue_selenium'):
-        _redis_command('zadd', 'queue_selenium', {
-            entries.name: score,
-        }, nx=nx, xx=xx)
-    return None
+    Returns:
+        Numbers of links between each of :data:`~darc.db.STATS_BUCKETS`.
 
+    """
+    return [cumulative[0]] + [upper - lower for lower, upper in zip(cumulative, cumulative[1:])]
 
-def load_requests(check: bool = CHECK) -> 'List[Link]':
-    """Load link from the :mod:`requests` database.
+
+def stats(group: 'Literal["queue", "proxy", "shard"]' = 'queue') -> 'List[QueueStats]':
+    """Report statistics of the task queues.
+
+    The statistics are collected incrementally, i.e. no task queue
+    is scanned through:
+
+    * for Redis, each shard costs a constant number of ``O(log N)``
+      commands (``ZCARD``, ``HLEN``, ``ZRANGEBYSCORE`` and one ``ZCOUNT``
+      per histogram bucket), all sent through one pipeline; the rolling
+      rates are read from per-minute counters maintained upon enqueued
+      (c.f. :func:`~darc.db._redis_enqueue`) and claimed (c.f.
+      :data:`~darc.db._REDIS_CLAIM_SCRIPT`);
+    * for RDS, each table costs one aggregate query, and the rolling
+      rates are read from the :class:`~darc.model.tasks.stats.QueueStatsModel`
+      table.
 
     Args:
-        check: If perform checks on loaded links,
-            default to :data:`~darc.const.CHECK`.
+        group: Group statistics by task queues, proxy types or shards
+            (c.f. :func:`~darc.db.shard_name`).
 
     Returns:
-        List of loaded links from the :mod:`requests` database.
-
-    Note:
-        At runtime, the function will load links with maximum number
-        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+        Statistics of ``queue_requests`` and ``queue_selenium``, or
+        their proxy types or shards.
 
     See Also:
-        * :func:`darc.db._load_requests_db`
-        * :func:`darc.db._load_requests_redis`
+        * :func:`darc.db._stats_db`
+        * :func:`darc.db._stats_redis`
 
     """
     if FLAG_DB:
         with database.connection_context():
-            try:
-                link_pool = _load_requests_db()
-            except Exception:
-                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line='_load_requests_db()')
-                link_pool = []
+            shard_stats = _stats_db()
     else:
-        link_pool = _load_requests_redis()
+        shard_stats = _stats_redis()
 
-    if check:
-        link_pool = _check(link_pool)
+    if group == 'shard':
+        return shard_stats
 
-    logger.plog(LOG_VERBOSE, '-*- [REQUESTS] LINK POOL -*-',
-                object=sorted(link.url for link in link_pool))
-    return link_pool
+    groups = {}  # type: Dict[Tuple[str, Optional[str]], QueueStats]
+    for item in shard_stats:
+        if group == 'proxy' and item.group is not None:
+            name = item.group.split(':', 1)[0]  # type: Optional[str]
+        else:
+            name = None
+        if (item.queue, name) not in groups:
+            groups[(item.queue, name)] = QueueStats(queue=item.queue, group=name)
+        groups[(item.queue, name)].merge(item)
+    return list(groups.values())
 
 
-def _load_requests_db() -> 'List[Link]':
-    """Load link from the :mod:`requests` database.
+def _stats_redis() -> 'List[QueueStats]':
+    """Report statistics of the Redis task queues.
+
+    Returns:
+        Statistics of each shard of the task queues.
+
+    """
+    _redis_flush_stats()
+
+    now = time.time()
+    if TIME_CACHE is None:
+        threshold = now
+    else:
+        threshold = now - TIME_CACHE.total_seconds()
+    current = int(now // 60)
+    minutes = range(current - max(STATS_WINDOWS) // 60, current + 1)
+
+    shards = [(key, shard) for key in ('queue_requests', 'queue_selenium')
+              for shard in _redis_shards(key)]  # type: ignore[arg-type]
+
+    def collect(pipeline: 'Pipeline') -> None:
+        for key, shard in shards:
+            queue = _shard_key(key, shard)
+            pipeline.zcard(queue)
+            pipeline.hlen(_lease_key(queue))
+            # new links are scored from 0, i.e. not due since any real time
+            pipeline.zcount(queue, '-inf', f'({GC_FLOOR}')
+            pipeline.zrangebyscore(queue, GC_FLOOR, '+inf', start=0, num=1, withscores=True)
+            for edge in STATS_BUCKETS:
+                pipeline.zcount(queue, '-inf', threshold + edge)
+            for minute in minutes:
+                pipeline.hmget(_stats_key(key, shard, minute), 'in', 'out')  # type: ignore[arg-type]
+    values = iter(_redis_pipeline(collect))
+
+    spilled = {}  # type: Dict[str, int]
+    if OVERFLOW_HIGH > 0:
+        with database.connection_context():
+            try:
+                spilled.update(_db_operation(OverflowQueueModel
+                                             .select(OverflowQueueModel.queue, peewee.fn.COUNT(OverflowQueueModel.id))
+                                             .group_by(OverflowQueueModel.queue)
+                                             .tuples()
+                                             .execute))
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line='OverflowQueueModel.select()')
+
+    shard_stats = []  # type: List[QueueStats]
+    for key, shard in shards:
+        depth = next(values)  # type: int
+        leased = next(values)  # type: int
+        fresh = next(values)  # type: int
+        oldest = next(values)  # type: List[Tuple[bytes, float]]
+        cumulative = [next(values) for _ in STATS_BUCKETS] + [depth]
+        counters = [next(values) for _ in minutes]  # type: List[List[Optional[bytes]]]
+
+        if oldest and oldest[0][1] <= threshold:
+            oldest_due = threshold - oldest[0][1]  # type: Optional[float]
+        else:
+            oldest_due = None
+        shard_stats.append(QueueStats(
+            queue=key, group=shard, depth=depth, leased=leased, spilled=spilled.get(_shard_key(key, shard), 0),
+            due=cumulative[STATS_BUCKETS.index(0)], fresh=fresh, oldest_due=oldest_due,
+            histogram=_stats_histogram(cumulative),
+            rate_in=_stats_rates({minute: int(counts[0] or 0) for minute, counts in zip(minutes, counters)}, now),
+            rate_out=_stats_rates({minute: int(counts[1] or 0) for minute, counts in zip(minutes, counters)}, now),
+        ))
+    return shard_stats
+
 
-    The function reads the :class:`~darc.model.tasks.requests.RequestsQueueModel` table.
+def _stats_db() -> 'List[QueueStats]':
+    """Report statistics of the RDS task queues.
 
     Returns:
-        List of loaded links from the :mod:`requests` database.
+        Statistics of each shard of the task queues.
 
     Note:
-        At runtime, the function will load links with maximum number
-        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+        The rolling rates are only counted per task queue, thus
+        are reported along with the first shard of each table.
 
     """
-    now = datetime.now()
+    now = time.time()
     if TIME_CACHE is None:
-        sec_delta = timedelta(seconds=0)
-        max_score = now
+        threshold = datetime.fromtimestamp(now)
     else:
-        sec_delta = TIME_CACHE
-        max_score = now - sec_delta
-
-    with database.atomic():
-        query = _db_operation(
-            RequestsQueueModel
-            .select(RequestsQueueModel.link)
-            .where(RequestsQueueModel.timestamp <= max_score)
-            .order_by(RequestsQueueModel.timestamp)
-            .limit(MAX_POOL)
-            .execute
-        )  # type: List[RequestsQueueModel]
-        link_pool = [model.link for model in query]
-
-        # force update records
-        if TIME_CACHE is not None:
-            new_score = (now + sec_delta).timestamp()
-            _save_requests_db(link_pool, score=new_score)
-    return link_pool
+        threshold = datetime.fromtimestamp(now) - TIME_CACHE
+    current = int(now // 60)
+    floor = datetime.fromtimestamp(GC_FLOOR)
+
+    # purge expired counters
+    _db_operation(QueueStatsModel
+                  .delete()
+                  .where(QueueStatsModel.minute < current - STATS_TTL // 60)
+                  .execute)
+
+    counters = {}  # type: Dict[str, Tuple[Dict[int, int], Dict[int, int]]]
+    query = _db_operation(QueueStatsModel
+                          .select()
+                          .where(QueueStatsModel.minute >= current - max(STATS_WINDOWS) // 60)
+                          .execute)  # type: List[QueueStatsModel]
+    for record in query:
+        counts_in, counts_out = counters.setdefault(record.queue, ({}, {}))
+        counts_in[record.minute] = record.enqueued
+        counts_out[record.minute] = record.claimed
+
+    shard_stats = []  # type: List[QueueStats]
+    for model, key in _DB_QUEUE.items():
+        columns = [
+            model.shard,
+            peewee.fn.COUNT(model.id),
+            peewee.fn.SUM(peewee.Case(None, [(model.lease.is_null(False) & (model.timestamp > threshold), 1)], 0)),
+            # new links are timestamped from 0, i.e. not due since any real time
+            peewee.fn.SUM(peewee.Case(None, [(model.timestamp < floor, 1)], 0)),
+            peewee.fn.MIN(peewee.Case(None, [(model.timestamp >= floor, model.timestamp)], None)),
+        ]
+        for edge in STATS_BUCKETS:
+            columns.append(peewee.fn.SUM(peewee.Case(None, [(model.timestamp <= threshold + timedelta(seconds=edge), 1)], 0)))  # pylint: disable=line-too-long
+        query = list(_db_operation(model.select(*columns).group_by(model.shard).order_by(model.shard).tuples().execute))
+
+        counts_in, counts_out = counters.get(key, ({}, {}))
+        if not query:
+            shard_stats.append(QueueStats(queue=key, rate_in=_stats_rates(counts_in, now),
+                                          rate_out=_stats_rates(counts_out, now)))
+        for index, (shard, depth, leased, fresh, oldest, *cumulative) in enumerate(query):
+            cumulative = [int(count or 0) for count in cumulative] + [depth]
+            if isinstance(oldest, str):  # SQLite returns raw text for aggregates
+                oldest = datetime.fromisoformat(oldest)
+            if oldest is not None and oldest <= threshold:
+                oldest_due = (threshold - oldest).total_seconds()  # type: Optional[float]
+            else:
+                oldest_due = None
+            shard_stats.append(QueueStats(
+                queue=key, group=shard, depth=depth, leased=int(leased or 0),
+                due=cumulative[STATS_BUCKETS.index(0)], fresh=int(fresh or 0), oldest_due=oldest_due,
+                histogram=_stats_histogram(cumulative),
+                rate_in=_stats_rates(counts_in if index == 0 else {}, now),
+                rate_out=_stats_rates(counts_out if index == 0 else {}, now),
+            ))
+    return shard_stats
+
+
+#: Pattern of payload keys, i.e. the hash tag of the shard (if any)
+#: followed by the link name, c.f. :func:`~darc.db._payload_prefix`.
+_PAYLOAD_PATTERN = re.compile(r'^(?:\{(?P<shard>[^}]+)\})?(?P<name>[0-9a-f]{64})$')
+#: Pattern of payload hash buckets, c.f. :func:`~darc.db._payload_bucket`.
+_BUCKET_PATTERN = re.compile(r'^(?:\{(?P<shard>[^}]+)\})?bucket:[0-9a-f]+$')
+
+
+def compact() -> 'Dict[str, int]':
+    """Run one tick of the online garbage collection.
+
+    The function is meant to be called periodically (c.f.
+    :data:`~darc.db.GC_INTERVAL`) while the workers keep running,
+    each tick being bounded by :data:`~darc.db.GC_COUNT`:
+
+    * for Redis, the keyspace is walked incrementally by a ``SCAN``
+      cursor saved in Redis, and payload keys of links queued in
+      neither ``queue_requests`` nor ``queue_selenium`` are deleted,
+      c.f. :data:`~darc.db._REDIS_COLLECT_SCRIPT`;
+    * if :data:`~darc.db.GC_RETENTION` is set, links which have been
+      due for longer than the retention age, and hostnames recorded
+      earlier than that, are trimmed from the task queues;
+    * if :data:`~darc.db.REDIS_QUEUE` is ``stream``, dead consumers are
+      removed from the consumer groups, c.f. :func:`~darc.db._compact_streams`.
 
+    Returns:
+        Numbers of payloads (``payload``), links (e.g.
+        ``queue_requests``) and consumers (``consumer``)
+        removed within the tick.
 
-def _load_requests_redis() -> 'List[Link]':
-    """Load link from the :mod:`requests` database.
+    See Also:
+        * :func:`darc.db._compact_db`
+        * :func:`darc.db._compact_redis`
+
+    """
+    if FLAG_DB:
+        with database.connection_context():
+            try:
+                return _compact_db()
+            except Exception:
+                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line='_compact_db()')
+                return {}
+    return _compact_redis()
 
-    The function reads the ``queue_requests`` database.
+
+def _compact_redis() -> 'Dict[str, int]':
+    """Run one tick of the online garbage collection on Redis.
+
+    The tick is guarded by the ``gc_lock`` key expiring after
+    :data:`~darc.db.GC_INTERVAL`, such that only one worker runs
+    the garbage collection per interval across all :mod:`darc`
+    instances sharing the Redis server.
 
     Returns:
-        List of loaded links from the :mod:`requests` database.
+        Numbers of payloads and links removed within the tick;
+        empty if another worker holds the tick.
 
     Note:
-        At runtime, the function will load links with maximum number
-        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+        Orphaned payloads idle for less than :data:`~darc.db.GC_GRACE`
+        seconds are kept, as they may be written by a concurrent
+        :func:`~darc.db._redis_enqueue` pipeline whose ``ZADD`` is yet
+        to come. ``OBJECT IDLETIME`` is not available with the LFU
+        eviction policies, in which case the grace period is ignored.
 
     """
-    now = time.time()
-    if TIME_CACHE is None:
-        sec_delta = 0  # type: float
-        max_score = now
-    else:
-        sec_delta = TIME_CACHE.total_seconds()
-        max_score = now - sec_delta
+    ttl = max(int((GC_INTERVAL or 1) * 1_000), 1)
+    if not _redis_command('set', 'gc_lock', worker_id(), nx=True, px=ttl):
+        return {}
+
+    removed = {}  # type: Dict[str, int]
+    # NB: payloads may reside in both string keys and hash buckets, c.f. :data:`~darc.db.PAYLOAD_BUCKET`
+    cursor, keys = _redis_command('scan', int(_redis_command('get', 'gc_cursor') or 0), count=GC_COUNT,
+                                  _type=None if PAYLOAD_BUCKET > 0 else 'string')  # type: int, List[bytes]
+    _redis_command('set', 'gc_cursor', cursor)
+
+    shards = {}  # type: Dict[Optional[str], List[str]]
+    for key in keys:
+        match = _PAYLOAD_PATTERN.match(key.decode(errors='replace'))
+        if match is not None:
+            shards.setdefault(match.group('shard'), []).append(match.group('name'))
+            continue
+        match = _BUCKET_PATTERN.match(key.decode(errors='replace'))
+        if match is not None and PAYLOAD_BUCKET > 0:
+            shards.setdefault(match.group('shard'), []).extend(
+                field.hex() for field in _redis_command('hkeys', key))
+    for shard, names in shards.items():
+        removed['payload'] = removed.get('payload', 0) + _redis_script('collect', [
+            _shard_key('queue_requests', shard), _shard_key('queue_selenium', shard), _payload_prefix(shard),
+        ], [GC_GRACE, *names])
+
+    if GC_RETENTION is not None:
+        now = time.time()
+        removed['queue_hostname'] = _redis_script('trim', ['queue_hostname'], [
+            GC_FLOOR, now - GC_RETENTION, GC_COUNT,
+        ])
 
-    try:
-        with _redis_get_lock('queue_requests'):
-            temp_pool = [_redis_command('get', name) for name in _redis_command('zrangebyscore', 'queue_requests',
-                                                                                min=0, max=max_score, start=0, num=MAX_POOL)]  # type: List[bytes] # pylint: disable=line-too-long
-            link_pool = [pickle.loads(link) for link in filter(None, temp_pool)]  # nosec: B301
-            if TIME_CACHE is not None:
-                new_score = now + sec_delta
-                _save_requests_redis(link_pool, score=new_score)  # force update records
-    except pottery_exceptions.PotteryError:
-        logger.pexc(LOG_WARNING, f'[REQUESTS] Failed to acquire Redis lock after {LOCK_TIMEOUT} second(s)',
-                    LockWarning, "_redis_get_lock('queue_requests')")
-        link_pool = []
-    return link_pool
+        if TIME_CACHE is not None:
+            now -= TIME_CACHE.total_seconds()
+        for key, other in (('queue_requests', 'queue_selenium'), ('queue_selenium', 'queue_requests')):
+            budget = GC_COUNT
+            shard_list = _redis_shards(key)  # type: ignore[arg-type]
+            random.shuffle(shard_list)
+            for shard in shard_list:
+                queue = _shard_key(key, shard)
+                budget -= _redis_script('trim', [
+                    queue, _lease_key(queue), _failure_key(queue), _shard_key(other, shard), _payload_prefix(shard),
+                ], [GC_FLOOR, now - GC_RETENTION, budget])
+                if budget <= 0:
+                    break
+            removed[key] = GC_COUNT - budget
+
+    if REDIS_QUEUE == 'stream':
+        removed['consumer'] = _compact_streams()
+
+    removed = {key: count for key, count in removed.items() if count > 0}
+    if removed:
+        logger.info('[GC] Removed %s', ', '.join(f'{count} {key}' for key, count in removed.items()))
+    return removed
+
+
+def _compact_streams() -> int:
+    """Remove dead consumers from the consumer groups of the streams.
+
+    Consumers idle for :data:`~darc.db.LEASE_TIMEOUT` seconds without
+    pending entries (i.e. auto-claimed by other consumers already) are
+    removed, as each worker thread joins the consumer groups with its
+    own :func:`~darc.db.worker_id`.
 
+    Returns:
+        Number of consumers removed.
 
-def load_selenium(check: bool = CHECK) -> 'List[Link]':
-    """Load link from the :mod:`selenium` database.
+    """
+    count = 0
+    for key in ('queue_requests', 'queue_selenium'):
+        for shard in _redis_shards(key):  # type: ignore[arg-type]
+            stream = _stream_key(_shard_key(key, shard))
+            if not _redis_command('exists', stream):
+                continue
+            for consumer in _redis_command('xinfo_consumers', stream, STREAM_GROUP):  # type: Dict[str, Any]
+                if consumer['pending'] == 0 and consumer['idle'] >= LEASE_TIMEOUT * 1_000:
+                    _redis_command('xgroup_delconsumer', stream, STREAM_GROUP, consumer['name'])
+                    count += 1
+    return count
+
+
+def _compact_db() -> 'Dict[str, int]':
+    """Run one tick of the online garbage collection on RDS.
+
+    As links are stored inline in the task queue tables, there are
+    no orphaned payloads; the function only trims links and hostnames
+    past the retention age, at most :data:`~darc.db.GC_COUNT` records
+    per table. Leased records are never trimmed, as their timestamps
+    are set to the lease expiry.
+
+    Returns:
+        Numbers of links removed within the tick.
+
+    """
+    if GC_RETENTION is None:
+        return {}
+
+    now = datetime.now()
+    floor = datetime.fromtimestamp(GC_FLOOR)
+    retention = timedelta(seconds=GC_RETENTION)
+
+    removed = {}  # type: Dict[str, int]
+    tables = [(HostnameQueueModel, 'queue_hostname', now - retention)]  # type: List[Tuple[Any, str, datetime]]
+    for model, key in _DB_QUEUE.items():
+        tables.append((model, key, now - (TIME_CACHE or timedelta(seconds=0)) - retention))
+    for model, key, threshold in tables:
+        # select first as MySQL does not support ``LIMIT`` in subqueries
+        records = _db_operation(model
+                                .select(model.id)
+                                .where(model.timestamp.between(floor, threshold))
+                                .limit(GC_COUNT)
+                                .tuples()
+                                .execute)  # type: List[Tuple[int]]
+        if records:
+            removed[key] = _db_operation(model
+                                         .delete()
+                                         .where(model.id.in_([record[0] for record in records]))
+                                         .execute)
+
+    if removed:
+        logger.info('[GC] Removed %s', ', '.join(f'{count} {key}' for key, count in removed.items()))
+    return removed
+
+
+#: Magic number of the frontier dump, c.f. :func:`~darc.db.export_queues`.
+FRONTIER_MAGIC = b'DF'
+#: Version number of the frontier dump.
+FRONTIER_VERSION = 1
+#: Header of each record in the frontier dump, i.e. the index of the
+#: task queue in :data:`~darc.db.FRONTIER_QUEUES`, the score (as a
+#: double) and the length of the payload, in network byte order.
+_FRONTIER_RECORD = struct.Struct('>BdI')
+#: Task queues in the frontier dump, indexed as in the records.
+FRONTIER_QUEUES = ('queue_hostname', 'queue_requests', 'queue_selenium')
+
+
+def export_queues(file: 'BinaryIO', queues: 'Iterable[str]' = FRONTIER_QUEUES) -> 'Dict[str, int]':
+    """Export the task queues to a frontier dump.
+
+    The dump is an append-only stream of records, starting with
+    :data:`~darc.db.FRONTIER_MAGIC` and :data:`~darc.db.FRONTIER_VERSION`;
+    each record consists of a header (c.f. :data:`~darc.db._FRONTIER_RECORD`)
+    and the payload, i.e. the hostname for ``queue_hostname``, or the
+    serialised link (c.f. :func:`~darc.link.dumps_link`) for ``queue_requests``
+    and ``queue_selenium``. Dumps can thus be concatenated, and a dump
+    truncated in the middle remains readable up to its last record.
+
+    The task queues are walked in chunks of :data:`~darc.db.BULK_SIZE`
+    (``ZSCAN`` for Redis, keyset pagination for RDS), such that memory
+    use stays constant regardless of the sizes of the task queues.
 
     Args:
-        check: If perform checks on loaded links,
-            default to :data:`~darc.const.CHECK`.
+        file: Binary file to write the dump to.
+        queues: Names of the task queues to export,
+            c.f. :data:`~darc.db.FRONTIER_QUEUES`.
 
     Returns:
-        List of loaded links from the :mod:`selenium` database.
+        Numbers of records exported per task queue.
 
     Note:
-        At runtime, the function will load links with maximum number
-        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+        Links are exported with their current scores. Leases and
+        failure counters are not exported, i.e. leased links will be
+        due upon the expiry of their leases once imported.
 
     See Also:
-        * :func:`darc.db._load_selenium_db`
-        * :func:`darc.db._load_selenium_redis`
+        * :func:`darc.db.import_queues`
+        * :func:`darc.db._iter_queue_db`
+        * :func:`darc.db._iter_queue_redis`
 
     """
-    if FLAG_DB:
-        with database.connection_context():
-            try:
-                link_pool = _load_selenium_db()
-            except Exception:
-                logger.pexc(LOG_WARNING, category=DatabaseOperaionFailed, line='_load_selenium_db()')
-                link_pool = []
-    else:
-        link_pool = _load_selenium_redis()
+    counts = {}  # type: Dict[str, int]
+    file.write(FRONTIER_MAGIC + bytes((FRONTIER_VERSION,)))
+    for key in queues:
+        index = FRONTIER_QUEUES.index(key)
+        counts[key] = 0
+
+        if FLAG_DB:
+            with database.connection_context():
+                for chunk in _iter_queue_db(key):  # type: ignore[arg-type]
+                    counts[key] += _write_records(file, index, chunk)
+        else:
+            for chunk in _iter_queue_redis(key):  # type: ignore[arg-type]
+                counts[key] += _write_records(file, index, chunk)
+        logger.info('[EXPORT] Exported %d records from %s', counts[key], key)
+    return counts
 
-    if check:
-        link_pool = _check(link_pool)
 
-    logger.plog(LOG_VERBOSE, '-*- [SELENIUM] LINK POOL -*-',
-                object=sorted(link.url for link in link_pool))
-    return link_pool
+def _write_records(file: 'BinaryIO', index: int, chunk: 'List[Tuple[float, bytes]]') -> int:
+    """Write a chunk of records to a frontier dump.
 
+    Args:
+        file: Binary file to write the dump to.
+        index: Index of the task queue, c.f. :data:`~darc.db.FRONTIER_QUEUES`.
+        chunk: Scores and payloads of the records.
 
-def _load_selenium_db() -> 'List[Link]':
-    """Load link from the :mod:`selenium` database.
+    Returns:
+        Number of records written.
 
-    The function reads the :class:`~darc.model.tasks.selenium.SeleniumQueueModel` table.
+    """
+    file.write(b''.join(_FRONTIER_RECORD.pack(index, score, len(payload)) + payload
+                        for score, payload in chunk))
+    return len(chunk)
 
-    Returns:
-        List of loaded links from the :mod:`selenium` database.
+
+def _iter_queue_redis(key: 'Literal["queue_hostname", "queue_requests", "queue_selenium"]') -> 'Iterator[List[Tuple[float, bytes]]]':  # pylint: disable=line-too-long
+    """Walk a task queue in Redis.
+
+    Args:
+        key: Name of the task queue.
+
+    Yields:
+        Chunks of scores and payloads of the records in the task
+        queue, c.f. :func:`~darc.db.export_queues`. Members without
+        payloads (i.e. orphaned) are skipped.
 
     Note:
-        At runtime, the function will load links with maximum number
-        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+        ``ZSCAN`` may return a member more than once if the sorted
+        set is rehashed in the meanwhile, which is harmless as the
+        import is idempotent. Links being delivered through the
+        streams (c.f. :data:`~darc.db.REDIS_QUEUE`) are exported as
+        if leased, i.e. due after :data:`~darc.db.LEASE_TIMEOUT`.
+        Links spilled to the overflow tier (c.f. :data:`~darc.db.OVERFLOW_HIGH`)
+        are exported along with each shard.
 
     """
-    now = datetime.now()
-    if TIME_CACHE is None:
-        sec_delta = timedelta(seconds=0)
-        max_score = now
+    shards = [None] if key == 'queue_hostname' else _redis_shards(key)  # type: ignore[arg-type]
+    lease = time.time() + LEASE_TIMEOUT - (TIME_CACHE.total_seconds() if TIME_CACHE is not None else 0)
+    for shard in shards:
+        queue = _shard_key(key, shard)
+        prefix = _payload_prefix(shard)
+
+        cursor = 0
+        while True:
+            cursor, members = _redis_command('zscan', queue, cursor, count=BULK_SIZE)  # type: int, List[Tuple[bytes, float]] # pylint: disable=line-too-long
+            # links being delivered through the streams, c.f. :data:`~darc.db.REDIS_QUEUE`
+            members = [(member, score if math.isfinite(score) else lease) for member, score in members]
+            if members and key == 'queue_hostname':
+                yield [(score, member) for member, score in members]
+            elif members:
+                payloads = _payload_get(prefix, [member.decode() for member, _ in members])
+                chunk = []  # type: List[Tuple[float, bytes]]
+                for (member, score), payload in zip(members, payloads):
+                    if payload is None:
+                        continue
+                    if not payload.startswith(LINK_MAGIC):
+                        # legacy pickled payloads
+                        try:
+                            payload = dumps_link(loads_link(payload))
+                        except Exception:
+                            logger.warning('[EXPORT] Skipped malformed payload of %s', member.decode())
+                            continue
+                    chunk.append((score, payload))
+                yield chunk
+            if not cursor:
+                break
+
+        if OVERFLOW_HIGH > 0 and key != 'queue_hostname':
+            yield from _iter_overflow(queue)
+
+
+def _iter_overflow(queue: str) -> 'Iterator[List[Tuple[float, bytes]]]':
+    """Walk the overflow tier of a task queue shard.
+
+    Args:
+        queue: Name of the task queue shard.
+
+    Yields:
+        Chunks of scores and payloads of the links spilled from
+        the shard, c.f. :func:`~darc.db._overflow_spill`.
+
+    """
+    last = 0
+    with database.connection_context():
+        while True:
+            records = _db_operation(OverflowQueueModel
+                                    .select(OverflowQueueModel.id, OverflowQueueModel.timestamp,
+                                            OverflowQueueModel.link)
+                                    .where((OverflowQueueModel.queue == queue) & (OverflowQueueModel.id > last))
+                                    .order_by(OverflowQueueModel.id)
+                                    .limit(BULK_SIZE)
+                                    .tuples()
+                                    .execute)  # type: List[Tuple[int, datetime, Link]]
+            if not records:
+                break
+            last = records[-1][0]
+            yield [(timestamp.timestamp(), dumps_link(link)) for _, timestamp, link in records]
+
+
+def _iter_queue_db(key: 'Literal["queue_hostname", "queue_requests", "queue_selenium"]') -> 'Iterator[List[Tuple[float, bytes]]]':  # pylint: disable=line-too-long
+    """Walk a task queue in RDS.
+
+    The table is paginated by the primary key, such that each chunk
+    costs one indexed query whatever the offset.
+
+    Args:
+        key: Name of the task queue.
+
+    Yields:
+        Chunks of scores and payloads of the records in the task
+        queue, c.f. :func:`~darc.db.export_queues`.
+
+    """
+    if key == 'queue_hostname':
+        model = HostnameQueueModel  # type: Any
+        field = HostnameQueueModel.hostname
     else:
-        sec_delta = TIME_CACHE
-        max_score = now - sec_delta
-
-    with database.atomic():
-        query = _db_operation(
-            SeleniumQueueModel
-            .select(SeleniumQueueModel.link)
-            .where(SeleniumQueueModel.timestamp <= max_score)
-            .order_by(SeleniumQueueModel.timestamp)
-            .limit(MAX_POOL)
-            .query
-        )  # type: List[SeleniumQueueModel]
-        link_pool = [model.link for model in query]
-
-        # force update records
-        if TIME_CACHE is not None:
-            new_score = (now + sec_delta).timestamp()
-            _save_selenium_db(link_pool, score=new_score)
-    return link_pool
+        model = {name: model for model, name in _DB_QUEUE.items()}[key]
+        field = model.link
 
+    last = 0
+    while True:
+        records = _db_operation(model
+                                .select(model.id, model.timestamp, field)
+                                .where(model.id > last)
+                                .order_by(model.id)
+                                .limit(BULK_SIZE)
+                                .tuples()
+                                .execute)  # type: List[Tuple[int, datetime, Any]]
+        if not records:
+            break
+        last = records[-1][0]
+
+        if key == 'queue_hostname':
+            yield [(timestamp.timestamp(), hostname.encode()) for _, timestamp, hostname in records]
+        else:
+            yield [(timestamp.timestamp(), dumps_link(link)) for _, timestamp, link in records]
 
-def _load_selenium_redis() -> 'List[Link]':
-    """Load link from the :mod:`selenium` database.
 
-    The function reads the ``queue_selenium`` database.
+def _read_records(file: 'BinaryIO') -> 'Iterator[Tuple[str, float, bytes]]':
+    """Read records from a frontier dump.
 
     Args:
-        check: If perform checks on loaded links,
-            default to :data:`~darc.const.CHECK`.
+        file: Binary file to read the dump from.
 
-    Returns:
-        List of loaded links from the :mod:`selenium` database.
+    Yields:
+        Name of the task queue, score and payload of each record.
+
+    Raises:
+        ValueError: If the dump is malformed.
 
     Note:
-        At runtime, the function will load links with maximum number
-        at :data:`~darc.db.MAX_POOL` to limit the memory usage.
+        Since the indexes of the task queues never collide with the
+        first byte of :data:`~darc.db.FRONTIER_MAGIC`, headers of
+        concatenated dumps are recognised between records. A record
+        truncated at the end of the dump is discarded.
 
     """
-    now = time.time()
-    if TIME_CACHE is None:
-        sec_delta = 0  # type: float
-        max_score = now
+    version = None  # type: Optional[int]
+    while True:
+        tag = file.read(1)
+        if not tag:
+            return
+
+        if tag == FRONTIER_MAGIC[:1]:
+            head = tag + file.read(len(FRONTIER_MAGIC))
+            if not head.startswith(FRONTIER_MAGIC) or len(head) <= len(FRONTIER_MAGIC):
+                raise ValueError('malformed frontier dump')
+            version = head[-1]
+            if not 1 <= version <= FRONTIER_VERSION:
+                raise ValueError(f'unsupported frontier dump version: {version}')
+            continue
+        if version is None:
+            raise ValueError('malformed frontier dump')
+
+        header = tag + file.read(_FRONTIER_RECORD.size - 1)
+        if len(header) < _FRONTIER_RECORD.size:
+            logger.warning('[IMPORT] Discarded truncated record at the end of dump')
+            return
+        index, score, length = _FRONTIER_RECORD.unpack(header)
+        if index >= len(FRONTIER_QUEUES):
+            raise ValueError(f'unknown task queue in frontier dump: {index}')
+
+        payload = file.read(length)
+        if len(payload) < length:
+            logger.warning('[IMPORT] Discarded truncated record at the end of dump')
+            return
+        yield FRONTIER_QUEUES[index], score, payload
+
+
+def import_queues(file: 'BinaryIO', nx: bool = False) -> 'Dict[str, int]':
+    """Import the task queues from a frontier dump.
+
+    The records are read as a stream and written to the current
+    backend in bulks of :data:`~darc.db.BULK_SIZE`, such that memory
+    use stays constant regardless of the size of the dump. The
+    scores are kept as is, i.e. without priority scoring (c.f.
+    :func:`~darc.db.priority_score`), and links are sharded as
+    per current configuration (c.f. :func:`~darc.db.shard_name`).
+
+    Args:
+        file: Binary file to read the dump from,
+            c.f. :func:`~darc.db.export_queues`.
+        nx: Only create new records and not to update scores
+            of records that already exist.
+
+    Returns:
+        Numbers of records imported per task queue.
+
+    See Also:
+        * :func:`darc.db._import_db`
+        * :func:`darc.db._import_redis`
+
+    """
+    counts = {}  # type: Dict[str, int]
+    pending = {}  # type: Dict[str, List[Tuple[float, bytes]]]
+
+    def flush(key: str) -> None:
+        batch = pending.pop(key, [])
+        if not batch:
+            return
+        if FLAG_DB:
+            _import_db(key, batch, nx)  # type: ignore[arg-type]
+        else:
+            _import_redis(key, batch, nx)  # type: ignore[arg-type]
+        counts[key] = counts.get(key, 0) + len(batch)
+
+    with database.connection_context() if FLAG_DB else nullcontext():
+        for key, score, payload in _read_records(file):
+            batch = pending.setdefault(key, [])
+            batch.append((score, payload))
+            if len(batch) >= BULK_SIZE:
+                flush(key)
+        for key in FRONTIER_QUEUES:
+            flush(key)
+
+    for key, count in counts.items():
+        logger.info('[IMPORT] Imported %d records into %s', count, key)
+    return counts
+
+
+def _import_redis(key: 'Literal["queue_hostname", "queue_requests", "queue_selenium"]',
+                  batch: 'List[Tuple[float, bytes]]', nx: bool = False) -> None:
+    """Import a bulk of records into a task queue in Redis.
+
+    Each bulk costs only one network round trip,
+    c.f. :func:`~darc.db._redis_pipeline`.
+
+    Args:
+        key: Name of the task queue.
+        batch: Scores and payloads of the records.
+        nx: Only create new records.
+
+    """
+    if key == 'queue_hostname':
+        mapping = {payload.decode(): score for score, payload in batch}
+
+        with _redis_get_lock(key):
+            _redis_command('zadd', key, mapping, nx=nx)
+        return
+
+    shards = {}  # type: Dict[Optional[str], List[Tuple[float, Link, bytes]]]
+    for score, payload in batch:
+        link = loads_link(payload)
+        shards.setdefault(shard_name(link), []).append((score, link, payload))
+
+    def restore(pipeline: 'Pipeline') -> None:
+        for shard, entries in shards.items():
+            prefix = _payload_prefix(shard)
+            for _, link, payload in entries:
+                _payload_set(pipeline, prefix, link.name, payload)
+            pipeline.zadd(_shard_key(key, shard), {
+                link.name: score for score, link, _ in entries
+            }, nx=nx)
+        if SHARD_NUM > 0:
+            pipeline.sadd(_registry_key(key), *shards)  # type: ignore[arg-type]
+
+    with _redis_get_lock(key):
+        _redis_pipeline(restore)
+
+
+def _import_db(key: 'Literal["queue_hostname", "queue_requests", "queue_selenium"]',
+               batch: 'List[Tuple[float, bytes]]', nx: bool = False) -> None:
+    """Import a bulk of records into a task queue in RDS.
+
+    Args:
+        key: Name of the task queue.
+        batch: Scores and payloads of the records.
+        nx: Only create new records.
+
+    """
+    if key == 'queue_hostname':
+        model = HostnameQueueModel  # type: Any
+        rows = [{
+            'hostname': payload.decode(),
+            'timestamp': datetime.fromtimestamp(score),
+        } for score, payload in batch]  # type: List[Dict[str, Any]]
     else:
-        sec_delta = TIME_CACHE.total_seconds()
-        max_score = now - sec_delta
+        model = {name: model for model, name in _DB_QUEUE.items()}[key]
+        rows = []
+        for score, payload in batch:
+            link = loads_link(payload)
+            rows.append({
+                'text': link.url,
+                'hash': link.name,
+                'link': link,
+                'timestamp': datetime.fromtimestamp(score),
+                'shard': shard_name(link),
+            })
 
-    try:
-        with _redis_get_lock('queue_selenium'):
-            temp_pool = [_redis_command('get', name) for name in _redis_command('zrangebyscore', 'queue_selenium',
-                                                                                min=0, max=max_score, start=0, num=MAX_POOL)]  # type: List[bytes] # pylint: disable=line-too-long
-            link_pool = [pickle.loads(link) for link in filter(None, temp_pool)]  # nosec: B301
-            if TIME_CACHE is not None:
-                new_score = now + sec_delta
-                _save_selenium_redis(link_pool, score=new_score)  # force update records
-    except pottery_exceptions.PotteryError:
-        logger.pexc(LOG_WARNING, f'[SELENIUM] Failed to acquire Redis lock after {LOCK_TIMEOUT} second(s)',
-                    LockWarning, "_redis_get_lock('queue_selenium')")
-        link_pool = []
-    return link_pool
+    with _db_transaction():
+        if nx:
+            _db_operation(model.insert_many(rows).on_conflict_ignore().execute)
+        else:
+            _db_operation(model.replace_many(rows).execute)
@@ -9,7 +9,9 @@ required to identify a URL's proxy type, hostname, path prefix
 when saving, etc.
 
 The :mod:`~darc.link` module also provides several wrapper
-function to the :mod:`urllib.parse` module.
+function to the :mod:`urllib.parse` module, and the compact binary
+encoding of :class:`~darc.link.Link` for the task queues, c.f.
+:func:`~darc.link.dumps_link` and :func:`~darc.link.loads_link`.
 
 """
 
@@ -18,7 +20,9 @@ import dataclasses
 import functools
 import hashlib
 import os
+import pickle  # nosec: B403
 import re
+import struct
 import urllib.parse as urllib_parse
 from typing import TYPE_CHECKING
 
@@ -31,7 +35,7 @@ except NotImplementedError:
     from pathlib import PurePosixPath as PosixPath  # type: ignore[misc]
 
 if TYPE_CHECKING:
-    from typing import Any, AnyStr, Dict, Optional, Union
+    from typing import Any, AnyStr, Dict, List, Optional, Union
     from urllib.parse import ParseResult
 
     _Str = Union[bytes, str]
@@ -166,6 +170,8 @@ class Link:
         url_parse: parsed URL from :func:`urllib.parse.urlparse`
         url_backref: optional :class:`~darc.link.Link` instance
             from which current link was extracted
+        depth: number of links in the :attr:`~darc.link.Link.url_backref`
+            chain, i.e. the crawl depth
 
     Returns:
         :class:`~darc.link.Link`: Parsed link object.
@@ -195,6 +201,9 @@ class Link:
     #: optional :class:`~darc.link.Link` instance
     #: from which current link was extracted
     url_backref: 'Optional[Link]' = None
+    #: number of links in the :attr:`~darc.link.Link.url_backref`
+    #: chain, i.e. the crawl depth
+    depth: int = 0
 
     def __hash__(self) -> int:
         """Provide hash support to the :class:`~darc.link.Link` object."""
@@ -213,6 +222,32 @@ class Link:
             return self.url < value.url
         raise TypeError(f"'<' not supported between instances of 'Link' and {type(value).__name__!r}")
 
+    def __getattr__(self, name: str) -> 'Any':
+        """Derive fields deferred by :func:`~darc.link.loads_link`.
+
+        The fields are derived from :attr:`~darc.link.Link.url` upon
+        first access, then cached as instance attributes.
+
+        """
+        if name not in _LINK_DEFERRED:
+            raise AttributeError(name)
+
+        if name == 'name':
+            self.name = hashlib.sha256(self.url.encode()).hexdigest()
+        elif name == 'url_parse':
+            self.url_parse = urlparse(self.url)
+        else:
+            # *backref* of deserialised links, c.f. :func:`~darc.link._deferred_link`
+            link = parse_link(self.url)
+            for field in _LINK_DEFERRED:
+                self.__dict__.setdefault(field, getattr(link, field))
+        return self.__dict__[name]
+
+    def __setstate__(self, state: 'Dict[str, Any]') -> None:
+        """Unpickle the :class:`~darc.link.Link` object, without
+        falling back to :meth:`Link.__getattr__ <darc.link.Link.__getattr__>`."""
+        self.__dict__.update(state)
+
     def asdict(self) -> 'Dict[str, Any]':
         """Convert to a :obj:`dict` instance."""
         return {
@@ -225,6 +260,28 @@ class Link:
         }
 
 
+#: Fields of :class:`~darc.link.Link` which can be derived
+#: from the URL, c.f. :meth:`Link.__getattr__ <darc.link.Link.__getattr__>`.
+_LINK_DEFERRED = ('name', 'url_parse', 'host', 'proxy', 'base')
+
+
+def _deferred_link(url: str, **fields: 'Any') -> 'Link':
+    """Create a :class:`~darc.link.Link` object with deferred fields.
+
+    Args:
+        url: Original link.
+        **fields: Other fields of the link, any missing ones of
+            :data:`~darc.link._LINK_DEFERRED` are derived upon first access.
+
+    Returns:
+        The link object, bypassing :meth:`Link.__init__`.
+
+    """
+    link = object.__new__(Link)
+    link.__dict__.update(fields, url=url)
+    return link
+
+
 def parse_link(link: str, host: 'Optional[str]' = None, *, backref: 'Optional[Link]' = None) -> 'Link':
     """Parse link.
 
@@ -401,4 +458,125 @@ def parse_link(link: str, host: 'Optional[str]' = None, *, backref: 'Optional[Li
         base=base,
         name=name,
         proxy=proxy_type,
+        depth=0 if backref is None else backref.depth + 1,
+    )
+
+
+#: Magic prefix of serialised :class:`~darc.link.Link` objects.
+LINK_MAGIC = b'DL'
+#: Current version of the :class:`~darc.link.Link` encoding.
+LINK_VERSION = 2
+
+#: Length prefix of serialised fields.
+_LINK_LENGTH = struct.Struct('>I')
+#: Length prefix of :data:`None` fields.
+_LINK_NONE = 0xFFFFFFFF
+
+
+def _dump_field(value: 'Optional[str]') -> bytes:
+    """Serialise a length-prefixed string field."""
+    if value is None:
+        return _LINK_LENGTH.pack(_LINK_NONE)
+    data = value.encode('utf-8', 'surrogatepass')
+    return _LINK_LENGTH.pack(len(data)) + data
+
+
+def _load_fields(data: bytes, offset: int) -> 'List[Optional[str]]':
+    """Deserialise length-prefixed string fields from ``offset``."""
+    fields = []  # type: List[Optional[str]]
+    while offset < len(data):
+        length, = _LINK_LENGTH.unpack_from(data, offset)
+        offset += _LINK_LENGTH.size
+        if length == _LINK_NONE:
+            fields.append(None)
+            continue
+        fields.append(data[offset:offset + length].decode('utf-8', 'surrogatepass'))
+        offset += length
+    return fields
+
+
+def dumps_link(link: 'Link') -> bytes:
+    """Serialise a :class:`~darc.link.Link` object.
+
+    Args:
+        link: Link to be serialised.
+
+    Returns:
+        Compact binary representation of ``link``.
+
+    The encoding consists of :data:`~darc.link.LINK_MAGIC`, a one-byte
+    version number (c.f. :data:`~darc.link.LINK_VERSION`) and the
+    following length-prefixed (unsigned 32-bit big-endian) UTF-8 fields:
+
+    1. :attr:`~darc.link.Link.host`
+    2. :attr:`~darc.link.Link.proxy`
+    3. :attr:`~darc.link.Link.base`, relative to :data:`~darc.const.PATH_DB`
+    4. :attr:`~darc.link.Link.url`
+    5. :attr:`url <darc.link.Link.url>` of :attr:`~darc.link.Link.url_backref`
+    6. :attr:`~darc.link.Link.depth`, as decimal digits (since version 2)
+
+    Unlike :func:`pickle.dumps`, only the URL of the direct *backref*
+    is kept, rather than the whole chain of ancestor links; derived
+    fields (:attr:`~darc.link.Link.name` and :attr:`~darc.link.Link.url_parse`)
+    are rebuilt upon first access after :func:`~darc.link.loads_link`.
+
+    """
+    backref = link.url_backref
+    return b''.join((
+        LINK_MAGIC, bytes((LINK_VERSION,)),
+        _dump_field(link.host),
+        _dump_field(link.proxy),
+        _dump_field(os.path.relpath(link.base, PATH_DB)),
+        _dump_field(link.url),
+        _dump_field(None if backref is None else backref.url),
+        _dump_field(str(link.depth)),
+    ))
+
+
+def loads_link(data: bytes) -> 'Link':
+    """Deserialise a :class:`~darc.link.Link` object.
+
+    Args:
+        data: Binary representation from :func:`~darc.link.dumps_link`,
+            or (legacy) pickled :class:`~darc.link.Link` object.
+
+    Returns:
+        The deserialised link object.
+
+    Raises:
+        ValueError: If ``data`` is malformed or of unknown version.
+
+    Note:
+        Pickled data from previous versions of :mod:`darc` are still
+        accepted, so that existing task queues keep working.
+
+    As most links are only passed through (e.g. claimed and dropped
+    as already crawled), :attr:`~darc.link.Link.name`,
+    :attr:`~darc.link.Link.url_parse` and the
+    :attr:`~darc.link.Link.url_backref` (but its URL) are derived
+    upon first access, c.f. :func:`~darc.link._deferred_link`.
+
+    """
+    if not data.startswith(LINK_MAGIC):
+        return pickle.loads(data)  # nosec: B301
+
+    version = data[len(LINK_MAGIC)]
+    if not 1 <= version <= LINK_VERSION:
+        raise ValueError(f'unsupported link encoding version: {version}')
+
+    fields = _load_fields(data, len(LINK_MAGIC) + 1)
+    if version == 1:
+        # version 1 has no depth, assume the backref was a seed
+        fields.append('0' if fields[-1] is None else '1')
+    host, proxy, base, url, backref, depth = fields
+    if proxy is None or base is None or url is None or depth is None:
+        raise ValueError('malformed link encoding')
+
+    return _deferred_link(
+        url,
+        url_backref=None if backref is None else _deferred_link(backref),
+        host=host,
+        base=os.path.join(PATH_DB, base),
+        proxy=proxy,
+        depth=int(depth),
     )
@@ -12,6 +12,7 @@ from darc.model.web import *
 
 __all__ = [
     'HostnameQueueModel', 'RequestsQueueModel', 'SeleniumQueueModel',
+    'QueueStatsModel', 'HostReadyModel', 'OverflowQueueModel', 'WorkerModel',
 
     'HostnameModel', 'URLModel', 'URLThroughModel',
     'RobotsModel', 'SitemapModel', 'HostsModel',
@@ -13,9 +13,14 @@ required for the task queue of :mod:`darc`.
 """
 
 from darc.model.tasks.hostname import HostnameQueueModel
+from darc.model.tasks.overflow import OverflowQueueModel
+from darc.model.tasks.ready import HostReadyModel
 from darc.model.tasks.requests import RequestsQueueModel
 from darc.model.tasks.selenium import SeleniumQueueModel
+from darc.model.tasks.stats import QueueStatsModel
+from darc.model.tasks.worker import WorkerModel
 
 __all__ = [
     'HostnameQueueModel', 'RequestsQueueModel', 'SeleniumQueueModel',
+    'QueueStatsModel', 'HostReadyModel', 'OverflowQueueModel', 'WorkerModel',
 ]
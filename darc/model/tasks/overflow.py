@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Overflow Tier
+-------------------
+
+.. important::
+
+   The overflow tier is only used by a `Redis`_ based task queue,
+   where the :obj:`crawler <darc.crawl.crawler>` and :obj:`loader
+   <darc.crawl.loader>` queues are bounded by :data:`darc.db.OVERFLOW_HIGH`.
+
+   .. _Redis: https://redis.io
+
+The :mod:`darc.model.tasks.overflow` model contains the data model
+defined for the cold tail of the task queues spilled from Redis.
+
+"""
+
+from typing import TYPE_CHECKING
+
+from peewee import CharField, DateTimeField, IntegerField
+
+from darc.model.abc import BaseMeta, BaseModel
+from darc.model.utils import LinkField
+
+if TYPE_CHECKING:
+    import darc.link as darc_link  # Link
+    from darc._compat import datetime
+
+__all__ = ['OverflowQueueModel']
+
+
+class OverflowQueueModel(BaseModel):
+    """Links spilled from the Redis task queues (c.f. :func:`darc.db._overflow_spill`)."""
+
+    #: Name of the task queue (or its shard), e.g. ``queue_requests{tor:3}``.
+    queue: str = CharField(max_length=255)
+    #: Sha256 hash value (c.f. :attr:`Link.name <darc.link.Link.name>`).
+    hash: str = CharField(max_length=256)
+
+    #: Serialised target :class:`~darc.link.Link` instance (c.f. :func:`~darc.link.dumps_link`).
+    link: 'darc_link.Link' = LinkField()
+    #: Score of the link in the task queue.
+    timestamp: 'datetime' = DateTimeField()
+    #: Number of past failures (c.f. :func:`darc.db.nack_requests`).
+    failures: int = IntegerField(default=0)
+
+    class Meta(BaseMeta):
+        indexes = (
+            (('queue', 'hash'), True),
+            (('queue', 'timestamp'), False),
+        )
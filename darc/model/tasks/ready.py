@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Ready Hosts
+-----------------
+
+.. important::
+
+   The ready hosts are **sorted sets** named as ``ready_requests``
+   and ``ready_selenium`` in a `Redis`_ based task queue.
+
+   .. _Redis: https://redis.io
+
+The :mod:`darc.model.tasks.ready` model contains the data model
+defined for the hosts cooling down between fetches (c.f.
+:data:`darc.db.HOST_DELAY`).
+
+"""
+
+from typing import TYPE_CHECKING
+
+from peewee import CharField, DateTimeField
+
+from darc.model.abc import BaseMeta, BaseModel
+
+if TYPE_CHECKING:
+    from darc._compat import datetime
+
+__all__ = ['HostReadyModel']
+
+
+class HostReadyModel(BaseModel):
+    """Next allowed fetch time of hosts (c.f. :func:`darc.db.load_requests`)."""
+
+    #: Name of the task queue, e.g. ``queue_requests``.
+    queue: str = CharField(max_length=255)
+    #: Hostname (c.f. :attr:`link.host <darc.link.Link.host>`).
+    hostname: str = CharField(max_length=255)
+    #: Timestamp when the host is ready to be fetched again.
+    timestamp: 'datetime' = DateTimeField()
+
+    class Meta(BaseMeta):
+        indexes = (
+            (('queue', 'hostname'), True),
+        )
@@ -16,12 +16,14 @@ defined for the :obj:`crawler <darc.crawl.crawler>` queue.
 
 from typing import TYPE_CHECKING
 
-from peewee import CharField, DateTimeField, TextField
+from peewee import CharField, DateTimeField, IntegerField, TextField
 
 from darc.model.abc import BaseModel
-from darc.model.utils import PickleField
+from darc.model.utils import LinkField
 
 if TYPE_CHECKING:
+    from typing import Optional
+
     import darc.link as darc_link  # Link
     from darc._compat import datetime
 
@@ -36,7 +38,14 @@ class RequestsQueueModel(BaseModel):
     #: Sha256 hash value (c.f. :attr:`Link.name <darc.link.Link.name>`).
     hash: str = CharField(max_length=256, unique=True)
 
-    #: Pickled target :class:`~darc.link.Link` instance.
-    link: 'darc_link.Link' = PickleField()
-    #: Timestamp of last update.
-    timestamp: 'datetime' = DateTimeField()
+    #: Serialised target :class:`~darc.link.Link` instance (c.f. :func:`~darc.link.dumps_link`).
+    link: 'darc_link.Link' = LinkField()
+    #: Timestamp of last update, or lease deadline when claimed; indexed
+    #: as the score of the record (c.f. :func:`darc.db.load_requests`).
+    timestamp: 'datetime' = DateTimeField(index=True)
+    #: Worker ID holding the lease of the record (c.f. :func:`darc.db.worker_id`).
+    lease: 'Optional[str]' = CharField(max_length=255, null=True)
+    #: Shard of the record (c.f. :func:`darc.db.shard_name`).
+    shard: 'Optional[str]' = CharField(max_length=255, null=True, index=True)
+    #: Number of past failures (c.f. :func:`darc.db.nack_requests`).
+    failures: int = IntegerField(default=0)
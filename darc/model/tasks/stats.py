@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Queue Statistics
+----------------------
+
+.. important::
+
+   The queue statistics are **hashes** named as ``stats_requests:<minute>``
+   and ``stats_selenium:<minute>`` in a `Redis`_ based task queue.
+
+   .. _Redis: https://redis.io
+
+The :mod:`darc.model.tasks.stats` model contains the data model
+defined for the per-minute throughput counters of the task queues.
+
+"""
+
+from peewee import CharField, IntegerField
+
+from darc.model.abc import BaseMeta, BaseModel
+
+__all__ = ['QueueStatsModel']
+
+
+class QueueStatsModel(BaseModel):
+    """Throughput counters of task queues (c.f. :func:`darc.db.stats`)."""
+
+    #: Name of the task queue, e.g. ``queue_requests``.
+    queue: str = CharField(max_length=255)
+    #: Minutes since epoch.
+    minute: int = IntegerField()
+
+    #: Number of links enqueued within the minute.
+    enqueued: int = IntegerField(default=0)
+    #: Number of links claimed within the minute.
+    claimed: int = IntegerField(default=0)
+
+    class Meta(BaseMeta):
+        indexes = (
+            (('queue', 'minute'), True),
+        )
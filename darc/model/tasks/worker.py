@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Live Workers
+----------------
+
+.. important::
+
+   The live workers are **sorted sets** named as ``workers_requests``
+   and ``workers_selenium`` in a `Redis`_ based task queue.
+
+   .. _Redis: https://redis.io
+
+The :mod:`darc.model.tasks.worker` model contains the data model
+defined for the heartbeats of the workers partitioning the task
+queues by host affinity (c.f. :data:`darc.db.AFFINITY`).
+
+"""
+
+from typing import TYPE_CHECKING
+
+from peewee import CharField, DateTimeField
+
+from darc.model.abc import BaseMeta, BaseModel
+
+if TYPE_CHECKING:
+    from darc._compat import datetime
+
+__all__ = ['WorkerModel']
+
+
+class WorkerModel(BaseModel):
+    """Heartbeats of live workers (c.f. :func:`darc.db._affinity_ring`)."""
+
+    #: Name of the task queue, e.g. ``queue_requests``.
+    queue: str = CharField(max_length=255)
+    #: Worker node on the hash ring (c.f. :func:`darc.db.affinity_node`).
+    worker: str = CharField(max_length=255)
+    #: Timestamp of the last heartbeat.
+    timestamp: 'datetime' = DateTimeField()
+
+    class Meta(BaseMeta):
+        indexes = (
+            (('queue', 'worker'), True),
+        )
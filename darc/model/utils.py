@@ -14,21 +14,28 @@ import json
 import pickle  # nosec
 from typing import TYPE_CHECKING
 
+import playhouse.migrate as playhouse_migrate
 from peewee import BlobField, IntegerField
 from peewee import IPField as _IPField
 from peewee import Model, make_snake_case
 from playhouse.mysql_ext import JSONField as _JSONField
 
+from darc.link import dumps_link, loads_link
+
 if TYPE_CHECKING:
     from enum import IntEnum
+
+    import darc.link as darc_link  # Link
     from ipaddress import IPv4Address, IPv6Address
-    from typing import Any, Optional, Union
+    from typing import Any, Optional, Type, Union
+
+    from peewee import Database
 
     IPAddress = Union[IPv4Address, IPv6Address]
 
-__all__ = ['table_function',
+__all__ = ['table_function', 'add_missing_columns',
            'JSONField', 'IPField',
-           'IntEnumField', 'PickleField',
+           'IntEnumField', 'PickleField', 'LinkField',
            'Proxy']
 
 
@@ -52,6 +59,61 @@ def table_function(model_class: Model) -> str:
     return make_snake_case(name)
 
 
+def add_missing_columns(database: 'Database', *models: 'Type[Model]') -> None:
+    """Add columns and indexes missing from existing tables.
+
+    The function compares the fields of each model with the columns
+    of its table, and adds the missing (nullable) columns through
+    :mod:`playhouse.migrate`, then creates the indexes of the model
+    missing from the table, so that tables created by previous
+    versions of :mod:`darc` keep working.
+
+    Args:
+        database: Database of the tables.
+        *models: Data model classes to check.
+
+    Note:
+        The function shall be called before :meth:`Database.create_tables <peewee.Database.create_tables>`,
+        which otherwise creates the indexes before their columns exist,
+        i.e. fails on PostgreSQL, or indexes the column name as a string
+        literal on SQLite. Such indexes on SQLite are recreated.
+
+    """
+    migrator = playhouse_migrate.SchemaMigrator.from_database(database)
+
+    for model in models:
+        table = model._meta.table_name  # pylint: disable=protected-access
+        if not database.table_exists(table):
+            continue
+
+        columns = {column.name for column in database.get_columns(table)}
+        added = set()
+        operations = []
+        for field in model._meta.sorted_fields:  # pylint: disable=protected-access
+            if field.column_name not in columns:
+                # indexes are created along with those of the model below
+                column = field.clone()
+                column.index = column.unique = False
+                operations.append(migrator.add_column(table, field.column_name, column))
+                added.add(field.column_name)
+
+        missing = []
+        indexes = {index.name for index in database.get_indexes(table)}
+        for index in model._meta.fields_to_index():  # pylint: disable=protected-access
+            index_columns = {getattr(expression, 'column_name', None)
+                             for expression in index._expressions}  # pylint: disable=protected-access
+            if index._name in indexes:  # pylint: disable=protected-access
+                if not index_columns & added:
+                    continue
+                operations.append(migrator.drop_index(table, index._name))  # pylint: disable=protected-access
+            missing.append(index)
+
+        if operations:
+            playhouse_migrate.migrate(*operations)
+        for index in missing:
+            database.execute(model._schema._create_index(index, safe=False))  # pylint: disable=protected-access
+
+
 class JSONField(_JSONField):
     """JSON data field."""
 
@@ -185,6 +247,43 @@ class PickleField(BlobField):
         return None
 
 
+class LinkField(BlobField):
+    """:class:`~darc.link.Link` data field.
+
+    The value is serialised through :func:`~darc.link.dumps_link`.
+
+    """
+
+    def db_value(self, value: 'Optional[darc_link.Link]') -> 'Optional[bytes]':  # pylint: disable=inconsistent-return-statements
+        """Dump the value for database storage.
+
+        Args:
+            value: Source link.
+
+        Returns:
+            Serialised bytestring data.
+
+        """
+        if value is not None:
+            value = dumps_link(value)  # type: ignore[assignment]
+        return super().db_value(value)
+
+    def python_value(self, value: 'Optional[bytes]') -> 'Optional[darc_link.Link]':  # pylint: disable=inconsistent-return-statements
+        """Load the value from database storage.
+
+        Args:
+            value: Serialised (or legacy picked) bytestring data.
+
+        Returns:
+            Original link.
+
+        """
+        value = super().python_value(value)
+        if value is not None:
+            return loads_link(bytes(value))
+        return None
+
+
 class Proxy(enum.IntEnum):
     """Proxy types supported by :mod:`darc`.
 
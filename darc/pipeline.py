@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""Crawler Pipeline
+======================
+
+The :mod:`darc.pipeline` module runs the stages of the :mod:`requests`
+crawler (c.f. :func:`darc.crawl.crawler`) concurrently, such that slow
+submissions (e.g. to :data:`~darc.const.DB_WEB` or the submission APIs)
+do not throttle fetching directly:
+
+1. *fetch* -- :func:`~darc.crawl.fetch_requests`, with
+   :data:`~darc.pipeline.PIPELINE_FETCH` threads, where links of the same
+   host are fetched in order by one thread at a time;
+2. *parse* -- :func:`~darc.crawl.parse_requests`, with
+   :data:`~darc.pipeline.PIPELINE_PARSE` threads, extracting links through
+   a pool of :data:`~darc.pipeline.PIPELINE_PROCESSES` processes if set;
+3. *persist* -- :func:`~darc.crawl.persist_requests`, with
+   :data:`~darc.pipeline.PIPELINE_PERSIST` threads.
+
+The stages are connected by queues of :data:`~darc.pipeline.PIPELINE_QUEUE`
+links each, so that a stage blocks once the next one falls behind (i.e.
+back-pressure), instead of piling up the responses in memory.
+
+The time each stage spends working, waiting for input and blocked on
+output is recorded (c.f. :class:`~darc.pipeline.StageStats`), and logged
+after each round, so as to show which stage is the bottleneck.
+
+"""
+
+import collections
+import concurrent.futures
+import dataclasses
+import os
+import queue
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from darc.crawl import fetch_requests, parse_requests, persist_requests
+from darc.db import _active_buffer, lease_owner, worker_id, write_behind
+from darc.logging import logger
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+    from queue import Queue
+    from typing import Any, Callable, Dict, Iterable, List, Optional
+
+    from darc.db import WriteBuffer
+    from darc.link import Link
+
+# run crawler as a pipeline?
+PIPELINE = bool(int(os.getenv('DARC_PIPELINE', '0')))
+
+# threads per stage
+PIPELINE_FETCH = int(os.getenv('DARC_PIPELINE_FETCH', '8'))
+PIPELINE_PARSE = int(os.getenv('DARC_PIPELINE_PARSE', '2'))
+PIPELINE_PERSIST = int(os.getenv('DARC_PIPELINE_PERSIST', '4'))
+if min(PIPELINE_FETCH, PIPELINE_PARSE, PIPELINE_PERSIST) <= 0:
+    sys.exit(f'invalid pipeline threads: {PIPELINE_FETCH}/{PIPELINE_PARSE}/{PIPELINE_PERSIST}')
+
+# queue size between stages
+PIPELINE_QUEUE = int(os.getenv('DARC_PIPELINE_QUEUE', '32'))
+if PIPELINE_QUEUE <= 0:
+    sys.exit(f'invalid pipeline queue size: {PIPELINE_QUEUE}')
+
+# processes to parse documents
+PIPELINE_PROCESSES = int(os.getenv('DARC_PIPELINE_PROCESSES', '0'))
+if PIPELINE_PROCESSES < 0:
+    sys.exit(f'invalid pipeline processes: {PIPELINE_PROCESSES}')
+
+#: Sentinel to stop the workers of a stage.
+_STOP = object()
+
+#: Process pool of the *parse* stage in current process,
+#: c.f. :func:`~darc.pipeline.parse_pool`.
+_PARSE_POOL = None  # type: Optional[ProcessPoolExecutor]
+_PARSE_LOCK = threading.Lock()
+
+
+def _reset_pool() -> None:
+    """Drop the process pool inherited from the parent process."""
+    global _PARSE_POOL  # pylint: disable=global-statement
+    _PARSE_POOL = None
+
+
+os.register_at_fork(after_in_child=_reset_pool)
+
+
+def parse_pool() -> 'Optional[ProcessPoolExecutor]':
+    """Process pool of the *parse* stage.
+
+    Returns:
+        The process pool of :data:`~darc.pipeline.PIPELINE_PROCESSES`
+        processes, created upon first use in each worker process;
+        :data:`None` if not set.
+
+    """
+    global _PARSE_POOL  # pylint: disable=global-statement
+
+    if PIPELINE_PROCESSES <= 0:
+        return None
+    with _PARSE_LOCK:
+        if _PARSE_POOL is None:
+            _PARSE_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=PIPELINE_PROCESSES)
+        return _PARSE_POOL
+
+
+@dataclasses.dataclass
+class StageStats:
+    """Statistics of a pipeline stage."""
+
+    #: Name of the stage.
+    name: str
+    #: Number of worker threads.
+    workers: int
+
+    #: Number of items processed.
+    processed: int = 0
+    #: Seconds spent working, summed over the workers.
+    busy: float = 0.0
+    #: Seconds spent waiting for the previous stage, summed over the workers.
+    starved: float = 0.0
+    #: Seconds spent blocked by the next stage, summed over the workers.
+    blocked: float = 0.0
+    #: Peak number of items queued for the stage.
+    peak: int = 0
+
+    @property
+    def utilisation(self) -> float:
+        """Ratio of time the workers spent working."""
+        total = self.busy + self.starved + self.blocked
+        return self.busy / total if total else 0.0
+
+    def merge(self, other: 'StageStats') -> None:
+        """Merge statistics of another round.
+
+        Args:
+            other: Statistics to be merged.
+
+        """
+        self.workers = max(self.workers, other.workers)
+        self.processed += other.processed
+        self.busy += other.busy
+        self.starved += other.starved
+        self.blocked += other.blocked
+        self.peak = max(self.peak, other.peak)
+
+
+#: Statistics of the stages of all rounds in current process,
+#: c.f. :func:`~darc.pipeline.pipeline_stats`.
+_PIPELINE_STATS = collections.OrderedDict()  # type: Dict[str, StageStats]
+_STATS_LOCK = threading.Lock()
+
+
+def pipeline_stats() -> 'List[StageStats]':
+    """Statistics of the pipeline stages in current process.
+
+    Returns:
+        Copies of the statistics of each stage, accumulated over the
+        rounds, in order of the stages.
+
+    """
+    with _STATS_LOCK:
+        return [dataclasses.replace(stats) for stats in _PIPELINE_STATS.values()]
+
+
+class Stage:
+    """A stage of the pipeline.
+
+    Args:
+        name: Name of the stage.
+        function: Callback to process an item from the inbox, returning
+            (or yielding) the items to be put into the outbox; :data:`None`
+            items are skipped.
+        workers: Number of worker threads.
+        inbox: Queue of items to be processed.
+        outbox: Queue of the next stage, if any.
+
+    """
+
+    def __init__(self, name: str, function: 'Callable[[Any], Iterable[Any]]', workers: int,
+                 inbox: 'Queue[Any]', outbox: 'Optional[Queue[Any]]' = None) -> None:
+        self.function = function
+        self.inbox = inbox
+        self.outbox = outbox
+
+        #: Statistics of the stage in current round.
+        self.stats = StageStats(name=name, workers=workers)
+        self._lock = threading.Lock()
+        self._threads = []  # type: List[threading.Thread]
+
+    def start(self, buffer: 'Optional[WriteBuffer]', owner: str) -> None:
+        """Start the worker threads.
+
+        Args:
+            buffer: Write-behind buffer of the worker running the pipeline,
+                c.f. :func:`~darc.db.write_behind`.
+            owner: Worker ID of the worker running the pipeline, which
+                holds the leases of the links, c.f. :func:`~darc.db.lease_owner`.
+
+        """
+        self._threads = [threading.Thread(target=self._run, args=(buffer, owner), daemon=True)
+                         for _ in range(self.stats.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Wait for the worker threads to drain the inbox."""
+        for _ in self._threads:
+            self.inbox.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self, buffer: 'Optional[WriteBuffer]', owner: str) -> None:
+        """Process items from the inbox till stopped.
+
+        Args:
+            buffer: Write-behind buffer of the worker running the pipeline.
+            owner: Worker ID of the worker running the pipeline.
+
+        """
+        busy = starved = blocked = 0.0
+        processed = 0
+        with write_behind(buffer), lease_owner(owner):
+            while True:
+                start = time.monotonic()
+                with self._lock:
+                    self.stats.peak = max(self.stats.peak, self.inbox.qsize())
+                item = self.inbox.get()
+                starved += time.monotonic() - start
+                if item is _STOP:
+                    break
+
+                # pass on each result as soon as available
+                start = time.monotonic()
+                waited = 0.0
+                try:
+                    for result in self.function(item) or ():
+                        if result is None or self.outbox is None:
+                            continue
+                        since = time.monotonic()
+                        self.outbox.put(result)
+                        waited += time.monotonic() - since
+                except Exception:
+                    logger.ptb('[PIPELINE] Error from %s stage', self.stats.name)
+                busy += time.monotonic() - start - waited
+                blocked += waited
+                processed += 1
+
+        with self._lock:
+            self.stats.processed += processed
+            self.stats.busy += busy
+            self.stats.starved += starved
+            self.stats.blocked += blocked
+
+
+def _fetch(link_pool: 'List[Link]') -> 'Iterable[Any]':
+    """Fetch links of a host in order, c.f. :func:`~darc.crawl.fetch_requests`."""
+    for link in link_pool:
+        crawled = fetch_requests(link)
+        if crawled is not None:
+            yield crawled
+
+
+def run_pipeline(link_pool: 'List[Link]') -> 'List[StageStats]':
+    """Crawl a link pool, i.e. a *round*, through the pipeline.
+
+    Args:
+        link_pool: Links claimed from the :mod:`requests` database.
+
+    Returns:
+        Statistics of each stage in this round.
+
+    The function returns once all links are processed, so that the hook
+    functions see the whole round (c.f. :func:`darc.process.register`).
+    Task queue writes of the stages are coalesced by the write-behind
+    buffer of the worker, if any (c.f. :func:`~darc.db.write_behind`), and
+    the links are released on behalf of the worker, which claimed them
+    (c.f. :func:`~darc.db.lease_owner`).
+
+    """
+    # links of each host, in order of the pool
+    hosts = collections.defaultdict(list)  # type: Dict[Optional[str], List[Link]]
+    for link in link_pool:
+        hosts[link.host].append(link)
+
+    fetch_queue = queue.Queue()  # type: Queue[Any]
+    parse_queue = queue.Queue(maxsize=PIPELINE_QUEUE)  # type: Queue[Any]
+    persist_queue = queue.Queue(maxsize=PIPELINE_QUEUE)  # type: Queue[Any]
+
+    executor = parse_pool()
+    stages = [
+        Stage('fetch', _fetch, min(PIPELINE_FETCH, len(hosts)), fetch_queue, parse_queue),
+        Stage('parse', lambda crawled: (parse_requests(crawled, executor),), PIPELINE_PARSE,
+              parse_queue, persist_queue),
+        Stage('persist', lambda crawled: persist_requests(crawled), PIPELINE_PERSIST, persist_queue),
+    ]
+
+    buffer = _active_buffer()
+    owner = worker_id()
+    for host_pool in hosts.values():
+        fetch_queue.put(host_pool)
+    for stage in stages:
+        stage.start(buffer, owner)
+
+    # drain the stages in order
+    for stage in stages:
+        stage.stop()
+
+    with _STATS_LOCK:
+        for stage in stages:
+            stats = stage.stats
+            if stats.name not in _PIPELINE_STATS:
+                _PIPELINE_STATS[stats.name] = StageStats(name=stats.name, workers=stats.workers)
+            _PIPELINE_STATS[stats.name].merge(stats)
+
+            logger.info('[PIPELINE] %s stage: %d processed by %d worker(s), %.1f%% busy, '
+                        '%.1fs starved, %.1fs blocked, %d queued at peak',
+                        stats.name, stats.processed, stats.workers, stats.utilisation * 100,
+                        stats.starved, stats.blocked, stats.peak)
+    return [stage.stats for stage in stages]
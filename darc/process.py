@@ -8,30 +8,42 @@ logic of the :mod:`darc` module.
 
 """
 
+import asyncio
+import collections
+import concurrent.futures
+import fnmatch
 import multiprocessing
 import signal
 import threading
 import time
 from typing import TYPE_CHECKING
 
-from darc.const import DARC_CPU, DARC_WAIT, FLAG_MP, FLAG_TH, REBOOT
+import darc.aiocrawl as aiocrawl
+import darc.aiodb as aiodb
+from darc.const import (DARC_CPU, DARC_WAIT, FLAG_AIO, FLAG_MP, FLAG_TH, REBOOT, ROUND_PROXY,
+                        ROUND_THREADS)
 from darc.crawl import crawler, loader
-from darc.db import load_requests, load_selenium
+from darc.db import (GC_INTERVAL, _active_buffer, compact, flush_buffers, leave_streams, lease_owner,
+                     load_requests, load_selenium, worker_id, write_behind)
 from darc.error import HookExecutionFailed, WorkerBreak
 from darc.link import Link
 from darc.logging import WARNING as LOG_WARNING
 from darc.logging import logger
+from darc.pipeline import PIPELINE, run_pipeline
 from darc.proxy.freenet import _FREENET_BS_FLAG, freenet_bootstrap
 from darc.proxy.i2p import _I2P_BS_FLAG, i2p_bootstrap
 from darc.proxy.tor import _TOR_BS_FLAG, renew_tor_session, tor_bootstrap
 from darc.proxy.zeronet import _ZERONET_BS_FLAG, zeronet_bootstrap
-from darc.signal import exit_signal
+from darc.signal import exit_signal, exit_worker
 from darc.signal import register as register_signal
 
 if TYPE_CHECKING:
     from multiprocessing import Process
     from threading import Thread
-    from typing import Callable, List, Literal, Optional, Union
+    from concurrent.futures import Future
+    from typing import Callable, Counter, Deque, Dict, List, Literal, Optional, Union
+
+    from darc.db import WriteBuffer
 
 #: List[Union[Process, Thread]]: List of
 #: active child processes and/or threads.
@@ -75,6 +87,97 @@ def register(hook: 'Callable[[Literal["crawler", "loader"], List[Link]], None]',
         _HOOK_REGISTRY.insert(_index, hook)
 
 
+def round_limit(proxy: str) -> int:
+    """Number of round threads allowed for a proxy type.
+
+    Args:
+        proxy: Proxy type, c.f. :attr:`link.proxy <darc.link.Link.proxy>`.
+
+    Returns:
+        The limit of ``proxy`` in :data:`~darc.const.ROUND_PROXY` if
+        any, otherwise the greatest limit of the glob patterns matching
+        ``proxy``; :data:`~darc.const.ROUND_THREADS` if none.
+
+    """
+    if proxy in ROUND_PROXY:
+        return ROUND_PROXY[proxy]
+    return max((limit for pattern, limit in ROUND_PROXY.items()
+                if fnmatch.fnmatchcase(proxy, pattern)), default=ROUND_THREADS)
+
+
+def _process_host(worker: 'Callable[[Link], None]', link_pool: 'List[Link]',
+                  buffer: 'Optional[WriteBuffer]', owner: str) -> None:
+    """Process links of a host in a round thread.
+
+    Args:
+        worker: Either :func:`~darc.crawl.crawler` or :func:`~darc.crawl.loader`.
+        link_pool: Links of the same host, processed in order.
+        buffer: Write-behind buffer of the worker dispatching the links.
+        owner: Worker ID of the worker dispatching the links, which
+            holds their leases, c.f. :func:`~darc.db.lease_owner`.
+
+    """
+    with write_behind(buffer), lease_owner(owner):
+        for link in link_pool:
+            worker(link)
+
+
+def process_round(worker: 'Callable[[Link], None]', link_pool: 'List[Link]') -> None:
+    """Process a link pool, i.e. a *round*, of a worker.
+
+    If :data:`~darc.const.ROUND_THREADS` is greater than ``1``, the links
+    are processed by a pool of as many threads, where links of the same
+    host are processed in order by one thread at a time, and at most
+    :func:`~darc.process.round_limit` threads process links of the same
+    proxy type. Otherwise, the links are processed one by one.
+
+    The function returns once all links are processed, so that the hook
+    functions see the whole round (c.f. :func:`~darc.process.register`).
+    Task queue writes of the threads are coalesced by the write-behind
+    buffer of the worker, if any (c.f. :func:`~darc.db.write_behind`), and
+    the links are released on behalf of the worker, which claimed them
+    (c.f. :func:`~darc.db.lease_owner`).
+
+    Args:
+        worker: Either :func:`~darc.crawl.crawler` or :func:`~darc.crawl.loader`.
+        link_pool: Links claimed from the task queue.
+
+    """
+    if ROUND_THREADS <= 1:
+        for link in link_pool:
+            worker(link)
+        return
+
+    # links of each host, in order of the pool
+    hosts = collections.defaultdict(list)  # type: Dict[Optional[str], List[Link]]
+    for link in link_pool:
+        hosts[link.host].append(link)
+
+    buffer = _active_buffer()
+    owner = worker_id()
+    pending = collections.deque(hosts.values())  # type: Deque[List[Link]]
+    running = {}  # type: Dict[Future[None], str]
+    counter = collections.Counter()  # type: Counter[str]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(ROUND_THREADS, len(hosts))) as executor:
+        while pending or running:
+            # submit hosts within the limits of their proxy types
+            for _ in range(len(pending)):
+                if len(running) >= ROUND_THREADS:
+                    break
+                host_pool = pending.popleft()
+                proxy = host_pool[0].proxy
+                if counter[proxy] >= round_limit(proxy):
+                    pending.append(host_pool)
+                    continue
+                counter[proxy] += 1
+                running[executor.submit(_process_host, worker, host_pool, buffer, owner)] = proxy
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                counter[running.pop(future)] -= 1
+                future.result()
+
+
 def process_crawler() -> None:
     """A worker to run the :func:`~darc.crawl.crawler` process.
 
@@ -94,8 +197,11 @@ def process_crawler() -> None:
                 time.sleep(DARC_WAIT)
             continue
 
-        for link in link_pool:
-            crawler(link)
+        with write_behind():
+            if PIPELINE:
+                run_pipeline(link_pool)
+            else:
+                process_round(crawler, link_pool)
 
         time2break = False
         for hook in _HOOK_REGISTRY:
@@ -121,6 +227,115 @@ def process_crawler() -> None:
     logger.info('[CRAWLER] Stopping mainloop...')
 
 
+def process_crawler_async() -> None:
+    """A worker to run the :func:`~darc.aiocrawl.crawler` process.
+
+    The worker runs :func:`~darc.process._crawler_mainloop` in an event
+    loop, with :data:`~darc.aiocrawl.ASYNC_THREADS` threads for the
+    blocking operations.
+
+    Warns:
+        HookExecutionFailed: When hook function raises an error.
+
+    """
+    asyncio.run(_crawler_mainloop())
+
+
+async def _crawler_round(link_pool: 'List[Link]') -> bool:
+    """Crawl a link pool concurrently, i.e. a *round* of the asynchronous crawler.
+
+    Args:
+        link_pool: Links claimed from the :mod:`requests` database.
+
+    Returns:
+        If the worker is marked to break by the hook functions.
+
+    Warns:
+        HookExecutionFailed: When hook function raises an error.
+
+    """
+    await asyncio.gather(*(aiocrawl.crawler(link) for link in link_pool))
+
+    time2break = False
+    for hook in _HOOK_REGISTRY:
+        try:
+            await aiocrawl.run_in_thread(hook, 'crawler', link_pool)
+        except WorkerBreak:
+            time2break = True
+        except Exception:
+            logger.pexc(LOG_WARNING, '[CRAWLER] hook execution failed', HookExecutionFailed)
+
+    # renew Tor session
+    if not REBOOT:
+        await aiocrawl.run_in_thread(renew_tor_session)
+    return time2break
+
+
+async def _crawler_mainloop() -> None:
+    """Mainloop of the asynchronous crawler.
+
+    The mainloop keeps claiming link pools from the :mod:`requests`
+    database (c.f. :func:`darc.aiodb.load_requests`) as long as less than
+    :data:`~darc.aiocrawl.ASYNC_CONCURRENCY` links are in flight, and crawls
+    each link pool as a *round* (c.f. :func:`~darc.process._crawler_round`),
+    such that a slow round does not hold back the others.
+
+    The mainloop breaks once any round is marked to break by the hook
+    functions, or after the first round in reboot mode (c.f.
+    :data:`~darc.const.REBOOT`), and waits for the rounds in flight.
+
+    """
+    loop = asyncio.get_event_loop()
+    loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=aiocrawl.ASYNC_THREADS))
+
+    logger.info('[CRAWLER] Starting mainloop...')
+    logger.debug('[CRAWLER] Starting first round...')
+
+    # rounds in flight, mapping the sizes of their link pools
+    rounds = {}  # type: Dict[asyncio.Future[bool], int]
+    try:
+        time2break = False
+        while not time2break:
+            # requests crawler
+            link_pool = []  # type: List[Link]
+            while sum(rounds.values()) < aiocrawl.ASYNC_CONCURRENCY:
+                link_pool = await aiodb.load_requests()
+                if not link_pool:
+                    break
+                rounds[asyncio.ensure_future(_crawler_round(link_pool))] = len(link_pool)
+
+                # quit in reboot mode
+                if REBOOT:
+                    time2break = True
+                    break
+
+            if not rounds:
+                if DARC_WAIT is not None:
+                    await asyncio.sleep(DARC_WAIT)
+                continue
+            if time2break:
+                break
+
+            # check for new links periodically if the queue is drained
+            done, _ = await asyncio.wait(rounds, timeout=None if link_pool else DARC_WAIT,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                del rounds[task]
+
+                # marked to break by hook function
+                if task.result():
+                    time2break = True
+                logger.debug('[CRAWLER] Starting next round...')
+
+        if rounds:
+            await asyncio.gather(*rounds)
+    finally:
+        await aiocrawl.close()
+        await aiodb.close()
+
+    logger.info('[CRAWLER] Stopping mainloop...')
+
+
 def process_loader() -> None:
     """A worker to run the :func:`~darc.crawl.loader` process.
 
@@ -140,8 +355,8 @@ def process_loader() -> None:
                 time.sleep(DARC_WAIT)
             continue
 
-        for link in link_pool:
-            loader(link)
+        with write_behind():
+            process_round(loader, link_pool)
 
         time2break = False
         for hook in _HOOK_REGISTRY:
@@ -167,26 +382,57 @@ def process_loader() -> None:
     logger.info('[LOADER] Stopping mainloop...')
 
 
-def _process(worker: 'Union[process_crawler, process_loader]') -> None:  # type: ignore[valid-type]
+def process_compactor() -> None:
+    """A daemon to run the online garbage collection.
+
+    The function calls :func:`~darc.db.compact` every
+    :data:`~darc.db.GC_INTERVAL` seconds, until the main
+    process exits.
+
+    """
+    logger.info('[GC] Starting mainloop...')
+
+    while True:
+        try:
+            compact()
+        except Exception:
+            logger.pexc(LOG_WARNING, '[GC] garbage collection failed')
+        time.sleep(GC_INTERVAL)
+
+
+def _run_worker(worker: 'Union[process_crawler, process_crawler_async, process_loader]') -> None:  # type: ignore[valid-type]
+    """Wrapper function to run a worker process (or thread).
+
+    Upon exit, the worker leaves the consumer groups of the streams,
+    c.f. :func:`~darc.db.leave_streams`.
+
+    """
+    try:
+        worker()  # type: ignore[misc]
+    finally:
+        leave_streams()
+
+
+def _process(worker: 'Union[process_crawler, process_crawler_async, process_loader]') -> None:  # type: ignore[valid-type]
     """Wrapper function to start the worker process."""
     global _WORKER_POOL  # pylint: disable=global-statement
 
     if FLAG_MP:
-        _WORKER_POOL = [multiprocessing.Process(target=worker) for _ in range(DARC_CPU)]
+        _WORKER_POOL = [multiprocessing.Process(target=_run_worker, args=(worker,)) for _ in range(DARC_CPU)]
         for proc in _WORKER_POOL:
             proc.start()
         for proc in _WORKER_POOL:
             proc.join()
 
     elif FLAG_TH:
-        _WORKER_POOL = [threading.Thread(target=worker) for _ in range(DARC_CPU)]
+        _WORKER_POOL = [threading.Thread(target=_run_worker, args=(worker,)) for _ in range(DARC_CPU)]
         for proc in _WORKER_POOL:
             proc.start()
         for proc in _WORKER_POOL:
             proc.join()
 
     else:
-        worker()  # type: ignore[misc]
+        _run_worker(worker)
 
 
 def process(worker: 'Literal["crawler", "loader"]') -> None:
@@ -221,6 +467,12 @@ def process(worker: 'Literal["crawler", "loader"]') -> None:
           if :data:`True`, the function will be called with *multithreading*
           support; if none, the function will be called in single-threading.
 
+          If :data:`~darc.const.FLAG_AIO` is :data:`True`, the worker will be
+          :func:`~darc.process.process_crawler_async` instead, which crawls
+          the URLs concurrently through :func:`darc.aiocrawl.crawler`; if
+          :data:`~darc.pipeline.PIPELINE` is :data:`True`, the URLs will be
+          crawled through :func:`darc.pipeline.run_pipeline` instead.
+
     2. :func:`~darc.crawl.crawler`: parse the URL using
        :func:`~darc.link.parse_link`, and check if need to crawl the
        URL (c.f. :data:`~darc.const.PROXY_WHITE_LIST`, :data:`~darc.const.PROXY_BLACK_LIST`
@@ -301,19 +553,36 @@ def process(worker: 'Literal["crawler", "loader"]') -> None:
        extract all possible links from the HTML document and save such
        links into the :mod:`requests` database (c.f. :func:`~darc.db.save_requests`).
 
+    Within each *round*, writes of the worker to the task queues are buffered
+    and flushed in bulk (c.f. :func:`~darc.db.write_behind`), if
+    :data:`~darc.db.BUFFER_SIZE` is positive. The buffers are flushed as well
+    upon ``SIGINT`` and ``SIGTERM`` (c.f. :func:`~darc.db.flush_buffers`), by
+    each worker process before it exits (c.f. :func:`~darc.signal.exit_worker`).
+
     After each *round*, :mod:`darc` will call registered hook functions in
     sequential order, with the type of worker (``'crawler'`` or ``'loader'``)
     and the current link pool as its parameters, see :func:`~darc.process.register`
     for more information.
 
+    If :data:`~darc.db.GC_INTERVAL` is set, :func:`~darc.process.process_compactor`
+    will run in a daemon thread alongside the workers, to garbage collect the
+    task queues incrementally (c.f. :func:`~darc.db.compact`).
+
     If in reboot mode, i.e. :data:`~darc.const.REBOOT` is :data:`True`, the function
     will exit after first round. If not, it will renew the Tor connections (if
     bootstrapped), c.f. :func:`~darc.proxy.tor.renew_tor_session`, and start
     another round.
 
     """
+    register_signal(signal.SIGINT, flush_buffers)
+    register_signal(signal.SIGTERM, flush_buffers)
     register_signal(signal.SIGINT, exit_signal)
     register_signal(signal.SIGTERM, exit_signal)
+    # worker processes flush their own buffers before exit
+    register_signal(signal.SIGINT, flush_buffers, worker=True)
+    register_signal(signal.SIGTERM, flush_buffers, worker=True)
+    register_signal(signal.SIGINT, exit_worker, worker=True)
+    register_signal(signal.SIGTERM, exit_worker, worker=True)
     #register_signal(signal.SIGKILL, exit_signal)
 
     logger.info('[DARC] Starting %s...', worker)
@@ -327,8 +596,11 @@ def process(worker: 'Literal["crawler", "loader"]') -> None:
     if not _FREENET_BS_FLAG:
         freenet_bootstrap()
 
+    if GC_INTERVAL is not None:
+        threading.Thread(target=process_compactor, daemon=True).start()
+
     if worker == 'crawler':
-        _process(process_crawler)
+        _process(process_crawler_async if FLAG_AIO else process_crawler)
     elif worker == 'loader':
         _process(process_loader)
     else:
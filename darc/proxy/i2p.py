@@ -359,4 +359,4 @@ def fetch_hosts(link: 'darc_link.Link', force: bool = False) -> None:
     from darc.db import save_requests  # pylint: disable=import-outside-toplevel
 
     # add link to queue
-    save_requests(read_hosts(link, hosts_text))
+    save_requests(read_hosts(link, hosts_text), source='text')
@@ -329,4 +329,4 @@ def fetch_sitemap(link: 'darc_link.Link', force: bool = False) -> None:
         sitemaps.extend(get_sitemap(sitemap_link, sitemap_text, host=link.host))
 
         # add link to queue
-        save_requests(read_sitemap(link, sitemap_text))
+        save_requests(read_sitemap(link, sitemap_text), source='sitemap')
@@ -15,7 +15,7 @@ import signal
 from typing import TYPE_CHECKING, cast
 
 from darc._compat import strsignal
-from darc.const import FLAG_MP, FLAG_TH, PATH_ID, getpid
+from darc.const import EXIT_TIMEOUT, FLAG_MP, FLAG_TH, PATH_ID, getpid
 from darc.logging import logger
 
 __all__ = ['register']
@@ -31,11 +31,18 @@ if TYPE_CHECKING:
 #: List of registered custom signal handlers.
 _HANDLER_REGISTRY = collections.defaultdict(list)  # type: Dict[int, List[Callable[[Optional[Union[int, Signals]], Optional[FrameType]], Any]]] # pylint: disable=line-too-long
 
+#: Dict[int, List[Callable[[Optional[Union[int, Signals]], Optional[FrameType]], Any]]]:
+#: List of registered custom signal handlers of the worker processes.
+_WORKER_REGISTRY = collections.defaultdict(list)  # type: Dict[int, List[Callable[[Optional[Union[int, Signals]], Optional[FrameType]], Any]]] # pylint: disable=line-too-long
+
+#: bool: If the main process is exiting, c.f. :func:`~darc.signal.exit_signal`.
+_EXITING = False
+
 
 def register(
         signum: 'Union[int, Signals]',
         handler: 'Callable[[Optional[Union[int, Signals]], Optional[FrameType]], Any]', *,
-        _index: 'Optional[int]' = None
+        worker: bool = False, _index: 'Optional[int]' = None
     ) -> 'Union[Callable[[Signals, FrameType], Any], int, Handlers, None]':
     """Register signal handler.
 
@@ -44,11 +51,15 @@ def register(
         handler: The signal handler function to be registered with :func:`signal.signal`.
 
     Keyword Args:
+        worker: If the handler is to be called in the worker processes,
+            after the signal is transferred to the main process, instead
+            of in the main process.
         _index: Position index for the signal handler function.
 
     See Also:
         The signal handler functions will be saved into
-        :data:`~darc.signal._HANDLER_REGISTRY`.
+        :data:`~darc.signal._HANDLER_REGISTRY`, or
+        :data:`~darc.signal._WORKER_REGISTRY` if ``worker`` is set.
 
     """
     if isinstance(signum, enum.Enum):
@@ -56,10 +67,11 @@ def register(
     else:
         sigint = signum
 
+    registry = _WORKER_REGISTRY if worker else _HANDLER_REGISTRY
     if _index is None:
-        _HANDLER_REGISTRY[sigint].append(handler)
+        registry[sigint].append(handler)
     else:
-        _HANDLER_REGISTRY[sigint].insert(_index, handler)
+        registry[sigint].insert(_index, handler)
     return signal.signal(signum, generic_handler)
 
 
@@ -68,7 +80,9 @@ def generic_handler(signum: 'Optional[Union[int, Signals]]' = None,
     """Generic signal handler.
 
     If the current process is not the main process, the function
-    shall transfer the signal to the main process.
+    shall transfer the signal to the main process, then call all
+    registered signal handlers from the :data:`~darc.signal._WORKER_REGISTRY`
+    mapping, if any, with further registered signals ignored.
 
     The function is to be registered through :func:`signal.signal`
     and calls all registered signal handlers from the
@@ -85,15 +99,22 @@ def generic_handler(signum: 'Optional[Union[int, Signals]]' = None,
     if signum is None:
         return
 
-    if os.getpid() != (pid := getpid()):
-        os.kill(pid, signum)
-        return
-
     if isinstance(signum, enum.Enum):
         sigint = signum.value
     else:
         sigint = signum
 
+    if os.getpid() != (pid := getpid()):
+        handlers = _WORKER_REGISTRY[sigint]
+        if handlers:
+            # handle only once, e.g. the main process sends SIGTERM upon exit
+            for worker_signum in _WORKER_REGISTRY:
+                signal.signal(worker_signum, signal.SIG_IGN)
+        os.kill(pid, signum)
+        for func in handlers:
+            func(signum, frame)
+        return
+
     for func in _HANDLER_REGISTRY[sigint]:
         func(signum, frame)
 
@@ -108,8 +129,9 @@ def exit_signal(signum: 'Optional[Union[int, Signals]]' = None,
                  frame: 'Optional[FrameType]' = None) -> None:
     """Handler for exiting signals.
 
-    If the current process is not the main process, the function
-    shall transfer the signal to the main process.
+    The worker processes are sent ``SIGTERM``, so that they can flush
+    their buffers and exit (c.f. :func:`~darc.signal.exit_worker`), and
+    are killed if not exited within :data:`~darc.const.EXIT_TIMEOUT` seconds.
 
     Args:
         signum: The signal to handle.
@@ -119,11 +141,24 @@ def exit_signal(signum: 'Optional[Union[int, Signals]]' = None,
         * :func:`darc.const.getpid`
 
     """
+    global _EXITING  # pylint: disable=global-statement
+
+    # the signal transferred from the worker processes upon exit
+    if _EXITING:
+        return
+    _EXITING = True
+
     from darc.process import _WORKER_POOL  # pylint: disable=import-outside-toplevel
     if FLAG_MP and _WORKER_POOL:
         for proc in cast('List[Process]', _WORKER_POOL):
-            proc.kill()
-            proc.join()
+            if proc.is_alive():
+                proc.terminate()
+        for proc in cast('List[Process]', _WORKER_POOL):
+            proc.join(EXIT_TIMEOUT)
+            if proc.is_alive():
+                logger.warning('[DARC] Killing worker process %s', proc.pid)
+                proc.kill()
+                proc.join()
 
     if FLAG_TH and _WORKER_POOL:
         for thrd in cast('List[Thread]', _WORKER_POOL):
@@ -138,3 +173,29 @@ def exit_signal(signum: 'Optional[Union[int, Signals]]' = None,
     except Exception:
         sig = signum
     logger.info('[DARC] Exit with signal: %s <%s>', sig, frame)
+
+
+def exit_worker(signum: 'Optional[Union[int, Signals]]' = None,
+                frame: 'Optional[FrameType]' = None) -> None:  # pylint: disable=unused-argument
+    """Handler for exiting signals in the worker processes.
+
+    The function is to be registered with ``worker`` set, c.f.
+    :func:`~darc.signal.register`, after the handlers to clean up
+    the worker, e.g. :func:`~darc.db.flush_buffers`.
+
+    Args:
+        signum: The signal to handle.
+        frame (types.FrameType): The traceback frame from the signal.
+
+    Raises:
+        SystemExit: To exit the worker process, unless deferred till
+            the write-behind buffer being flushed by the interrupted
+            thread is flushed, c.f. :func:`~darc.db.defer_exit`.
+
+    """
+    from darc.db import defer_exit  # pylint: disable=import-outside-toplevel
+
+    status = 128 + int(signum or 0)
+    if defer_exit(status):
+        return
+    raise SystemExit(status)
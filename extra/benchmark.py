@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# pylint: disable=ungrouped-imports,import-outside-toplevel
+"""Benchmarks for the :mod:`darc.db` task queues.
+
+.. warning::
+
+   The benchmarks write to (and clean up) the task queues of the
+   given Redis server (or the database for benchmarks listed in
+   :data:`DATABASE`), please **ONLY** run them against a scratch
+   instance. Benchmarks listed in :data:`OFFLINE` do not connect
+   to Redis at all, and those listed in :data:`EMBEDDED` fall back
+   to the embedded SQLite database under ``PATH_DATA``.
+
+"""
+
+import argparse
+import collections
+import contextlib
+import datetime
+import os
+import pickle  # nosec: B403
+import statistics
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser, Namespace
+    from typing import Callable, Counter, Dict, Iterator, List
+
+    from darc.link import Link
+
+#: Number of network round trips issued, c.f. :func:`count_round_trips`.
+ROUND_TRIPS = 0
+
+
+@contextlib.contextmanager
+def count_round_trips() -> 'Iterator[None]':
+    """Count network round trips sent through :mod:`redis` connections.
+
+    Each call to :meth:`Connection.send_packed_command <redis.connection.Connection.send_packed_command>`
+    is one round trip, as a pipeline packs all its commands into one call.
+
+    """
+    global ROUND_TRIPS  # pylint: disable=global-statement
+    import redis.connection
+
+    send_packed_command = redis.connection.Connection.send_packed_command
+
+    def wrapper(self, *args, **kwargs):  # type: ignore[no-untyped-def]
+        global ROUND_TRIPS  # pylint: disable=global-statement
+        ROUND_TRIPS += 1
+        return send_packed_command(self, *args, **kwargs)
+
+    ROUND_TRIPS = 0
+    redis.connection.Connection.send_packed_command = wrapper  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        redis.connection.Connection.send_packed_command = send_packed_command  # type: ignore[assignment]
+
+
+def make_links(number: int, hosts: int = 50) -> 'List[Link]':
+    """Generate dummy links for benchmarking."""
+    from darc.link import parse_link
+
+    return [parse_link(f'http://bench{index % hosts:04d}.onion/page/{index}') for index in range(number)]
+
+
+def cleanup(links: 'List[Link]') -> None:
+    """Remove benchmark links from the task queues."""
+    from darc.db import _STREAM_GROUPS, _payload_delete, _redis_command
+    from darc.db import redis as REDIS
+
+    pipeline = REDIS.pipeline(transaction=False)
+    for link in links:
+        _payload_delete(pipeline, '', link.name)
+    pipeline.execute()
+    _redis_command('delete', 'queue_requests', 'lease_requests', 'stream_requests', 'entry_requests')
+    _STREAM_GROUPS.clear()
+
+
+def report(name: str, number: int, timing: 'List[float]', round_trips: int) -> None:
+    """Print benchmark results per 1,000 links."""
+    per_k = 1_000 / number
+    print(f'{name:>12}: {statistics.mean(timing) * per_k * 1_000:10.2f} ms / 1k links '
+          f'(stdev {statistics.pstdev(timing) * per_k * 1_000:.2f} ms), '
+          f'{round_trips * per_k:8.1f} round trips / 1k links')
+
+
+def bench(name: str, function: 'Callable[[List[Link]], None]', links: 'List[Link]', repeat: int) -> None:
+    """Run one benchmark case."""
+    timing = []  # type: List[float]
+    round_trips = 0
+    for _ in range(repeat):
+        cleanup(links)
+        with count_round_trips():
+            start = time.perf_counter()
+            function(links)
+            timing.append(time.perf_counter() - start)
+        round_trips += ROUND_TRIPS
+    cleanup(links)
+    report(name, len(links), timing, round_trips // repeat)
+
+
+def bench_enqueue(args: 'Namespace') -> None:
+    """Benchmark bulk enqueue of extracted links."""
+    import peewee
+
+    from darc.db import BULK_SIZE, _redis_command, _save_requests_redis
+
+    def legacy(links: 'List[Link]') -> None:
+        """Per-link ``SET`` and per-chunk ``ZADD`` as before."""
+        for chunk in peewee.chunked(links, BULK_SIZE):
+            pool = list(chunk)
+            for link in pool:
+                _redis_command('set', link.name, pickle.dumps(link), nx=True)
+            _redis_command('zadd', 'queue_requests', {link.name: 0 for link in pool}, nx=True)
+
+    def pipelined(links: 'List[Link]') -> None:
+        """Pipelined enqueue through :func:`darc.db._save_requests_redis`."""
+        _save_requests_redis(links, score=0, nx=True)
+
+    links = make_links(args.number)
+    print(f'enqueue {args.number} links, BULK_SIZE={BULK_SIZE}, {args.repeat} round(s)')
+    bench('legacy', legacy, links, args.repeat)
+    bench('pipelined', pipelined, links, args.repeat)
+
+
+def bench_claim(args: 'Namespace') -> None:
+    """Benchmark claiming batches of due links."""
+    from darc.db import MAX_POOL, _redis_claim, _redis_command, _save_requests_redis
+
+    def legacy(links: 'List[Link]') -> None:
+        """``ZRANGEBYSCORE``, per-name ``GET`` and re-save as before."""
+        _save_requests_redis(links, score=0, nx=True)
+        while True:
+            names = _redis_command('zrangebyscore', 'queue_requests', min=0, max=1, start=0, num=MAX_POOL)
+            pool = [pickle.loads(link) for link in filter(None, (_redis_command('get', name) for name in names))]  # nosec: B301 # pylint: disable=line-too-long
+            if not pool:
+                break
+            _save_requests_redis(pool, score=time.time())
+
+    def scripted(links: 'List[Link]') -> None:
+        """Atomic claim through :func:`darc.db._redis_claim`."""
+        _save_requests_redis(links, score=0, nx=True)
+        while _redis_claim('queue_requests'):
+            pass
+
+    links = make_links(args.number)
+    print(f'enqueue & claim {args.number} links, MAX_POOL={MAX_POOL}, {args.repeat} round(s)')
+    bench('legacy', legacy, links, args.repeat)
+    bench('scripted', scripted, links, args.repeat)
+
+
+def bench_claim_stream(args: 'Namespace') -> None:
+    """Benchmark concurrent claims from the sorted set and stream task queues."""
+    import darc.db as darc_db
+    from darc.db import MAX_POOL, _redis_claim, _release_redis, _save_requests_redis
+
+    links = make_links(args.number)
+    print(f'claim & ack {args.number} links with {args.workers} workers, MAX_POOL={MAX_POOL}, {args.repeat} round(s)')
+    for name in ('zset', 'stream'):
+        darc_db.REDIS_QUEUE = name
+
+        timing = []  # type: List[float]
+        duplicates = 0
+        for _ in range(args.repeat):
+            cleanup(links)
+            _save_requests_redis(links, score=0, nx=True)
+
+            counter = collections.Counter()  # type: Counter[str]
+            lock = threading.Lock()
+
+            def worker() -> None:
+                while True:
+                    link_pool = _redis_claim('queue_requests')
+                    if not link_pool:
+                        break
+                    with lock:  # pylint: disable=cell-var-from-loop
+                        counter.update(link.name for link in link_pool)  # pylint: disable=cell-var-from-loop
+                    for link in link_pool:
+                        # reschedule far ahead, so that the queue drains
+                        _release_redis('queue_requests', link, time.time() + 86_400)
+
+            workers = [threading.Thread(target=worker) for _ in range(args.workers)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            timing.append(time.perf_counter() - start)
+            duplicates += sum(counter.values()) - len(counter)
+
+        print(f'{name:>12}: {args.number / statistics.mean(timing):10.1f} links / s '
+              f'(stdev {statistics.pstdev(timing) * 1_000:.2f} ms), '
+              f'{duplicates / args.repeat:8.1f} duplicate claim(s) / round')
+    cleanup(links)
+
+
+def bench_codec(args: 'Namespace') -> None:
+    """Benchmark payload size and (de)serialisation of links."""
+    from darc.link import dumps_link, loads_link, parse_link
+
+    def make_chain(depth: int) -> 'Link':
+        link = parse_link('http://bench0000.onion/')
+        for index in range(depth):
+            link = parse_link(f'http://bench{index % 50:04d}.onion/page/{index}', backref=link)
+        return link
+
+    def timeit(function: 'Callable[[], object]') -> float:
+        timing = []  # type: List[float]
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for _ in range(args.number):
+                function()
+            timing.append(time.perf_counter() - start)
+        return statistics.mean(timing) * 1_000_000 / args.number
+
+    print(f'(de)serialise {args.number} links, {args.repeat} round(s)')
+    for depth in (0, 1, 5, 20):
+        link = make_chain(depth)
+        legacy, compact = pickle.dumps(link), dumps_link(link)
+        print(f'backref depth {depth:>2}: '
+              f'pickle {len(legacy):6d} B, '
+              f'dumps {timeit(lambda: pickle.dumps(link)):6.2f} us, '  # pylint: disable=cell-var-from-loop
+              f'loads {timeit(lambda: pickle.loads(legacy)):6.2f} us | '  # nosec: B301 # pylint: disable=cell-var-from-loop
+              f'compact {len(compact):4d} B, '
+              f'dumps {timeit(lambda: dumps_link(link)):6.2f} us, '  # pylint: disable=cell-var-from-loop
+              f'loads {timeit(lambda: loads_link(compact)):6.2f} us')  # pylint: disable=cell-var-from-loop
+
+
+def bench_memory(args: 'Namespace') -> None:
+    """Benchmark Redis memory of payloads in both layouts, c.f. :data:`darc.db.PAYLOAD_BUCKET`."""
+    import darc.db
+    from darc.db import _payload_bucket, _payload_set, _redis_command
+    from darc.db import redis as REDIS
+    from darc.link import dumps_link
+
+    links = make_links(args.number)
+    layout = darc.db.PAYLOAD_BUCKET
+
+    def used_memory() -> int:
+        return _redis_command('info', 'memory')['used_memory']
+
+    def encoding(key: str) -> str:
+        try:  # not retried, as ``OBJECT`` may be unavailable
+            value = REDIS.object('encoding', key)
+        except Exception:  # pylint: disable=broad-except
+            return 'n/a'
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    print(f'store {args.number} payloads, {args.repeat} round(s)')
+    try:
+        for prefix in (0, layout or 3):
+            darc.db.PAYLOAD_BUCKET = prefix
+            usage = []  # type: List[int]
+            for _ in range(args.repeat):
+                cleanup(links)
+                before = used_memory()
+                pipeline = REDIS.pipeline(transaction=False)
+                for link in links:
+                    _payload_set(pipeline, '', link.name, dumps_link(link))
+                pipeline.execute()
+                usage.append(used_memory() - before)
+            keys = _redis_command('dbsize')
+            sample = _payload_bucket('', links[0].name) if prefix else links[0].name
+            cleanup(links)
+
+            name = f'bucket:{prefix}' if prefix else 'per-key'
+            print(f'{name:>12}: {statistics.mean(usage) / args.number:10.1f} B / link '
+                  f'(stdev {statistics.pstdev(usage) / args.number:.1f} B), '
+                  f'{keys} key(s), encoding {encoding(sample)}')
+    finally:
+        darc.db.PAYLOAD_BUCKET = layout
+
+
+def bench_claim_db(args: 'Namespace') -> None:
+    """Benchmark concurrent claims from the RDS task queue."""
+    import peewee
+
+    from darc.const import DB
+    from darc.db import MAX_POOL, _db_claim, _save_requests_db, worker_id
+    from darc.model import RequestsQueueModel
+    from darc.model.utils import add_missing_columns
+
+    def legacy() -> 'List[Link]':
+        """``SELECT`` then ``UPDATE`` without row locks as before."""
+        query = (RequestsQueueModel
+                 .select(RequestsQueueModel.link)
+                 .where(RequestsQueueModel.timestamp <= datetime.datetime.fromtimestamp(1))
+                 .order_by(RequestsQueueModel.timestamp)
+                 .limit(MAX_POOL))
+        link_pool = [model.link for model in query]
+        if link_pool:
+            (RequestsQueueModel
+             .update(timestamp=datetime.datetime.now(), lease=worker_id())
+             .where(RequestsQueueModel.hash.in_([link.name for link in link_pool]))
+             .execute())
+        return link_pool
+
+    def claimed() -> 'List[Link]':
+        """Claim through :func:`darc.db._db_claim`."""
+        return _db_claim(RequestsQueueModel)
+
+    with DB.connection_context():
+        add_missing_columns(DB, RequestsQueueModel)
+        DB.create_tables([RequestsQueueModel])
+
+    links = make_links(args.number)
+    print(f'claim {args.number} links with {args.workers} workers, MAX_POOL={MAX_POOL}, {args.repeat} round(s)')
+    for name, claim in (('legacy', legacy), ('skip-locked', claimed)):
+        timing = []  # type: List[float]
+        duplicates = 0
+        for _ in range(args.repeat):
+            with DB.connection_context():
+                RequestsQueueModel.delete().execute()
+                _save_requests_db(links, score=0, nx=True)
+
+            counter = collections.Counter()  # type: Counter[str]
+            lock = threading.Lock()
+
+            def worker() -> None:
+                with DB.connection_context():
+                    while True:
+                        try:
+                            link_pool = claim()  # pylint: disable=cell-var-from-loop
+                        except peewee.OperationalError:  # e.g. database is locked
+                            continue
+                        if not link_pool:
+                            break
+                        with lock:  # pylint: disable=cell-var-from-loop
+                            counter.update(link.name for link in link_pool)  # pylint: disable=cell-var-from-loop
+
+            workers = [threading.Thread(target=worker) for _ in range(args.workers)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            timing.append(time.perf_counter() - start)
+            duplicates += sum(counter.values()) - len(counter)
+
+        print(f'{name:>12}: {args.number / statistics.mean(timing):10.1f} links / s '
+              f'(stdev {statistics.pstdev(timing) * 1_000:.2f} ms), '
+              f'{duplicates / args.repeat:8.1f} duplicate claim(s) / round')
+
+    with DB.connection_context():
+        RequestsQueueModel.delete().execute()
+
+
+def _cycle_worker(_: int) -> 'List[str]':
+    """Claim and release links till the task queue drained, in a worker process."""
+    from darc.db import load_requests, nack_requests
+
+    names = []  # type: List[str]
+    while True:
+        link_pool = load_requests(check=False)
+        if not link_pool:
+            break
+        for link in link_pool:
+            names.append(link.name)
+            nack_requests(link, delay=86_400)
+    return names
+
+
+def bench_cycle(args: 'Namespace') -> None:
+    """Benchmark claim & release cycles of concurrent worker processes.
+
+    The benchmark runs against the task queue backend as configured,
+    i.e. the Redis server, the database server, or the embedded SQLite
+    database under ``PATH_DATA`` if neither is given.
+
+    """
+    import multiprocessing
+
+    from darc.const import DB, FLAG_DB
+    from darc.db import MAX_POOL, _redis_command, save_requests
+    from darc.model import HostReadyModel, QueueStatsModel, RequestsQueueModel
+
+    if FLAG_DB:
+        backend = f'{type(DB).__name__} ({DB.database})'
+        with DB.connection_context():
+            DB.create_tables([RequestsQueueModel, QueueStatsModel, HostReadyModel])
+    else:
+        backend = 'Redis'
+
+    def reset(links: 'List[Link]') -> None:
+        if FLAG_DB:
+            with DB.connection_context():
+                RequestsQueueModel.delete().execute()
+        else:
+            cleanup(links)
+            _redis_command('delete', 'fails_requests')
+
+    links = make_links(args.number)
+    print(f'claim & release {args.number} links with {args.workers} processes through {backend}, '
+          f'MAX_POOL={MAX_POOL}, {args.repeat} round(s)')
+
+    context = multiprocessing.get_context('fork')
+    timing = []  # type: List[float]
+    duplicates = 0
+    for _ in range(args.repeat):
+        reset(links)
+        save_requests(links, score=0, nx=True)
+
+        counter = collections.Counter()  # type: Counter[str]
+        start = time.perf_counter()
+        with context.Pool(args.workers) as pool:
+            for names in pool.map(_cycle_worker, range(args.workers)):
+                counter.update(names)
+        timing.append(time.perf_counter() - start)
+        duplicates += sum(counter.values()) - len(counter)
+        if len(counter) != args.number:
+            print(f'warning: {args.number - len(counter)} link(s) not claimed', file=sys.stderr)
+    reset(links)
+
+    print(f'{"cycle":>12}: {args.number / statistics.mean(timing):10.1f} links / s '
+          f'(stdev {statistics.pstdev(timing) * 1_000:.2f} ms), '
+          f'{duplicates / args.repeat:8.1f} duplicate claim(s) / round')
+
+
+#: Mapping of benchmark names and functions.
+BENCHMARKS = {
+    'enqueue': bench_enqueue,
+    'claim': bench_claim,
+    'claim-stream': bench_claim_stream,
+    'codec': bench_codec,
+    'memory': bench_memory,
+    'claim-db': bench_claim_db,
+    'cycle': bench_cycle,
+}  # type: Dict[str, Callable[[Namespace], None]]
+
+#: Benchmarks which do not require a Redis server.
+OFFLINE = {'codec'}
+
+#: Benchmarks which run against the RDS backend.
+DATABASE = {'claim-db'}
+
+#: Benchmarks which run against any backend, defaulting to the embedded SQLite database.
+EMBEDDED = {'cycle'}
+
+
+def get_parser() -> 'ArgumentParser':
+    """Argument parser."""
+    parser = argparse.ArgumentParser('benchmark',
+                                     description='benchmarks for darc task queues')
+
+    parser.add_argument('-r', '--redis', help='URI to the (scratch) Redis server')
+    parser.add_argument('-d', '--db', help='URI to the (scratch) database server, c.f. DB_URL')
+    parser.add_argument('-w', '--workers', default=16, type=int, help='number of concurrent workers')
+    parser.add_argument('-n', '--number', default=2_000, type=int, help='number of links')
+    parser.add_argument('-k', '--repeat', default=5, type=int, help='number of rounds')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help='benchmark to run')
+
+    return parser
+
+
+def main() -> int:
+    """Entrypoint."""
+    parser = get_parser()
+    args = parser.parse_args()
+
+    if args.number <= 0:
+        parser.error('invalid number of links')
+    if args.repeat <= 0:
+        parser.error('invalid number of rounds')
+
+    if args.workers <= 0:
+        parser.error('invalid number of workers')
+
+    # must be set before importing darc
+    if args.benchmark in EMBEDDED:
+        if args.redis is not None:
+            os.environ['REDIS_URL'] = args.redis
+        else:
+            os.environ.pop('REDIS_URL', None)
+            if args.db is not None:
+                os.environ['DB_URL'] = args.db
+            else:
+                os.environ.pop('DB_URL', None)
+    elif args.benchmark in DATABASE:
+        if args.db is None:
+            parser.error(f'benchmark {args.benchmark!r} requires a database server')
+        os.environ.pop('REDIS_URL', None)
+        os.environ['DB_URL'] = args.db
+    elif args.benchmark not in OFFLINE:
+        if args.redis is None:
+            parser.error(f'benchmark {args.benchmark!r} requires a Redis server')
+        os.environ['REDIS_URL'] = args.redis
+    BENCHMARKS[args.benchmark](args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
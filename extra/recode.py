@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# pylint: disable=ungrouped-imports,import-outside-toplevel
+"""Re-encode legacy (pickled) link payloads of the task queues.
+
+Claiming links through :func:`darc.db.load_requests` and
+:func:`darc.db.load_selenium` already re-encodes the legacy
+payloads gradually; this script migrates the whole task
+queues at once, e.g. to reclaim Redis memory immediately,
+or after switching to the hash bucket layout of payloads
+(c.f. :data:`darc.db.PAYLOAD_BUCKET`).
+
+The script reads the same environment variables as :mod:`darc`
+(:envvar:`REDIS_URL`, :envvar:`DB_URL`, etc.) and is safe to run
+while the crawlers are running.
+
+"""
+
+import argparse
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+    from typing import Iterator, List, Optional, Type, Union
+
+    from darc.model import RequestsQueueModel, SeleniumQueueModel
+
+
+def recode_redis(key: str, count: int) -> int:
+    """Re-encode payloads of a Redis task queue.
+
+    With :data:`darc.db.PAYLOAD_BUCKET` set, payloads still stored
+    at their own keys are moved into the hash buckets as well.
+
+    """
+    from darc.db import (PAYLOAD_BUCKET, _payload_bucket, _payload_field, _payload_prefix, _payload_set,
+                         _redis_command, _redis_shards, _shard_key)
+    from darc.db import redis as REDIS
+    from darc.link import LINK_MAGIC, dumps_link, loads_link
+
+    number = 0
+    total = 0
+    for shard in _redis_shards(key):  # type: ignore[arg-type]
+        queue = _shard_key(key, shard)
+        prefix = _payload_prefix(shard)
+        for chunk in _zscan_chunks(queue, count):
+            names = [name.decode() for name in chunk]
+            payloads = REDIS.mget([prefix + name for name in names])  # type: List[bytes]
+            if PAYLOAD_BUCKET > 0:
+                pipeline = REDIS.pipeline(transaction=False)
+                for name in names:
+                    pipeline.hget(_payload_bucket(prefix, name), _payload_field(name))
+                buckets = pipeline.execute()  # type: List[Optional[bytes]]
+            else:
+                buckets = [None] * len(names)
+
+            pipeline = REDIS.pipeline(transaction=False)
+            for name, data, bucket in zip(names, payloads, buckets):
+                if bucket is not None:
+                    if bucket.startswith(LINK_MAGIC):
+                        continue
+                    data = bucket
+                elif data is None or (data.startswith(LINK_MAGIC) and PAYLOAD_BUCKET <= 0):
+                    continue
+                if not data.startswith(LINK_MAGIC):
+                    data = dumps_link(loads_link(data))
+                _payload_set(pipeline, prefix, name, data, xx=True)
+                number += 1
+            pipeline.execute()
+        total += _redis_command('zcard', queue)
+    print(f'{key}: re-encoded {number} payload(s) of {total} link(s)')
+    return number
+
+
+def _zscan_chunks(key: str, count: int) -> 'Iterator[List[bytes]]':
+    """Iterate over members of a sorted set in chunks."""
+    from darc.db import _redis_command
+
+    cursor = 0
+    while True:
+        cursor, members = _redis_command('zscan', key, cursor, count=count)
+        if members:
+            yield [name for name, _ in members]
+        if cursor == 0:
+            break
+
+
+def recode_db(model: 'Union[Type[RequestsQueueModel], Type[SeleniumQueueModel]]', count: int) -> int:
+    """Re-encode payloads of a RDS task queue."""
+    from darc.const import DB
+    from darc.link import LINK_MAGIC, loads_link
+
+    number = 0
+    last_id = 0
+    with DB.connection_context():
+        while True:
+            # bypass :class:`~darc.model.utils.LinkField` conversion for raw payloads
+            query = model.select(model.id, model.link).where(model.id > last_id).order_by(model.id).limit(count)
+            rows = DB.execute_sql(*query.sql()).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            with DB.atomic():
+                for row_id, data in rows:
+                    data = bytes(data)
+                    if data.startswith(LINK_MAGIC):
+                        continue
+                    model.update(link=loads_link(data)).where(model.id == row_id).execute()
+                    number += 1
+    print(f'{model._meta.table_name}: re-encoded {number} payload(s)')  # pylint: disable=protected-access
+    return number
+
+
+def get_parser() -> 'ArgumentParser':
+    """Argument parser."""
+    parser = argparse.ArgumentParser('recode',
+                                     description='re-encode legacy link payloads of darc task queues')
+    parser.add_argument('-c', '--count', default=1_000, type=int, help='number of links per batch')
+    return parser
+
+
+def main() -> int:
+    """Entrypoint."""
+    parser = get_parser()
+    args = parser.parse_args()
+
+    if args.count <= 0:
+        parser.error('invalid batch size')
+
+    from darc.const import FLAG_DB
+    from darc.model import RequestsQueueModel, SeleniumQueueModel
+
+    if FLAG_DB:
+        recode_db(RequestsQueueModel, args.count)
+        recode_db(SeleniumQueueModel, args.count)
+    else:
+        recode_redis('queue_requests', args.count)
+        recode_redis('queue_selenium', args.count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -109,7 +109,7 @@ attrs = dict(
         'pottery',
         'psutil',
         'python-datauri',
-        'redis[hiredis]',
+        'redis[hiredis]>=4.2',
         'requests-futures',
         'requests[socks]',
         'selenium',
@@ -128,6 +128,8 @@ attrs = dict(
         'SQLite': ['pysqlite3'],
         'MySQL': ['PyMySQL[rsa]'],
         'PostgreSQL': ['psycopg2'],
+        # asyncio crawler
+        'asyncio': ['aiohttp', 'aiohttp-socks'],
     },
     setup_requires=[
         #'bpc-walrus; python_version < "3.8"',
@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+"""Tests of the task queues and the link encoding of :mod:`darc`.
+
+The Redis backend is tested against :mod:`fakeredis`, i.e. no Redis
+server is required; the tests are skipped if :mod:`fakeredis` is not
+installed.
+
+"""
+
+import asyncio
+import io
+import os
+import pickle
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from typing import TYPE_CHECKING
+
+os.environ.setdefault('DARC_USER', 'darc')
+os.environ.setdefault('PATH_DATA', tempfile.mkdtemp(prefix='darc-test-'))
+os.environ.setdefault('REDIS_URL', 'redis://localhost')
+os.environ.setdefault('TOR_PASS', 'darc')
+os.environ['SAVE_DB'] = '0'
+
+try:
+    import fakeredis
+    import fakeredis.aioredis
+    import redis
+    import redis.asyncio
+except ImportError:
+    fakeredis = None
+else:
+    _SERVER = fakeredis.FakeServer()
+    redis.Redis.from_url = lambda url, **kwargs: fakeredis.FakeRedis(server=_SERVER)  # type: ignore[assignment]
+    redis.asyncio.Redis.from_url = lambda url, **kwargs: fakeredis.aioredis.FakeRedis(server=_SERVER)  # type: ignore[assignment] # pylint: disable=line-too-long
+    redis.BlockingConnectionPool.from_url = lambda url, **kwargs: fakeredis.FakeRedis(server=_SERVER).connection_pool  # type: ignore[assignment] # pylint: disable=line-too-long
+
+    import darc.aiocrawl as darc_aiocrawl
+    import darc.aiodb as darc_aiodb
+    import darc.const as darc_const
+    import darc.db as darc_db
+    import darc.link as darc_link
+    import darc.pipeline as darc_pipeline
+    import darc.process as darc_process
+    import darc.signal as darc_signal
+    from darc.link import parse_link
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Tuple
+
+    from darc.link import Link
+
+
+@unittest.skipIf(fakeredis is None, 'fakeredis not installed')
+class TestQueue(unittest.TestCase):
+    """Task queues on Redis."""
+
+    def setUp(self) -> None:
+        darc_db.redis.flushall()
+        darc_db._STREAM_GROUPS.clear()  # pylint: disable=protected-access
+        darc_db._HOSTNAME_CACHE.clear()  # pylint: disable=protected-access
+
+    @staticmethod
+    def leases() -> int:
+        """Number of leased links in the task queues."""
+        return sum(darc_db.redis.hlen(key) for key in darc_db.redis.scan_iter('lease_*'))
+
+    def claim(self, count: int) -> 'List[Link]':
+        """Enqueue and claim ``count`` new links."""
+        links = [parse_link(f'http://host{index % 3}.onion/{index}') for index in range(count)]
+        darc_db.save_requests(links, score=0, nx=True)
+        link_pool = darc_db.load_requests(check=False)
+        self.assertEqual(sorted(link_pool), sorted(links))
+        self.assertEqual(self.leases(), count)
+        return link_pool
+
+    def test_ack_nack(self) -> None:
+        """Links claimed are released by acknowledgements, counting the failures."""
+        link, failed = self.claim(2)
+        priority, darc_db.PRIORITY = darc_db.PRIORITY, True
+        try:
+            self.assertTrue(darc_db.ack_requests(link))
+            self.assertTrue(darc_db.nack_requests(failed))
+        finally:
+            darc_db.PRIORITY = priority
+        self.assertEqual(self.leases(), 0)
+
+        queue = darc_db._shard_key('queue_requests', None)  # pylint: disable=protected-access
+        self.assertIsNone(darc_db.redis.hget(darc_db._failure_key(queue), link.name))  # pylint: disable=protected-access
+        self.assertEqual(darc_db.redis.hget(darc_db._failure_key(queue), failed.name), b'1')  # pylint: disable=protected-access
+
+        # still queued, but not due till TIME_CACHE
+        self.assertIsNotNone(darc_db.redis.zscore(queue, link.name))
+        self.assertIsNotNone(darc_db.redis.zscore(queue, failed.name))
+        self.assertEqual(darc_db.load_requests(check=False), [])
+
+        # released already
+        self.assertFalse(darc_db.ack_requests(link))
+        self.assertFalse(darc_db.nack_requests(failed))
+
+    def test_lease_expired(self) -> None:
+        """Links reclaimed upon lease expiry are released by the new owner only."""
+        lease_timeout, darc_db.LEASE_TIMEOUT = darc_db.LEASE_TIMEOUT, 0
+        try:
+            link, = self.claim(1)
+            with darc_db.lease_owner('other'):
+                self.assertEqual(darc_db.load_requests(check=False), [link])
+        finally:
+            darc_db.LEASE_TIMEOUT = lease_timeout
+
+        self.assertFalse(darc_db.ack_requests(link))
+        self.assertEqual(self.leases(), 1)
+        with darc_db.lease_owner('other'):
+            self.assertTrue(darc_db.ack_requests(link))
+        self.assertEqual(self.leases(), 0)
+
+    def test_export_import(self) -> None:
+        """Task queues are restored from their frontier dump."""
+        link_pool = self.claim(6)
+        self.assertEqual(darc_db.have_hostname(link_pool[0]), (False, False))
+        darc_db.save_selenium(link_pool[:2], score=0, nx=True)
+        for link in link_pool:
+            self.assertTrue(darc_db.ack_requests(link))
+
+        def dump() -> 'Dict[str, List[Tuple[bytes, float]]]':
+            return {key: sorted(darc_db.redis.zrange(key, 0, -1, withscores=True))
+                    for key in darc_db.FRONTIER_QUEUES}
+
+        queues = dump()
+        file = io.BytesIO()
+        self.assertEqual(darc_db.export_queues(file), {
+            'queue_hostname': 1, 'queue_requests': 6, 'queue_selenium': 2,
+        })
+
+        darc_db.redis.flushall()
+        file.seek(0)
+        self.assertEqual(darc_db.import_queues(file), {
+            'queue_hostname': 1, 'queue_requests': 6, 'queue_selenium': 2,
+        })
+        self.assertEqual(dump(), queues)
+
+        link = link_pool[0]
+        payload = darc_db.redis.get(darc_db._payload_prefix(None) + link.name)  # pylint: disable=protected-access
+        self.assertEqual(darc_db.loads_link(payload), link)
+
+    def test_ack_other_thread(self) -> None:
+        """Links claimed by one thread are acknowledged by another."""
+        link_pool = self.claim(3)
+        owner = darc_db.worker_id()
+
+        results = []
+
+        def ack() -> None:
+            with darc_db.lease_owner(owner):
+                results.extend(darc_db.ack_requests(link) for link in link_pool)
+
+        thread = threading.Thread(target=ack)
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(self.leases(), 0)
+
+    def test_ack_in_thread(self) -> None:
+        """Links claimed by the event loop are acknowledged in a thread."""
+        links = [parse_link(f'http://host{index}.onion/') for index in range(3)]
+        darc_db.save_requests(links, score=0, nx=True)
+
+        async def crawl() -> 'List[bool]':
+            link_pool = await darc_aiodb.load_requests(check=False)
+            self.assertEqual(sorted(link_pool), sorted(links))
+            return [await darc_aiocrawl.run_in_thread(darc_db.ack_requests, link) for link in link_pool]
+
+        self.assertEqual(asyncio.run(crawl()), [True, True, True])
+        self.assertEqual(self.leases(), 0)
+
+    def test_pipeline(self) -> None:
+        """Links of a round are released by the pipeline stages, without buffers."""
+        link_pool = self.claim(12)
+        results = []
+
+        def persist(crawled: 'Link') -> None:
+            results.append(darc_db.ack_requests(crawled))
+
+        stages = darc_pipeline.fetch_requests, darc_pipeline.parse_requests, darc_pipeline.persist_requests
+        darc_pipeline.fetch_requests = lambda link: link
+        darc_pipeline.parse_requests = lambda crawled, executor=None: crawled
+        darc_pipeline.persist_requests = persist
+        try:
+            self.assertEqual(darc_db.BUFFER_SIZE, 0)
+            with darc_db.write_behind() as buffer:
+                self.assertIsNone(buffer)
+                darc_pipeline.run_pipeline(link_pool)
+        finally:
+            darc_pipeline.fetch_requests, darc_pipeline.parse_requests, darc_pipeline.persist_requests = stages
+        self.assertEqual(results, [True] * 12)
+        self.assertEqual(self.leases(), 0)
+
+    def test_process_round(self) -> None:
+        """Links of a round are released by the round threads, sharing the locks."""
+        link_pool = self.claim(12)
+        results = []
+        counter = [0]
+
+        # single worker process with round threads
+        flag_mp, darc_const.FLAG_MP = darc_const.FLAG_MP, False
+        round_threads, darc_const.ROUND_THREADS = darc_const.ROUND_THREADS, 4
+        try:
+            lock = darc_const.get_lock()
+        finally:
+            darc_const.FLAG_MP = flag_mp
+            darc_const.ROUND_THREADS = round_threads
+
+        def worker(link: 'Link') -> None:
+            with lock:
+                count = counter[0]
+                time.sleep(0.01)
+                counter[0] = count + 1
+            results.append((threading.get_ident(), darc_db.ack_requests(link)))
+
+        round_threads, darc_process.ROUND_THREADS = darc_process.ROUND_THREADS, 4
+        try:
+            darc_process.process_round(worker, link_pool)
+        finally:
+            darc_process.ROUND_THREADS = round_threads
+        self.assertEqual(counter[0], 12)
+        self.assertEqual([acked for _, acked in results], [True] * 12)
+        self.assertGreater(len({ident for ident, _ in results}), 1)
+        self.assertEqual(self.leases(), 0)
+
+    def test_nack_delay(self) -> None:
+        """Links released with a delay are not due before the delay."""
+        link, = self.claim(1)
+        time_cache, darc_db.TIME_CACHE = darc_db.TIME_CACHE, None
+        try:
+            self.assertTrue(darc_db.nack_requests(link, delay=3600))
+            self.assertEqual(self.leases(), 0)
+            self.assertEqual(darc_db.load_requests(check=False), [])
+            score = darc_db.redis.zscore(darc_db._shard_key('queue_requests', darc_db.shard_name(link)), link.name)  # pylint: disable=protected-access
+            self.assertGreater(score, time.time() + 3500)
+        finally:
+            darc_db.TIME_CACHE = time_cache
+
+    def test_exit_amid_flush(self) -> None:
+        """Workers signalled to exit amid flushing exit once flushed."""
+        link_pool = self.claim(3)
+        release_links = darc_db._release_links  # pylint: disable=protected-access
+
+        def release(*args: 'Any') -> None:
+            # signal handlers of the worker process, c.f. darc.process.process
+            darc_db.flush_buffers(signal.SIGTERM)
+            darc_signal.exit_worker(signal.SIGTERM)
+            release_links(*args)
+
+        buffer_size, darc_db.BUFFER_SIZE = darc_db.BUFFER_SIZE, 100
+        darc_db._release_links = release  # pylint: disable=protected-access
+        try:
+            with self.assertRaises(SystemExit) as context:
+                with darc_db.write_behind() as buffer:
+                    self.assertIsNotNone(buffer)
+                    for link in link_pool:
+                        self.assertTrue(darc_db.ack_requests(link))
+                    self.assertEqual(self.leases(), 3)
+        finally:
+            darc_db._release_links = release_links  # pylint: disable=protected-access
+            darc_db.BUFFER_SIZE = buffer_size
+        self.assertEqual(context.exception.code, 128 + signal.SIGTERM)
+        self.assertEqual(self.leases(), 0)
+
+    def test_leave_streams(self) -> None:
+        """Consumers of the streams are removed upon exit, or by the garbage collection."""
+        redis_queue, darc_db.REDIS_QUEUE = darc_db.REDIS_QUEUE, 'stream'
+        try:
+            link_pool = self.claim(3)
+            stream = darc_db._stream_key(darc_db._shard_key('queue_requests', None))  # pylint: disable=protected-access
+            consumers = darc_db.redis.xinfo_consumers(stream, darc_db.STREAM_GROUP)
+            self.assertEqual([(consumer['name'].decode(), consumer['pending']) for consumer in consumers],
+                             [(darc_db.worker_id(), 3)])
+
+            # pending entries are kept for the other workers
+            darc_db.leave_streams()
+            self.assertEqual(len(darc_db.redis.xinfo_consumers(stream, darc_db.STREAM_GROUP)), 1)
+
+            for link in link_pool:
+                self.assertTrue(darc_db.ack_requests(link))
+            darc_db.leave_streams()
+            self.assertEqual(darc_db.redis.xinfo_consumers(stream, darc_db.STREAM_GROUP), [])
+
+            # consumer of a dead worker
+            darc_db.redis.xreadgroup(darc_db.STREAM_GROUP, 'dead', {stream: '>'})
+            lease_timeout, darc_db.LEASE_TIMEOUT = darc_db.LEASE_TIMEOUT, 0
+            gc_interval, darc_db.GC_INTERVAL = darc_db.GC_INTERVAL, 60
+            try:
+                self.assertEqual(darc_db.compact().get('consumer'), 1)
+            finally:
+                darc_db.LEASE_TIMEOUT = lease_timeout
+                darc_db.GC_INTERVAL = gc_interval
+            self.assertEqual(darc_db.redis.xinfo_consumers(stream, darc_db.STREAM_GROUP), [])
+        finally:
+            darc_db.REDIS_QUEUE = redis_queue
+
+    def test_script_slots(self) -> None:
+        """Keys accessed by the scripts of a shard reside in one Redis Cluster slot."""
+        calls = []  # type: List[Tuple[str, List[str]]]
+
+        def record(name: str) -> 'Callable[..., Any]':
+            script = darc_db.REDIS_SCRIPTS[name]
+
+            def call(keys: 'List[str]', args: 'List[Any]', client: 'Any' = None) -> 'Any':
+                calls.append((name, keys))
+                return script(keys=keys, args=args, client=client)
+            return call
+
+        scripts = dict(darc_db.REDIS_SCRIPTS)
+        shard_num, darc_db.SHARD_NUM = darc_db.SHARD_NUM, 4
+        gc_interval, darc_db.GC_INTERVAL = darc_db.GC_INTERVAL, 60
+        gc_retention, darc_db.GC_RETENTION = darc_db.GC_RETENTION, -3600
+        darc_db.REDIS_SCRIPTS.update((name, record(name)) for name in scripts)
+        try:
+            link_pool = self.claim(6)
+            self.assertTrue(darc_db.ack_requests(link_pool[0]))
+            self.assertTrue(darc_db.nack_requests(link_pool[1]))
+            darc_db.redis.zrem(darc_db._shard_key('queue_requests', darc_db.shard_name(link_pool[2])), link_pool[2].name)  # pylint: disable=protected-access
+            darc_db.compact()
+        finally:
+            darc_db.REDIS_SCRIPTS.update(scripts)
+            darc_db.SHARD_NUM = shard_num
+            darc_db.GC_INTERVAL = gc_interval
+            darc_db.GC_RETENTION = gc_retention
+        self.assertEqual({name for name, _ in calls}, {'claim', 'release', 'collect', 'trim'})
+        for name, keys in calls:
+            self.assertEqual(len({redis.crc.key_slot(key.encode()) for key in keys}), 1, name)
+            if name != 'release' and keys != ['queue_hostname']:
+                # payload key prefix, i.e. hash tag of the shard
+                self.assertRegex(keys[-1], r'^\{\w+:\d+\}$', name)
+
+    def test_hostname_dropped(self) -> None:
+        """Hosts dropped by other workers are new again within the cache TTL."""
+        link = parse_link('http://host.onion/')
+        hostname_ttl, darc_db.HOSTNAME_TTL = darc_db.HOSTNAME_TTL, 0.2
+        try:
+            self.assertEqual(darc_db.have_hostname(link), (False, False))
+            self.assertEqual(darc_db.have_hostname(link), (True, False))
+
+            # dropped by another worker
+            darc_db.redis.zrem('queue_hostname', link.host)
+            self.assertEqual(darc_db.have_hostname(link), (True, False))
+            time.sleep(0.3)
+            self.assertEqual(darc_db.have_hostname(link), (False, False))
+        finally:
+            darc_db.HOSTNAME_TTL = hostname_ttl
+
+
+@unittest.skipIf(fakeredis is None, 'fakeredis not installed')
+class TestLink(unittest.TestCase):
+    """Serialisation of links."""
+
+    def setUp(self) -> None:
+        self.link = parse_link('http://example.onion/page?query#frag',
+                               backref=parse_link('http://seed.onion/'))
+
+    def assertLinkEqual(self, link: 'Link', other: 'Link') -> None:  # pylint: disable=invalid-name
+        """Check if the fields of two links are equal."""
+        for field in ('url', 'proxy', 'host', 'base', 'name', 'url_parse', 'depth'):
+            self.assertEqual(getattr(link, field), getattr(other, field), field)
+        self.assertEqual(link.url_backref, other.url_backref)
+
+    def test_current(self) -> None:
+        """Links are restored from the current encoding."""
+        data = darc_link.dumps_link(self.link)
+        self.assertTrue(data.startswith(darc_link.LINK_MAGIC + bytes((darc_link.LINK_VERSION,))))
+        link = darc_link.loads_link(data)
+        self.assertLinkEqual(link, self.link)
+        self.assertEqual(link.depth, 1)
+        self.assertLinkEqual(link.url_backref, self.link.url_backref)
+
+    def test_version_1(self) -> None:
+        """Links are restored from the encoding of version 1, i.e. without depth."""
+        depth = darc_link._dump_field(str(self.link.depth))  # pylint: disable=protected-access
+        data = darc_link.dumps_link(self.link)
+        self.assertTrue(data.endswith(depth))
+        data = darc_link.LINK_MAGIC + b'\x01' + data[len(darc_link.LINK_MAGIC) + 1:-len(depth)]
+        self.assertLinkEqual(darc_link.loads_link(data), self.link)
+
+        seed = darc_link.dumps_link(self.link.url_backref)
+        data = darc_link.LINK_MAGIC + b'\x01' + seed[len(darc_link.LINK_MAGIC) + 1:-len(depth)]
+        self.assertLinkEqual(darc_link.loads_link(data), self.link.url_backref)
+
+    def test_pickle(self) -> None:
+        """Links are restored from the legacy pickle encoding."""
+        link = darc_link.loads_link(pickle.dumps(self.link))
+        self.assertLinkEqual(link, self.link)
+        self.assertLinkEqual(link.url_backref, self.link.url_backref)
+
+    def test_malformed(self) -> None:
+        """Malformed encodings and unknown versions are rejected."""
+        data = darc_link.dumps_link(self.link)
+        with self.assertRaises(ValueError):
+            darc_link.loads_link(darc_link.LINK_MAGIC + bytes((darc_link.LINK_VERSION + 1,)) + data[3:])
+        with self.assertRaises(ValueError):
+            darc_link.loads_link(data[:-len(darc_link._dump_field('1'))])  # pylint: disable=protected-access
+
+
+@unittest.skipIf(fakeredis is None, 'fakeredis not installed')
+@unittest.skipUnless(hasattr(os, 'fork'), 'os.fork not available')
+class TestDatabase(unittest.TestCase):
+    """Embedded database."""
+
+    def test_fork(self) -> None:
+        """Child processes connect anew instead of reusing the parent's connections."""
+        database = darc_const.DB
+        with database.connection_context():
+            self.assertEqual(database.execute_sql('SELECT 1').fetchone(), (1,))
+        database.connect()
+        try:
+            connection = database.connection()
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover
+                status = 1
+                try:
+                    with database.connection_context():
+                        if database.connection() is not connection and \
+                                database.execute_sql('SELECT 1').fetchone() == (1,):
+                            status = 0
+                finally:
+                    os._exit(status)  # pylint: disable=protected-access
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+            self.assertIs(database.connection(), connection)
+            self.assertEqual(database.execute_sql('SELECT 1').fetchone(), (1,))
+        finally:
+            database.close()
+
+
+if __name__ == '__main__':
+    unittest.main()